@@ -4,6 +4,7 @@
 * :mod:`misleep.analysis.detection`     -- SWA / spindle / artifact detection
 * :mod:`misleep.analysis.features`      -- auto-staging feature extraction
 * :mod:`misleep.analysis.auto_stage`    -- LightGBM auto staging
+* :mod:`misleep.analysis.stats`         -- cohort-level sleep architecture statistics
 * :mod:`misleep.analysis.transformer`   -- Causal-transformer auto staging (PyTorch)
 
 The transformer sub-module is only imported on demand because it requires
@@ -12,6 +13,7 @@ PyTorch, which is not available on every platform.
 
 from .detection import SWA_detection, spindle_detection, artifact_detection
 from .auto_stage import auto_stage_gbm, result_constraints, model_path
+from .stats import sleep_architecture, cohort_stats, write_stats
 
 __all__ = [
     "SWA_detection",
@@ -20,4 +22,7 @@ __all__ = [
     "auto_stage_gbm",
     "result_constraints",
     "model_path",
+    "sleep_architecture",
+    "cohort_stats",
+    "write_stats",
 ]
@@ -99,7 +99,7 @@ def result_constraints(pred_prob):
 
 
 def auto_stage_gbm(EEG, EMG, label, sf, EEG_channel="F", mouse_age="adult",
-                   ACC=None, return_probs=False, temperature=0.1):
+                   ACC=None, return_probs=False, temperature=0.1, filtered=None):
     """Auto-stage a recording with the benchmark LightGBM models.
 
     All mouse ages use the same model; ``mouse_age`` is kept for API
@@ -128,6 +128,11 @@ def auto_stage_gbm(EEG, EMG, label, sf, EEG_channel="F", mouse_age="adult",
         state) as a numpy array.
     temperature : float
         HMM softmax temperature (lower sharpens the transition structure).
+    filtered : dict, optional
+        Already band-passed channels by role (``'eeg'``, ``'emg'``,
+        ``'acc'``), as returned by
+        :func:`misleep.analysis.autostage.benchmark.filter_role`, e.g. from
+        the :class:`MiData` signal cache. They are not filtered again.
 
     Returns
     -------
@@ -160,7 +165,8 @@ def auto_stage_gbm(EEG, EMG, label, sf, EEG_channel="F", mouse_age="adult",
 
     sig_map = {"eeg": EEG, "emg": EMG, "acc": ACC}
     res = _bm.predict_model(models[combo], sig_map, sf,
-                            site=EEG_channel, temperature=temperature)
+                            site=EEG_channel, temperature=temperature,
+                            filtered=filtered)
 
     # Full-length per-second labels (every second gets a label; the first
     # W seconds and the tail take the nearest epoch) + per-epoch confidence
@@ -11,6 +11,7 @@ from misleep.analysis.autostage.benchmark import (  # noqa: F401
     STRIDE,
     W,
     extract_recording,
+    filter_role,
     load_models,
     model_combo,
     models_path,
@@ -19,6 +20,6 @@ from misleep.analysis.autostage.benchmark import (  # noqa: F401
 
 __all__ = [
     "EPOCH_S", "STRIDE", "W",
-    "extract_recording", "load_models", "model_combo", "models_path",
+    "extract_recording", "filter_role", "load_models", "model_combo", "models_path",
     "predict_model",
 ]
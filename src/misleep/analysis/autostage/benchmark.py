@@ -31,6 +31,7 @@ from misleep._compat import resource_dir
 from misleep.analysis.autostage.features import (
     extract_fast,
     filter_channels,
+    filter_signal,
 )
 from misleep.analysis.autostage.hmm import (
     forward_backward,
@@ -77,7 +78,17 @@ def model_combo(site="F", use_emg=False, use_acc=False):
     return combo
 
 
-def extract_recording(sig_map, sf, site="F", W=W, stride=STRIDE):
+def filter_role(sig, sf, role):
+    """Band-pass one channel exactly as :func:`extract_recording` does.
+
+    ``role`` is ``'eeg'``, ``'emg'`` or ``'acc'``. The result can be
+    cached (e.g. with :meth:`misleep.data.MiData.derived_signal`) and
+    passed back through the ``filtered`` argument.
+    """
+    return filter_signal(np.asarray(sig, dtype=np.float32), sf, role)
+
+
+def extract_recording(sig_map, sf, site="F", W=W, stride=STRIDE, filtered=None):
     """Extract per-epoch (5 s) features from the selected channels.
 
     Parameters
@@ -89,6 +100,9 @@ def extract_recording(sig_map, sf, site="F", W=W, stride=STRIDE):
     site : {'F', 'P'}
         EEG electrode site - decides the ``eegf`` / ``eegp`` (and
         ``cohf`` / ``cohp``) feature prefixes.
+    filtered : dict, optional
+        Already band-passed channels by role (output of
+        :func:`filter_role`); these are not filtered again.
 
     Returns
     -------
@@ -105,8 +119,13 @@ def extract_recording(sig_map, sf, site="F", W=W, stride=STRIDE):
     if sig_map.get("acc") is not None:
         renamed["ACC"] = np.asarray(sig_map["acc"], dtype=np.float32)
 
-    filtered = filter_channels(renamed, sf)
-    r = extract_fast(filtered, sf, W=W, stride=stride, return_seconds=True)
+    roles = {"EEG_F": "eeg", "EEG_P": "eeg", "EMG": "emg", "ACC": "acc"}
+    done = {name: filtered[roles[name]] for name in renamed
+            if filtered and filtered.get(roles[name]) is not None}
+    done.update(filter_channels({name: sig for name, sig in renamed.items()
+                                 if name not in done}, sf))
+    r = extract_fast({name: done[name] for name in renamed}, sf, W=W, stride=stride,
+                     return_seconds=True)
     X_ps = r["X"]  # per-second features
     secs = r["seconds"]
 
@@ -118,13 +137,14 @@ def extract_recording(sig_map, sf, site="F", W=W, stride=STRIDE):
             "seconds": secs[: n_epochs * EPOCH_S].reshape(n_epochs, EPOCH_S).mean(axis=1)}
 
 
-def predict_model(model, sig_map, sf, site="F", temperature=0.3):
+def predict_model(model, sig_map, sf, site="F", temperature=0.3, filtered=None):
     """Predict a recording with a single benchmark model.
 
     The predictions are aligned to the **full recording** (1 value per
     second): the first ``W`` seconds (window warm-up) take the first
     epoch's label/confidence and the trailing remainder takes the last
     epoch's values, so every second of the recording gets a label.
+    ``filtered`` is passed on to :func:`extract_recording`.
 
     Returns a dict with:
         label      : per-epoch (5 s) states (1/2/3)
@@ -133,7 +153,7 @@ def predict_model(model, sig_map, sf, site="F", temperature=0.3):
         label_sec  : per-second states, full recording length
         conf_sec   : per-second confidence, full recording length
     """
-    r = extract_recording(sig_map, sf, site=site)
+    r = extract_recording(sig_map, sf, site=site, filtered=filtered)
     if r["X"].shape[0] == 0:
         raise ValueError("Signal too short for auto staging.")
 
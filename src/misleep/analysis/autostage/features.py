@@ -20,8 +20,6 @@ with the EEG electrode site, which decides the feature prefixes:
 
 from __future__ import annotations
 
-from math import factorial, log2
-
 import numpy as np
 from scipy import signal
 
@@ -201,21 +199,13 @@ def perm_entropy_series(x, fs, stride, W, decim=16, m=3, tau=1):
     if len(xd) < n_win:
         return np.zeros(0)
     from numpy.lib.stride_tricks import sliding_window_view
+
+    from misleep.utils.entropy import perm_entropy
+
     win = sliding_window_view(xd, n_win)[::n_stride]  # (T, n_win)
-    T = win.shape[0]
-    if T == 0:
+    if win.shape[0] == 0:
         return np.zeros(0)
-    sub = sliding_window_view(win, m * tau, axis=1)[:, ::tau]  # (T, K, m)
-    order = np.argsort(sub, axis=2)
-    code = order[:, :, 0] * (m * m) + order[:, :, 1] * m + order[:, :, 2]
-    n_bins = m ** m
-    T_, K = code.shape
-    flat = code + np.arange(T_)[:, None] * n_bins
-    counts = np.bincount(flat.ravel(), minlength=T_ * n_bins).reshape(T_, n_bins)
-    n_subs = n_win - (m - 1) * tau
-    probs = counts / n_subs
-    pe = -np.sum(probs * np.log2(np.maximum(probs, 1e-12)), axis=1)
-    return pe / log2(factorial(m))
+    return perm_entropy(win, order=m, delay=tau, normalize=True, axis=1)
 
 
 # --------------------------------------------------------------------------
@@ -14,7 +14,8 @@ from misleep.preprocessing.spectral import spectrogram
 from misleep.utils.annotation import lst2group
 
 
-def SWA_detection(signal, sf, freq_band=[0.5, 4], amp_threshold=(75,), df=False, start_time_sec=0):
+def SWA_detection(signal, sf, freq_band=[0.5, 4], amp_threshold=(75,), df=False, start_time_sec=0,
+                  prefiltered=False):
     """Slow-wave activity (SWA) detection.
 
     The signal is band-pass filtered to ``freq_band``; waves are detected
@@ -36,14 +37,20 @@ def SWA_detection(signal, sf, freq_band=[0.5, 4], amp_threshold=(75,), df=False,
     start_time_sec : float
         Offset (in seconds) added to all detection times -- useful when
         processing segments of a longer recording.
+    prefiltered : bool
+        Whether ``signal`` is already band-pass filtered to ``freq_band``
+        (e.g. a slice of :meth:`MiData.filtered_signal`); skips the filter.
 
     Returns
     -------
     list or pandas.DataFrame or None
         Detections (``None`` when nothing was found).
     """
-    band_data, _ = signal_filter(signal, sf, btype="bandpass",
-                                 low=freq_band[0], high=freq_band[1])
+    if prefiltered:
+        band_data = signal
+    else:
+        band_data, _ = signal_filter(signal, sf, btype="bandpass",
+                                     low=freq_band[0], high=freq_band[1])
 
     # Find peaks and zero-crossings
     pos_peak_idx, _ = find_peaks(band_data, amp_threshold)
@@ -3,12 +3,17 @@
 
 Implements the window-based time- and frequency-domain features used by
 the LightGBM auto-staging model (EEG and EMG).
+
+Features are computed for all windows at once, along ``axis=1`` of a
+``(n_windows, n_samples)`` array -- a strided view of the signal from
+:func:`window_view`, or the windows of :func:`split_window_data` stacked.
 """
 
 from math import floor
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy import stats
 
 from misleep.preprocessing.spectral import spectrogram, band_power
@@ -49,83 +54,139 @@ def split_window_data(data, sf, state, window_length=20, stride_length=5):
     return window_data
 
 
+def window_view(data, sf, window_length=20, stride_length=5):
+    """Sliding windows of a signal as one ``(n_windows, n_samples)`` array.
+
+    The windows start where those of :func:`split_window_data` do, but the
+    truncated windows at the end of the signal are left out.
+
+    Parameters
+    ----------
+    data : ndarray
+        1-D signal.
+    sf : float
+        Sampling frequency.
+    window_length : int
+        Window length in seconds.
+    stride_length : int
+        Stride in seconds.
+
+    Returns
+    -------
+    ndarray
+        A strided view of ``data`` when the stride is a whole number of
+        samples (a copy otherwise).
+    """
+    n_samples = int(window_length * sf)
+    if data.shape[0] < n_samples:
+        return np.empty((0, n_samples), dtype=data.dtype)
+    data_sec_length = floor(data.shape[0] / sf)
+    starts = (np.arange(0, data_sec_length - stride_length, stride_length) * sf).astype(np.int64)
+    starts = starts[starts + n_samples <= data.shape[0]]
+    windows = sliding_window_view(data, n_samples)
+    step = stride_length * sf
+    if float(step).is_integer():
+        return windows[::int(step)][:starts.size]
+    return windows[starts]
+
+
 def delta_theta_ratio_theta(data, sf):
     """Delta/theta ratio and theta power from the first 5 seconds.
 
     Parameters
     ----------
     data : ndarray
-        Windowed signal (20 s).
+        Windowed signal (20 s), or ``(n_windows, n_samples)`` windows.
     sf : float
         Sampling frequency.
 
     Returns
     -------
-    (ratio, theta_power) : tuple of float
+    (ratio, theta_power) : tuple of float (arrays for 2-D ``data``)
     """
-    freq, t, Sxx = spectrogram(data, sf, win_sec=1)
-    band_second = np.where(t < 5)
-    psd = np.sum(np.array([each[band_second] for each in Sxx]), axis=1)
+    # Windows starting before 5 s only reach 5.5 s into the signal
+    freq, t, Sxx = spectrogram(data[..., :int(6 * sf)], sf, win_sec=1)
+    psd = Sxx[..., t < 5].sum(axis=-1)
     band_power_dict = band_power(psd, freq, bands=[[0.5, 4, "delta"], [5, 9, "theta"]], relative=True)
     return band_power_dict["delta"] / band_power_dict["theta"], band_power_dict["theta"]
 
 
 def self_zscore(feature, quantile=0.95):
     """Quantile-clipped z-score normalization of a feature array."""
+    feature = np.asarray(feature)
     upper_quantile = np.quantile(feature, quantile)
-    feature = [each if each < upper_quantile else upper_quantile for each in feature]
+    feature = np.where(feature < upper_quantile, feature, upper_quantile)
     return (feature - np.mean(feature)) / np.std(feature)
 
 
-def get_data_features(data, sf, data_format="EEG"):
+def _window_features(windows, sf, eeg):
+    """Raw (not normalized) features of every row of ``windows``."""
+    head = windows[:, :int(5 * sf)]
+    features = {"std": head.std(axis=1),
+                "zerocross_rate": num_zerocross(head, axis=1) / (5 * sf)}
+    features["Hjorth_M"], features["Hjorth_C"] = hjorth_params(head, axis=1)
+    features["perm_entropy"] = perm_entropy(head, axis=1)
+    if eeg:
+        features["skewness"] = stats.skew(head, axis=1)
+        features["kurtosis"] = stats.kurtosis(head, axis=1)
+        features["delta_theta_ratio"], features["theta"] = delta_theta_ratio_theta(windows, sf)
+    return features
+
+
+def get_data_features(data, sf, data_format="EEG", labels=None):
     """Extract the auto-staging feature set from windowed data.
 
     Parameters
     ----------
-    data : list
-        List of ``[window_array, label]`` pairs (see :func:`split_window_data`).
+    data : list or ndarray
+        List of ``[window_array, label]`` pairs (see :func:`split_window_data`),
+        or ``(n_windows, n_samples)`` windows (see :func:`window_view`).
     sf : float
         Sampling frequency.
     data_format : {'EEG', 'EMG'}
         Which channel type the windows come from. EEG additionally gets
         skewness, kurtosis, delta/theta ratio and theta power.
+    labels : array_like, optional
+        Window labels when ``data`` is an array.
 
     Returns
     -------
     pandas.DataFrame
         Feature table with a ``label`` column.
     """
+    eeg = data_format.startswith("EEG")
+    # Only the first 6 s of every window are used
+    n_head = int(6 * sf)
+    if isinstance(data, np.ndarray):
+        features = _window_features(data[:, :n_head], sf, eeg)
+    else:
+        labels = [each[1] for each in data]
+        heads = [each[0][:n_head] for each in data]
+        if all(head.shape[0] == n_head for head in heads):
+            features = _window_features(np.stack(heads), sf, eeg)
+        else:
+            # Truncated windows at the end: one row at a time
+            rows = [_window_features(head[np.newaxis], sf, eeg) for head in heads]
+            features = {key: np.concatenate([row[key] for row in rows]) for key in rows[0]}
+
     window_feature_df = pd.DataFrame()
-    window_feature_df["label"] = [each[1] for each in data]
+    window_feature_df["label"] = labels
 
     # ---- Time-domain features, both EEG and EMG ----
-    data_std = np.array([np.std(each[0][:int(5 * sf)]) for each in data])
-    window_feature_df[f"{data_format}_std_zscore"] = self_zscore(data_std)
-
-    zerocross_rate = [num_zerocross(each[0][:int(5 * sf)]) / (5 * sf) for each in data]
+    window_feature_df[f"{data_format}_std_zscore"] = self_zscore(features["std"])
+    zerocross_rate = features["zerocross_rate"]
     window_feature_df[f"{data_format}_zerocross_rate"] = \
         (zerocross_rate - np.mean(zerocross_rate)) / np.std(zerocross_rate)
-
-    hjorth = [hjorth_params(each[0][:int(5 * sf)]) for each in data]
-    hjorth_M = [each[0] for each in hjorth]
-    hjorth_C = [each[1] for each in hjorth]
-    window_feature_df[f"{data_format}_Hjorth_M"] = self_zscore(hjorth_M)
-    window_feature_df[f"{data_format}_Hjorth_C"] = self_zscore(hjorth_C)
-
-    perm_entropy_ = [perm_entropy(each[0][:int(5 * sf)]) for each in data]
-    window_feature_df[f"{data_format}_perm_entropy"] = self_zscore(perm_entropy_)
+    window_feature_df[f"{data_format}_Hjorth_M"] = self_zscore(features["Hjorth_M"])
+    window_feature_df[f"{data_format}_Hjorth_C"] = self_zscore(features["Hjorth_C"])
+    window_feature_df[f"{data_format}_perm_entropy"] = self_zscore(features["perm_entropy"])
 
     # ---- EEG-only features ----
-    if data_format.startswith("EEG"):
-        data_skewness = np.array([stats.skew(each[0][:int(5 * sf)]) for each in data])
-        data_kurtosis = np.array([stats.kurtosis(each[0][:int(5 * sf)]) for each in data])
-        window_feature_df[f"{data_format}_skewness_zscore"] = self_zscore(data_skewness)
-        window_feature_df[f"{data_format}_kurtosis_zscore"] = self_zscore(data_kurtosis)
-
-        delta_theta = [delta_theta_ratio_theta(each[0], sf) for each in data]
-        delta_theta_ratio = [each[0] for each in delta_theta]
-        theta = [each[1] for each in delta_theta]
-        window_feature_df[f"{data_format}_delta_theta_ratio"] = self_zscore(delta_theta_ratio)
-        window_feature_df[f"{data_format}_theta"] = self_zscore(theta)
+    if eeg:
+        window_feature_df[f"{data_format}_skewness_zscore"] = self_zscore(features["skewness"])
+        window_feature_df[f"{data_format}_kurtosis_zscore"] = self_zscore(features["kurtosis"])
+        window_feature_df[f"{data_format}_delta_theta_ratio"] = \
+            self_zscore(features["delta_theta_ratio"])
+        window_feature_df[f"{data_format}_theta"] = self_zscore(features["theta"])
 
     return window_feature_df
@@ -0,0 +1,265 @@
+# -*- coding: UTF-8 -*-
+"""Cohort-level sleep architecture statistics.
+
+* :func:`sleep_architecture` -- per-bin and whole-recording statistics of
+  one annotation (stage durations, bouts, bout length distribution,
+  transition matrices, latencies) as a long-format table,
+* :func:`cohort_stats` -- the same for many annotations (optionally in
+  parallel worker processes), concatenated into one table,
+* :func:`write_stats` -- write such a table as CSV/TSV or Parquet.
+
+Everything is computed on state run arrays with ``np.bincount`` (see
+:func:`misleep.utils.annotation.split_runs`), so a cohort of hundreds of
+week-long annotations is summarized in seconds without going through
+Excel.
+
+The long-format table has the columns :data:`STATS_COLUMNS`:
+
+========== ==============================================================
+animal     animal / recording name
+bin        time bin index, ``-1`` for whole-recording rows
+bin_start  bin start in seconds since the start of the annotation
+metric     ``duration``, ``bouts``, ``mean_bout``, ``percentage``,
+           ``transitions``, ``bout_hist`` or ``latency``
+state      state name (the *from* state for ``transitions``)
+detail     *to* state for ``transitions``, bout length class for
+           ``bout_hist``, empty otherwise
+value      the statistic (seconds, counts or percent)
+========== ==============================================================
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from misleep.utils.annotation import runs_from_states, split_runs
+
+STATS_COLUMNS = ["animal", "bin", "bin_start", "metric", "state", "detail", "value"]
+
+#: Default bout length classes (seconds) of the ``bout_hist`` metric.
+DEFAULT_BOUT_EDGES = (0, 4, 8, 16, 32, 64, 128, 256, 512, 1024, np.inf)
+
+
+def _bout_classes(edges):
+    return [f"[{lo:g}, {hi:g})" for lo, hi in zip(edges[:-1], edges[1:])]
+
+
+def _rows(animal, bins, bin_starts, metric, states, details, values):
+    return {
+        "animal": np.full(len(values), animal, dtype=object),
+        "bin": np.asarray(bins, dtype=np.int64),
+        "bin_start": np.asarray(bin_starts, dtype=np.int64),
+        "metric": np.full(len(values), metric, dtype=object),
+        "state": np.asarray(states, dtype=object),
+        "detail": np.asarray(details, dtype=object),
+        "value": np.asarray(values, dtype=float),
+    }
+
+
+def sleep_architecture(mianno, animal="", bin_sec=3600, bout_edges=DEFAULT_BOUT_EDGES,
+                       latency_min_bout=0):
+    """Sleep architecture statistics of one annotation.
+
+    Parameters
+    ----------
+    mianno : MiAnnotation
+        The annotation.
+    animal : str, optional
+        Value of the ``animal`` column.
+    bin_sec : int
+        Time bin width in seconds. Defaults to one hour.
+    bout_edges : sequence of float
+        Bout length class edges (seconds) of the ``bout_hist`` metric.
+    latency_min_bout : float
+        Only bouts of at least this many seconds end the latency of a
+        state. Defaults to 0 (first occurrence).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Long-format table with the columns :data:`STATS_COLUMNS`.
+
+    Notes
+    -----
+    Per-bin percentages are relative to ``bin_sec`` (also for a shorter
+    last bin), whole-recording percentages to the annotation length.
+    Transitions are counted in the bin of the second where the new state
+    starts. States are reported by name, so annotations with different
+    state codes but the same names line up in a cohort table.
+    """
+    state_codes = np.array(sorted(mianno.state_map))
+    names = np.array([mianno.state_map[each] for each in state_codes.tolist()], dtype=object)
+    n_states = state_codes.size
+    length = len(mianno.sleep_state)
+    n_bins = -(-length // int(bin_sec))
+
+    starts, ends, codes = runs_from_states(mianno.sleep_state)
+    run_state = np.searchsorted(state_codes, codes)
+    lengths = ends - starts
+
+    # Per-bin duration / bouts (runs cut at the bin boundaries)
+    p_starts, p_ends, p_state, bins = split_runs(starts, ends, run_state, bin_sec=bin_sec)
+    flat = bins * n_states + p_state
+    duration = np.bincount(flat, weights=p_ends - p_starts,
+                           minlength=n_bins * n_states).reshape(n_bins, n_states)
+    bouts = np.bincount(flat, minlength=n_bins * n_states).reshape(n_bins, n_states)
+
+    bin_ids = np.repeat(np.arange(n_bins), n_states)
+    bin_starts = bin_ids * int(bin_sec)
+    state_col = np.tile(names, n_bins)
+    blank = np.full(bin_ids.size, "", dtype=object)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_bout = np.where(bouts > 0, duration / np.maximum(bouts, 1), 0.0)
+    parts = [
+        _rows(animal, bin_ids, bin_starts, "duration", state_col, blank, duration.ravel()),
+        _rows(animal, bin_ids, bin_starts, "bouts", state_col, blank, bouts.ravel()),
+        _rows(animal, bin_ids, bin_starts, "mean_bout", state_col, blank, mean_bout.ravel()),
+        _rows(animal, bin_ids, bin_starts, "percentage", state_col, blank,
+              duration.ravel() / float(bin_sec) * 100),
+    ]
+
+    # Per-bin transition matrices
+    from_state, to_state = run_state[:-1], run_state[1:]
+    trans_bin = starts[1:] // int(bin_sec)
+    trans = np.bincount((trans_bin * n_states + from_state) * n_states + to_state,
+                        minlength=n_bins * n_states * n_states)
+    trans_bins = np.repeat(np.arange(n_bins), n_states * n_states)
+    parts.append(_rows(animal, trans_bins, trans_bins * int(bin_sec), "transitions",
+                       np.tile(np.repeat(names, n_states), n_bins),
+                       np.tile(names, n_bins * n_states), trans))
+
+    # Whole-recording rows (bin = -1)
+    total_duration = np.bincount(run_state, weights=lengths, minlength=n_states)
+    total_bouts = np.bincount(run_state, minlength=n_states)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total_mean = np.where(total_bouts > 0, total_duration / np.maximum(total_bouts, 1), 0.0)
+    whole = np.full(n_states, -1)
+    zero = np.zeros(n_states)
+    empty = np.full(n_states, "", dtype=object)
+    parts += [
+        _rows(animal, whole, zero, "duration", names, empty, total_duration),
+        _rows(animal, whole, zero, "bouts", names, empty, total_bouts),
+        _rows(animal, whole, zero, "mean_bout", names, empty, total_mean),
+        _rows(animal, whole, zero, "percentage", names, empty,
+              total_duration / max(length, 1) * 100),
+    ]
+    total_trans = trans.reshape(n_bins, n_states * n_states).sum(axis=0) if n_bins else \
+        np.zeros(n_states * n_states)
+    parts.append(_rows(animal, np.full(n_states * n_states, -1), np.zeros(n_states * n_states),
+                       "transitions", np.repeat(names, n_states), np.tile(names, n_states),
+                       total_trans))
+
+    # Bout length distribution per state
+    edges = np.asarray(bout_edges, dtype=float)
+    n_classes = edges.size - 1
+    bout_class = np.searchsorted(edges, lengths, side="right") - 1
+    valid = (bout_class >= 0) & (bout_class < n_classes)
+    hist = np.bincount(run_state[valid] * n_classes + bout_class[valid],
+                       minlength=n_states * n_classes)
+    parts.append(_rows(animal, np.full(hist.size, -1), np.zeros(hist.size), "bout_hist",
+                       np.repeat(names, n_classes), np.tile(_bout_classes(edges), n_states),
+                       hist))
+
+    # Latency: start of the first bout (>= latency_min_bout) of every state
+    latency = np.full(n_states, np.nan)
+    long_enough = lengths >= latency_min_bout
+    first = np.full(n_states, starts.size)
+    np.minimum.at(first, run_state[long_enough], np.flatnonzero(long_enough))
+    found = first < starts.size
+    latency[found] = starts[first[found]]
+    parts.append(_rows(animal, whole, zero, "latency", names, empty, latency))
+
+    return pd.DataFrame({column: np.concatenate([part[column] for part in parts])
+                         for column in STATS_COLUMNS})
+
+
+def _load(source):
+    if isinstance(source, (str, Path)):
+        from misleep.io.annotation import load_annotation
+
+        return load_annotation(str(source))
+    return source
+
+
+def _animal_stats(animal, source, options):
+    return sleep_architecture(_load(source), animal=animal, **options)
+
+
+def cohort_stats(annotations, bin_sec=3600, bout_edges=DEFAULT_BOUT_EDGES,
+                 latency_min_bout=0, n_jobs=1):
+    """Sleep architecture statistics of a whole cohort in one table.
+
+    Parameters
+    ----------
+    annotations : dict or list
+        ``{animal: annotation}`` or a list of annotations, where each
+        annotation is a :class:`MiAnnotation` or a path to an annotation
+        file (any format :func:`misleep.io.load_annotation` reads). List
+        entries are named after the file stem, or their position for
+        in-memory annotations.
+    bin_sec, bout_edges, latency_min_bout
+        See :func:`sleep_architecture`.
+    n_jobs : int
+        Number of worker processes. Defaults to 1 (no parallelism); use it
+        when loading many annotation files.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Long-format table with the columns :data:`STATS_COLUMNS`, one block
+        per animal in input order.
+    """
+    if isinstance(annotations, dict):
+        items = list(annotations.items())
+    else:
+        items = [(Path(each).stem if isinstance(each, (str, Path)) else str(idx), each)
+                 for idx, each in enumerate(annotations)]
+    if not items:
+        return pd.DataFrame(columns=STATS_COLUMNS)
+    options = {"bin_sec": bin_sec, "bout_edges": bout_edges,
+               "latency_min_bout": latency_min_bout}
+
+    if n_jobs is not None and n_jobs > 1 and len(items) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            tables = list(pool.map(_animal_stats, [name for name, _ in items],
+                                   [source for _, source in items],
+                                   [options] * len(items)))
+    else:
+        tables = [_animal_stats(name, source, options) for name, source in items]
+    return pd.concat(tables, ignore_index=True)
+
+
+def write_stats(stats, file_path):
+    """Write a statistics table as CSV, TSV or Parquet (by file extension).
+
+    Parameters
+    ----------
+    stats : pandas.DataFrame
+        Table from :func:`cohort_stats` / :func:`sleep_architecture`.
+    file_path : str
+        ``.csv``, ``.tsv`` or ``.parquet`` destination.
+
+    Returns
+    -------
+    pathlib.Path
+        The written file.
+    """
+    path = Path(file_path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        stats.to_csv(path, index=False)
+    elif suffix == ".tsv":
+        stats.to_csv(path, index=False, sep="\t")
+    elif suffix == ".parquet":
+        try:
+            stats.to_parquet(path, index=False)
+        except ImportError as e:
+            raise ImportError(
+                "Writing Parquet requires 'pyarrow'. Install it with "
+                "`pip install pyarrow`, or write a .csv file instead.") from e
+    else:
+        raise ValueError(f"Unsupported statistics file type '{path.suffix}', "
+                         f"use .csv, .tsv or .parquet")
+    return path
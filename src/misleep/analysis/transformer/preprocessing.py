@@ -5,6 +5,8 @@ from typing import Optional, Sequence, Tuple
 import numpy as np
 from scipy import signal
 
+from misleep.preprocessing.filtering import sosfiltfilt_chunked
+
 from .configs import PreprocessConfig
 
 
@@ -22,7 +24,7 @@ def build_channel_filters(cfg: PreprocessConfig) -> Tuple[np.ndarray, np.ndarray
 
 
 def apply_bandpass(signal_arr: np.ndarray, sos_filters: Sequence[np.ndarray],
-                   real_time: bool = False) -> np.ndarray:
+                   real_time: bool = False, chunk_size: Optional[int] = None) -> np.ndarray:
     """
     Band-pass filter a multi-channel signal.
 
@@ -35,6 +37,11 @@ def apply_bandpass(signal_arr: np.ndarray, sos_filters: Sequence[np.ndarray],
     real_time : bool
         When True, applies causal filtering (``sosfilt``) to emulate online
         processing; otherwise zero-phase ``sosfiltfilt`` is used.
+    chunk_size : int, optional
+        Zero-phase filter block-wise in blocks of this many samples
+        (:func:`misleep.preprocessing.filtering.sosfiltfilt_chunked`),
+        writing straight into the float32 output instead of allocating
+        full-length float64 temporaries.
     """
     if len(sos_filters) == 0:
         raise ValueError("At least one SOS filter must be provided.")
@@ -42,6 +49,9 @@ def apply_bandpass(signal_arr: np.ndarray, sos_filters: Sequence[np.ndarray],
     filter_fn = signal.sosfilt if real_time else signal.sosfiltfilt
     for ch in range(signal_arr.shape[0]):
         sos = sos_filters[min(ch, len(sos_filters) - 1)]
+        if chunk_size is not None and not real_time:
+            sosfiltfilt_chunked(signal_arr[ch], sos, out=filtered[ch], chunk_size=chunk_size)
+            continue
         filtered[ch] = filter_fn(sos, signal_arr[ch].astype(np.float32))
     return filtered
 
@@ -5,9 +5,13 @@ This module contains the in-memory data containers used across MiSleep:
 
 * :class:`misleep.data.midata.MiData` -- raw signal recordings
 * :class:`misleep.data.annotation.MiAnnotation` -- sleep scoring/annotation
+* :class:`misleep.data.events.EventStore` -- indexed marker/start-end events
+* :class:`misleep.data.cache.SignalCache` -- LRU cache of derived signals
 """
 
 from .midata import MiData
 from .annotation import MiAnnotation
+from .events import EventStore
+from .cache import SignalCache
 
-__all__ = ["MiData", "MiAnnotation"]
+__all__ = ["MiData", "MiAnnotation", "EventStore", "SignalCache"]
@@ -8,8 +8,13 @@ recording:
   4 = Init by default, but fully configurable through ``state_map``),
 * single time-point **markers** (e.g. ``[30.5, 'injection']``),
 * **start-end** events (e.g. ``[1, 20, 'spindle']``).
+
+Markers and start-end events are kept in :class:`~misleep.data.events.EventStore`
+lists, which add an interval index for fast time-window queries.
 """
 
+from .events import EventStore
+
 
 class MiAnnotation:
     """MiSleep annotation class.
@@ -45,9 +50,10 @@ class MiAnnotation:
         else:
             self._state_map = state_map
 
-        for each in sleep_state:
-            if each not in self._state_map.keys():
-                raise ValueError(f"Content {each} in the 'sleep_state' does not exist in {self._state_map}")
+        unknown = set(sleep_state).difference(self._state_map)
+        if unknown:
+            each = next(each for each in sleep_state if each in unknown)
+            raise ValueError(f"Content {each} in the 'sleep_state' does not exist in {self._state_map}")
 
         self._sleep_state = sleep_state
         self._anno_length = len(sleep_state)
@@ -55,12 +61,12 @@ class MiAnnotation:
         if marker is not None:
             if not isinstance(marker, list):
                 raise TypeError(f"'marker' should be a list, got {type(marker)}")
-        self._marker = marker if marker is not None else []
+        self._marker = EventStore(marker if marker is not None else [], kind="marker")
 
         if start_end is not None:
             if not isinstance(start_end, list):
                 raise TypeError(f"'start_end' should be a list, got {type(start_end)}")
-        self._start_end = start_end if start_end is not None else []
+        self._start_end = EventStore(start_end if start_end is not None else [], kind="start_end")
 
     # ------------------------------------------------------------------
     # Properties
@@ -81,6 +87,8 @@ class MiAnnotation:
     @property
     def marker(self, time_period=None):
         """Marker events, optionally restricted to a time window."""
+        if not isinstance(self._marker, EventStore):
+            self._marker = EventStore(self._marker, kind="marker")
         if time_period is None:
             return self._marker
         return [each for each in self._marker if time_period[0] <= each[0] <= time_period[1]]
@@ -88,6 +96,8 @@ class MiAnnotation:
     @property
     def start_end(self, time_period=None):
         """Start-end events, optionally restricted to a time window."""
+        if not isinstance(self._start_end, EventStore):
+            self._start_end = EventStore(self._start_end, kind="start_end")
         if time_period is None:
             return self._start_end
         return [each for each in self._start_end if time_period[0] <= each[0] and each[1] <= time_period[1]]
@@ -107,6 +117,17 @@ class MiAnnotation:
         """Sorted list of state names used in this annotation."""
         return [self._state_map[k] for k in sorted(self._state_map)]
 
+    def copy(self):
+        """Independent copy of the states, events and state map.
+
+        Cheap enough to snapshot an annotation being edited, e.g. before
+        saving it in a background thread.
+        """
+        return MiAnnotation(list(self._sleep_state),
+                            marker=[list(each) for each in self.marker],
+                            start_end=[list(each) for each in self.start_end],
+                            state_map=dict(self._state_map))
+
     def __repr__(self):
         return (f"MiAnnotation(length={self._anno_length}s, "
                 f"markers={len(self._marker)}, "
@@ -0,0 +1,148 @@
+# -*- coding: UTF-8 -*-
+"""Derived-signal cache :class:`SignalCache`.
+
+Every :class:`MiData` carries a :class:`SignalCache` holding signals
+derived from its channels -- band-passed versions for the filter panel,
+the spectrum window, the event detectors and the auto-staging features --
+keyed on ``(channel, spec)``. Each derived signal is therefore computed
+once per session instead of once per call.
+
+The cache is a least-recently-used mapping with a memory cap: inserting a
+signal evicts the oldest entries until the total size fits, and signals
+larger than the cap are returned but not kept. :class:`MiData` drops the
+entries of a channel whenever it is renamed or deleted. Cached arrays are
+read-only, as they are shared between every caller, and the cache may be
+used from several threads (the GUI prepares pages in a worker thread).
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+#: Default memory cap of a :class:`SignalCache` (512 MiB).
+DEFAULT_CACHE_BYTES = 512 * 2 ** 20
+
+
+class SignalCache:
+    """LRU cache of derived signals with a memory cap.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Total size (bytes) of the cached arrays. Defaults to
+        :data:`DEFAULT_CACHE_BYTES`; ``0`` disables caching.
+
+    Notes
+    -----
+    Keys are ``(channel, spec)`` tuples, where ``spec`` is any hashable
+    description of the derivation, e.g. ``('filter', 'bandpass', 0.5, 30.0,
+    3)``. Copies (``copy.deepcopy``) and pickles of a cache are empty.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        if not isinstance(max_bytes, int) or max_bytes < 0:
+            raise ValueError(f"'max_bytes' should be a non-negative integer, got {max_bytes!r}")
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._max_bytes = max_bytes
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_bytes(self):
+        """Memory cap in bytes; lowering it evicts entries immediately."""
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        if not isinstance(value, int) or value < 0:
+            raise ValueError(f"'max_bytes' should be a non-negative integer, got {value!r}")
+        with self._lock:
+            self._max_bytes = value
+            self._evict(0)
+
+    @property
+    def nbytes(self):
+        """Total size of the cached arrays in bytes."""
+        return self._nbytes
+
+    def _evict(self, incoming):
+        while self._entries and self._nbytes + incoming > self._max_bytes:
+            _, value = self._entries.popitem(last=False)
+            self._nbytes -= value.nbytes
+
+    def get(self, key):
+        """Return the cached signal of ``key`` (``None`` when missing)."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Cache ``value`` under ``key`` and return it (arrays made read-only).
+
+        ``value`` is an array or any object with an ``nbytes`` attribute
+        (e.g. :class:`~misleep.preprocessing.EpochSpectra`). Values larger
+        than :attr:`max_bytes` are returned without being cached.
+        """
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        with self._lock:
+            self.discard(key)
+            if value.nbytes > self._max_bytes:
+                return value
+            self._evict(value.nbytes)
+            self._entries[key] = value
+            self._nbytes += value.nbytes
+            return value
+
+    def get_or_compute(self, key, compute):
+        """Return the cached signal of ``key``, computing it with ``compute()`` once."""
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    def discard(self, key):
+        """Remove ``key`` from the cache if present."""
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._nbytes -= value.nbytes
+
+    def invalidate(self, channel):
+        """Drop every signal derived from ``channel``."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == channel]:
+                self.discard(key)
+
+    def clear(self):
+        """Drop every cached signal."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __deepcopy__(self, memo):
+        return SignalCache(self._max_bytes)
+
+    def __getstate__(self):
+        return {"max_bytes": self._max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_bytes"])
+
+    def __repr__(self):
+        return (f"SignalCache({len(self)} signals, {self._nbytes / 2 ** 20:.1f}"
+                f"/{self._max_bytes / 2 ** 20:.0f} MiB)")
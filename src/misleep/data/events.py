@@ -0,0 +1,179 @@
+# -*- coding: UTF-8 -*-
+"""Event container :class:`EventStore`.
+
+:class:`EventStore` holds the marker (``[time, label]``) and start-end
+(``[start, end, label]``) events of a :class:`MiAnnotation`. It behaves
+exactly like the plain list it replaces (insertion order, ``append``,
+``remove``, ``pop``, ``+=`` ...), but additionally keeps a lazily built,
+sorted interval index so that window queries such as
+:meth:`EventStore.events_in` run in ``O(log n + k)`` instead of scanning
+every event. The index is dropped on every list mutation and rebuilt on
+the next query.
+"""
+
+import numpy as np
+
+
+class EventStore(list):
+    """List of annotation events with a sorted interval index.
+
+    Parameters
+    ----------
+    events : iterable, optional
+        Initial events, e.g. ``[[1, 'injection']]`` for markers or
+        ``[[1, 20, 'spindle']]`` for start-end events.
+    kind : str, optional
+        ``'marker'`` (single time point, column 0) or ``'start_end'``
+        (interval, columns 0 and 1). Defaults to ``'start_end'``.
+
+    Notes
+    -----
+    Only mutations of the list itself are tracked. If an event is edited
+    in place (``store[i][0] = 12``), call :meth:`invalidate` afterwards.
+    """
+
+    _KINDS = ("marker", "start_end")
+
+    def __init__(self, events=(), kind="start_end"):
+        if kind not in self._KINDS:
+            raise ValueError(f"'kind' should be one of {self._KINDS}, got {kind!r}")
+        super().__init__(events)
+        self._kind = kind
+        self._index = None
+        self._revision = 0
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    @property
+    def kind(self):
+        """``'marker'`` or ``'start_end'``."""
+        return self._kind
+
+    @property
+    def revision(self):
+        """Counter incremented on every mutation (handy as a cache key)."""
+        return getattr(self, "_revision", 0)
+
+    def invalidate(self):
+        """Drop the interval index; it is rebuilt on the next query."""
+        self._index = None
+        self._revision = getattr(self, "_revision", 0) + 1
+
+    def _build_index(self):
+        index = getattr(self, "_index", None)
+        if index is not None:
+            return index
+        n = len(self)
+        starts = np.fromiter((each[0] for each in self), dtype=float, count=n)
+        if getattr(self, "_kind", "start_end") == "marker":
+            ends = starts
+        else:
+            ends = np.fromiter((each[1] for each in self), dtype=float, count=n)
+        order = np.argsort(starts, kind="stable")
+        sorted_ends = ends[order]
+        # Running maximum of the end times in start order: monotonic, so the
+        # first event that can still overlap ``start`` is a binary search.
+        max_ends = np.maximum.accumulate(sorted_ends) if n else sorted_ends
+        self._index = (order, starts[order], sorted_ends, max_ends)
+        return self._index
+
+    @property
+    def starts(self):
+        """Sorted start times (marker times) as a float array."""
+        return self._build_index()[1]
+
+    @property
+    def ends(self):
+        """End times as a float array, in the same order as :attr:`starts`."""
+        return self._build_index()[2]
+
+    def indices_in(self, start, end):
+        """Positions of the events overlapping ``[start, end]``.
+
+        Parameters
+        ----------
+        start, end : float
+            Window bounds in seconds (inclusive).
+
+        Returns
+        -------
+        numpy.ndarray
+            List positions, ordered by event start time.
+        """
+        order, starts, sorted_ends, max_ends = self._build_index()
+        hi = int(np.searchsorted(starts, end, side="right"))
+        lo = int(np.searchsorted(max_ends, start, side="left"))
+        if lo >= hi:
+            return np.empty(0, dtype=np.intp)
+        keep = np.flatnonzero(sorted_ends[lo:hi] >= start) + lo
+        return order[keep]
+
+    def events_in(self, start, end):
+        """Events overlapping ``[start, end]``, ordered by start time.
+
+        A marker is returned when ``start <= time <= end``; a start-end
+        event when its interval intersects the window.
+        """
+        return [self[i] for i in self.indices_in(start, end)]
+
+    def count_in(self, start, end):
+        """Number of events overlapping ``[start, end]``."""
+        return len(self.indices_in(start, end))
+
+    # ------------------------------------------------------------------
+    # list mutations -- all of them drop the index
+    # ------------------------------------------------------------------
+    def append(self, item):
+        super().append(item)
+        self.invalidate()
+
+    def extend(self, items):
+        super().extend(items)
+        self.invalidate()
+
+    def insert(self, i, item):
+        super().insert(i, item)
+        self.invalidate()
+
+    def remove(self, item):
+        super().remove(item)
+        self.invalidate()
+
+    def pop(self, i=-1):
+        item = super().pop(i)
+        self.invalidate()
+        return item
+
+    def clear(self):
+        super().clear()
+        self.invalidate()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self.invalidate()
+
+    def reverse(self):
+        super().reverse()
+        self.invalidate()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.invalidate()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.invalidate()
+
+    def __iadd__(self, other):
+        result = super().__iadd__(other)
+        self.invalidate()
+        return result
+
+    def __imul__(self, n):
+        result = super().__imul__(n)
+        self.invalidate()
+        return result
+
+    def __repr__(self):
+        return f"EventStore({list.__repr__(self)}, kind={self.kind!r})"
@@ -12,6 +12,11 @@ It also stores the recording start time and an optional free-text
 description, and exposes a small set of in-place or copy-on-write
 operations (filter, differential, crop, pick, rename, add, delete).
 
+Signals derived from a channel (e.g. band-passed versions) are kept in the
+:class:`~misleep.data.cache.SignalCache` of the object (:attr:`MiData.cache`,
+see :meth:`MiData.derived_signal` and :meth:`MiData.filtered_signal`), so
+each of them is computed once per session.
+
 All channels of a :class:`MiData` object share the same integer duration
 in seconds (the minimum integer duration across channels); longer
 channels are truncated accordingly.
@@ -21,6 +26,8 @@ import math
 
 import numpy as np
 
+from .cache import SignalCache
+
 
 def _unique_name(name, existing):
     """Return ``name`` or the next available ``name_N`` variant."""
@@ -69,6 +76,7 @@ class MiData:
         self._channels = channels
         self._n_channels = len(self._channels)
         self._sf = sf
+        self._cache = SignalCache()
 
     # ------------------------------------------------------------------
     # Validation helpers
@@ -161,6 +169,8 @@ class MiData:
             index = self._channels.index(each)
             existing = self._channels[:index] + self._channels[index + 1:]
             self._channels[index] = _unique_name(new_name.strip(), existing)
+            self.cache.invalidate(each)
+            self.cache.invalidate(self._channels[index])
 
     def filter(self, chans=None, btype="bandpass", low=0.5, high=30):
         """Filter the specified channel(s) and add the result as new channel(s).
@@ -176,21 +186,172 @@ class MiData:
         high : float
             Higher cutoff frequency in Hz.
         """
-        from misleep.preprocessing.filtering import signal_filter
+        from misleep.preprocessing.filtering import _filter_band, signal_filter
 
         if chans is None or not isinstance(chans, list):
             raise TypeError(f"'chans' should be a list of channel names, got {type(chans)}")
 
         for chan in chans:
-            if chan in self._channels:
-                chan_idx = self._channels.index(chan)
-                filtered_data, fname = signal_filter(
-                    data=self._signals[chan_idx],
-                    btype=btype, sf=self._sf[chan_idx], low=low, high=high)
-                self.add(filtered_data, f"{chan}_{fname}", self._sf[chan_idx])
-            else:
+            if chan not in self._channels:
                 raise IndexError(f"{chan} channel is not in the signal channels ({self._channels})")
 
+        # Channels already filtered this way come from the cache; the others
+        # are filtered per (sampling frequency, length) group as one
+        # (n_channels, n_samples) block in a single zero-phase pass.
+        _, fname = _filter_band(btype, low, high)
+        spec = self._filter_spec(btype, low, high, 3)
+        filtered = {}
+        groups = {}
+        for chan in chans:
+            cached = self.cache.get((chan, spec))
+            if cached is not None:
+                filtered[chan] = cached
+                continue
+            chan_idx = self._channels.index(chan)
+            key = (self._sf[chan_idx], self._signals[chan_idx].size)
+            groups.setdefault(key, []).append(chan)
+        for (sf, _), group in groups.items():
+            block = np.stack([self._signals[self._channels.index(each)] for each in group])
+            block, _ = signal_filter(data=block, btype=btype, sf=sf, low=low, high=high)
+            for chan, row in zip(group, block):
+                filtered[chan] = self.cache.put((chan, spec), row.copy())
+
+        for chan in chans:
+            self.add(filtered[chan], f"{chan}_{fname}", self._sf[self._channels.index(chan)])
+
+    @staticmethod
+    def _filter_spec(btype, low, high, order):
+        """Cache spec of a Butterworth filter (unused cutoffs dropped)."""
+        return ("filter", btype,
+                None if btype == "lowpass" else float(low),
+                None if btype == "highpass" else float(high),
+                int(order))
+
+    def derived_signal(self, channel, spec, compute):
+        """Return a signal derived from ``channel``, computed once and cached.
+
+        Parameters
+        ----------
+        channel : str
+            Source channel name.
+        spec : hashable
+            Description of the derivation, part of the cache key
+            ``(channel, spec)``.
+        compute : callable
+            ``compute(signal, sf)`` returning the derived 1-D array; only
+            called when the signal is not cached yet.
+
+        Returns
+        -------
+        ndarray
+            The derived signal (read-only, shared with the cache).
+        """
+        if channel not in self._channels:
+            raise IndexError(f"{channel} channel is not in the signal channels ({self._channels})")
+        chan_idx = self._channels.index(channel)
+        return self.cache.get_or_compute(
+            (channel, spec),
+            lambda: compute(self._signals[chan_idx], self._sf[chan_idx]))
+
+    def filtered_signal(self, channel, btype="bandpass", low=0.5, high=30, order=3):
+        """Return ``channel`` zero-phase filtered, computed once and cached.
+
+        Unlike :meth:`filter`, no channel is added. Parameters are those of
+        :func:`misleep.preprocessing.signal_filter`.
+
+        Returns
+        -------
+        ndarray
+            The filtered signal (read-only, shared with the cache).
+        """
+        from misleep.preprocessing.filtering import signal_filter
+
+        def compute(signal, sf):
+            return signal_filter(data=signal, sf=sf, btype=btype, low=low, high=high,
+                                 order=order)[0]
+
+        return self.derived_signal(channel, self._filter_spec(btype, low, high, order), compute)
+
+    def filtered_segment(self, channel, start, stop, btype="bandpass", low=0.5, high=30,
+                         order=3):
+        """Return samples ``start:stop`` of ``channel`` zero-phase filtered.
+
+        The cached :meth:`filtered_signal` is sliced when present. Otherwise
+        only the segment, padded by the settling length of the filter, is
+        filtered and nothing is cached, so a short selection of a long
+        channel costs what the segment does.
+
+        Returns
+        -------
+        ndarray
+            The filtered segment.
+        """
+        from misleep.preprocessing.filtering import design_sos, settle_length, signal_filter
+
+        if channel not in self._channels:
+            raise IndexError(f"{channel} channel is not in the signal channels ({self._channels})")
+        cached = self.cache.get((channel, self._filter_spec(btype, low, high, order)))
+        if cached is not None:
+            return cached[start:stop]
+        chan_idx = self._channels.index(channel)
+        signal, sf = self._signals[chan_idx], self._sf[chan_idx]
+        start, stop, _ = slice(start, stop).indices(signal.size)
+        pad = settle_length(design_sos(btype, low=low, high=high, sf=sf, order=order))
+        first, last = max(start - pad, 0), min(stop + pad, signal.size)
+        filtered, _ = signal_filter(data=signal[first:last], sf=sf, btype=btype, low=low,
+                                    high=high, order=order)
+        return filtered[start - first:stop - first]
+
+    def epoch_spectra(self, channel, win_sec=5, step_sec=1, band=None, nfft=None,
+                      method="welch", nw=3, cache_dir=None):
+        """Return the per-epoch spectra of ``channel``, computed once and cached.
+
+        Parameters
+        ----------
+        channel : str
+            Channel name.
+        win_sec, step_sec, band, nfft, method, nw
+            See :meth:`misleep.preprocessing.EpochSpectra.compute`.
+        cache_dir : str or Path, optional
+            Folder where the spectra are persisted across sessions (e.g.
+            :func:`misleep.preprocessing.epoch_spectra.sidecar_dir`). Only
+            kept in memory by default.
+
+        Returns
+        -------
+        EpochSpectra
+        """
+        from misleep.preprocessing.epoch_spectra import EpochSpectra
+
+        params = {"win_sec": float(win_sec), "step_sec": float(step_sec),
+                  "band": None if band is None else (float(band[0]), float(band[1])),
+                  "nfft": None if nfft is None else int(nfft), "method": method}
+        if method == "multitaper":
+            params["nw"] = float(nw)
+
+        def compute(signal, sf):
+            if cache_dir is None:
+                return EpochSpectra.compute(signal, sf, **params)
+            return EpochSpectra.cached(signal, sf, cache_dir, **params)
+
+        spec = ("epoch_spectra",) + tuple(params.values())
+        return self.derived_signal(channel, spec, compute)
+
+    def minmax_pyramid(self, channel):
+        """Return the min/max envelope pyramid of ``channel``, built once and cached.
+
+        Levels are filled lazily as windows are requested, see
+        :class:`misleep.viz.envelope.MinMaxPyramid`.
+
+        Returns
+        -------
+        MinMaxPyramid
+        """
+        from misleep.viz.envelope import MinMaxPyramid
+
+        return self.derived_signal(channel, ("minmax_pyramid",),
+                                   lambda signal, sf: MinMaxPyramid(signal))
+
     def add(self, signal, channel, sf):
         """Add a new signal channel to the data.
 
@@ -238,6 +399,7 @@ class MiData:
         if len(self._channels) == 1:
             raise ValueError(f"Channel {channel} is the last channel of signal data, you can't delete it")
         chan_idx = self._channels.index(channel)
+        self.cache.invalidate(channel)
         self._signals.pop(chan_idx)
         self._channels.pop(chan_idx)
         self._sf.pop(chan_idx)
@@ -363,6 +525,13 @@ class MiData:
             raise IndexError(f"Index {idx} can't be larger than the signal channels number {self._n_channels}")
         return self._sf[idx]
 
+    @property
+    def cache(self):
+        """:class:`~misleep.data.cache.SignalCache` of the derived signals."""
+        if getattr(self, "_cache", None) is None:
+            self._cache = SignalCache()
+        return self._cache
+
     @property
     def time(self):
         """Recording start time as a string."""
@@ -0,0 +1,117 @@
+# -*- coding: UTF-8 -*-
+"""Blitting helper for the signal and hypnogram canvases.
+
+A page flip only changes a few artists -- the traces, the sleep-state
+backgrounds, the spectrogram and the marker lines -- while the frames,
+labels and layout stay put. Those per-page artists are created with
+``animated=True``, so a normal draw leaves them out; :class:`BlitManager`
+keeps a copy of that static background and repaints a page by restoring
+it and drawing the animated artists on top, instead of re-rendering the
+whole figure.
+"""
+
+import math
+
+from matplotlib.axis import Axis
+from matplotlib.transforms import Bbox
+
+
+class BlitManager:
+    """Repaint the animated artists of a canvas over a cached background.
+
+    Parameters
+    ----------
+    canvas : FigureCanvasAgg
+        Canvas to manage (any Agg-based canvas, e.g. ``FigureCanvasQTAgg``).
+
+    Notes
+    -----
+    The background is captured on every full draw of the canvas (whoever
+    triggers it) together with a fingerprint of the layout: the ``key``
+    given to :meth:`update`, the figure size and the axes positions.
+    :meth:`update` blits when the fingerprint still matches and falls back
+    to a full draw otherwise, so callers only have to pass a key describing
+    whatever non-animated state they change (labels, limits, colors).
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._background = None
+        self._drawn = None
+        self._key = None
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _fingerprint(self):
+        figure = self.canvas.figure
+        return (self._key, tuple(figure.bbox.bounds),
+                tuple(tuple(ax.get_position().bounds) for ax in figure.axes))
+
+    def _on_draw(self, event):
+        if self.canvas.is_saving():
+            return  # exports render the animated artists themselves
+        self._background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._drawn = self._fingerprint()
+        self.draw_animated()
+
+    def draw_animated(self):
+        """Draw the visible animated artists of every axes, in z-order."""
+        for ax in self.canvas.figure.axes:
+            artists = [art for art in ax.get_children()
+                       if art.get_animated() and art.get_visible()]
+            for art in sorted(artists, key=lambda art: art.get_zorder()):
+                ax.draw_artist(art)
+
+    def invalidate(self):
+        """Forget the background; the next :meth:`update` draws in full."""
+        self._background = None
+
+    def update(self, key=None, axes=None):
+        """Repaint the canvas.
+
+        Parameters
+        ----------
+        key : hashable
+            Fingerprint of the non-animated state of the figure.
+        axes : list of Axes, optional
+            Only repaint these axes (with their animated tick labels): their
+            area is restored and their animated artists drawn, the rest of
+            the canvas is left as it is. Default repaints every axes.
+
+        Returns
+        -------
+        bool
+            ``True`` when the canvas was blitted, ``False`` when it needed a
+            full draw (first draw, resize or a changed ``key``).
+        """
+        self._key = key
+        if self._background is None or self._fingerprint() != self._drawn:
+            self.canvas.draw()
+            return False
+        if axes is None:
+            self.canvas.restore_region(self._background)
+            self.draw_animated()
+            self.canvas.blit(self.canvas.figure.bbox)
+            return True
+        renderer = self.canvas.get_renderer()
+        areas, layers = [], []
+        for ax in axes:
+            artists = [art for art in ax.get_children()
+                       if art.get_animated() and art.get_visible()]
+            layers.append((ax, sorted(artists, key=lambda art: art.get_zorder())))
+            areas.append(ax.bbox)
+            # animated tick labels lie outside the axes frame
+            areas.extend(art.get_tightbbox(renderer) for art in artists
+                         if isinstance(art, Axis))
+        # whole pixels covering the axes; saved regions count their rows
+        # from the top of the canvas
+        bbox = Bbox.intersection(Bbox.union([area for area in areas if area is not None]),
+                                 self.canvas.figure.bbox) or self.canvas.figure.bbox
+        height = self.canvas.figure.bbox.height
+        x0, x1 = math.floor(bbox.x0), math.ceil(bbox.x1)
+        y0, y1 = math.floor(height - bbox.y1), math.ceil(height - bbox.y0)
+        self.canvas.restore_region(self._background, bbox=(x0, y0, x1, y1), xy=(0, 0))
+        for ax, artists in layers:
+            for art in artists:
+                ax.draw_artist(art)
+        self.canvas.blit(Bbox.from_extents(x0, height - y1, x1, height - y0))
+        return True
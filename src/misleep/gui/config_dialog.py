@@ -13,6 +13,7 @@ import json
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QColor
 from PySide6.QtWidgets import (
+    QCheckBox,
     QColorDialog,
     QComboBox,
     QDialog,
@@ -283,6 +284,25 @@ class SettingsDialog(QDialog):
         self._gaussian.setRange(0, 100)
         self._gaussian.setDecimals(2)
         form.addRow("Gaussian smoothing σ:", self._gaussian)
+
+        self._spec_method = QComboBox()
+        self._spec_method.addItems(["welch", "multitaper"])
+        self._spec_method.setToolTip(
+            "Per-window estimator of the spectrogram strip and state spectral "
+            "analysis; multitaper is smoother")
+        form.addRow("Spectral estimator:", self._spec_method)
+
+        self._multitaper_nw = QDoubleSpinBox()
+        self._multitaper_nw.setRange(1, 10)
+        self._multitaper_nw.setDecimals(1)
+        self._multitaper_nw.setToolTip("Time-bandwidth product of the DPSS tapers")
+        form.addRow("Multitaper NW:", self._multitaper_nw)
+
+        self._persist_spectra = QCheckBox("Keep spectra next to the recording")
+        self._persist_spectra.setToolTip(
+            "Save the per-epoch spectra in a '<data file>.spectra' folder, so they "
+            "are loaded instead of recomputed when the recording is opened again")
+        form.addRow("", self._persist_spectra)
         return box
 
     def _build_general_tab(self):
@@ -323,6 +343,13 @@ class SettingsDialog(QDialog):
             "Chrome / accent color scheme (independent of light/dark mode).")
         form.addRow("Color scheme:", self._tone_combo)
 
+        self._view_combo = QComboBox()
+        self._view_combo.addItems(["matplotlib", "qpainter"])
+        self._view_combo.setToolTip(
+            "Renderer of the signal panel. qpainter flips pages faster; "
+            "figure exports always use matplotlib.")
+        form.addRow("Signal view:", self._view_combo)
+
         return box
 
     # ------------------------------------------------------------------
@@ -358,6 +385,10 @@ class SettingsDialog(QDialog):
         self._win_length.setValue(float(spec["win_length_sec"]))
         self._nfft.setValue(float(spec["nfft_sec"]))
         self._gaussian.setValue(float(spec["gaussian_sigma"]))
+        self._spec_method.setCurrentText(spec.get("method", "welch"))
+        self._multitaper_nw.setValue(float(spec.get("multitaper_nw", "3.0")))
+        self._persist_spectra.setChecked(
+            self.config.getboolean("spec", "persist_spectra", fallback=False))
 
         # General
         self._bg_alpha.setValue(float(gui["statecolorbgalpha"]))
@@ -365,6 +396,7 @@ class SettingsDialog(QDialog):
         self._openpath.setText(gui["openpath"])
         self._theme_combo.setCurrentText(gui.get("theme", "light"))
         self._tone_combo.setCurrentText(gui.get("color_tone", "black"))
+        self._view_combo.setCurrentText(gui.get("signal_view", "matplotlib"))
         self._marker_line_bt.set_color(
             gui.get("markerlinecolor", "red").strip("\"'"))
 
@@ -400,12 +432,16 @@ class SettingsDialog(QDialog):
                 "theme": self._theme_combo.currentText(),
                 "color_tone": self._tone_combo.currentText(),
                 "spectrogram_cmap": "jet",
+                "signal_view": self._view_combo.currentText(),
                 "markerlinecolor": self._marker_line_bt.color().name(),
             },
             "spec": {
                 "win_length_sec": str(self._win_length.value()),
                 "nfft_sec": str(self._nfft.value()),
                 "gaussian_sigma": str(self._gaussian.value()),
+                "method": self._spec_method.currentText(),
+                "multitaper_nw": str(self._multitaper_nw.value()),
+                "persist_spectra": str(self._persist_spectra.isChecked()).lower(),
             },
         }
 
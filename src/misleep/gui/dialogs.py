@@ -30,9 +30,10 @@ from PySide6.QtWidgets import (
 from misleep.config import save_config
 from misleep.gui.qt_utils import (
     app_icon,
-    cal_draw_spectrum,
     downsample_by_most_frequent,
+    finish_spectrum,
     get_base_path,
+    spectrum_figure,
 )
 from misleep.gui.uis.about_ui import Ui_AboutDialog
 from misleep.gui.uis.auto_stage_causalTransformer_dialog_ui import Ui_AutoStageCausalTransformerDialog
@@ -50,6 +51,17 @@ from misleep.logger import logger
 from misleep.utils.annotation import lst2group
 
 
+def _no_progress(percent, message=""):
+    """``report`` callback of analysis work run synchronously."""
+
+
+def _state_data(data, sf, sleep_state, state):
+    """Samples of ``data`` inside the ``[start, end, state]`` bouts of ``state``."""
+    parts = [data[int(each[0] * sf): int(each[1] * sf)]
+             for each in sleep_state if each[2] == state]
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
 class AboutDialog(QDialog, Ui_AboutDialog):
     """The About box of MiSleep."""
 
@@ -375,14 +387,22 @@ class StateSpectralDialog(QDialog, Ui_StateSpectralDialog):
         self.ChannelSelector.addItems(channels)
         self.ChannelSelector.setCurrentIndex(0)
 
-    def spectral_analysis(self, midata, mianno, config):
+    def spectral_analysis(self, midata, mianno, config, data_path=None):
         """Run the state spectral analysis and export results."""
-        import pandas as pd
-        from misleep.preprocessing.artifacts import reject_artifact
-        from misleep.preprocessing.filtering import signal_filter
+        result = self.spectral_task(midata, mianno, config, data_path=data_path)(_no_progress)
+        return self.export_spectra(result, mianno, config)
 
-        mianno = deepcopy(mianno)
-        midata = deepcopy(midata)
+    def spectral_task(self, midata, mianno, config, data_path=None):
+        """Read the dialog and return the analysis as a ``work(report)`` function.
+
+        ``work`` only computes (no widgets or figures), so it can run on a
+        :class:`~misleep.gui.workers.Task`; pass its result to
+        :meth:`export_spectra` on the UI thread. With ``[spec]
+        persist_spectra``, the spectra are kept in the sidecar folder of
+        ``data_path`` (the data file), as the spectrogram strip does.
+        """
+        from misleep.preprocessing.epoch_spectra import EpochSpectra, sidecar_dir
+        from misleep.preprocessing.spectral import epoch_std, reject_epochs
 
         ac_time = datetime.datetime.strptime(midata.time, "%Y%m%d-%H:%M:%S")
         start_sec = 0
@@ -399,19 +419,10 @@ class StateSpectralDialog(QDialog, Ui_StateSpectralDialog):
             start_sec = 0
             end_sec = mianno.anno_length
 
-        midata = midata.crop([start_sec, end_sec])
-        sleep_state = mianno.sleep_state[start_sec:end_sec + 1]
-
         channel_idx = self.ChannelSelector.currentIndex()
-        channel_data = midata.signals[channel_idx]
-        sleep_state = lst2group([[idx, each] for idx, each in enumerate(sleep_state)])
         sf = midata.sf[channel_idx]
-
-        # Band-pass filter if checked
         freq_band = [self.BPLow.value(), self.BPHigh.value()]
-        if self.BPFilterCheckBox.isChecked():
-            channel_data, _ = signal_filter(channel_data, sf=sf, btype="bandpass",
-                                            low=freq_band[0], high=freq_band[1])
+        bp_filter = self.BPFilterCheckBox.isChecked()
 
         win_length = self.WinLengthSpinBox.value() if self.WinLengthCheckBox.isChecked() else 10.0
         nperseg = int(sf * win_length)
@@ -421,67 +432,113 @@ class StateSpectralDialog(QDialog, Ui_StateSpectralDialog):
             nfft = None
 
         gaussian_sigma = self.GaussianSpinBox.value() if self.GaussianCheckBox.isChecked() else None
-
-        state_codes = sorted(set(mianno.sleep_state[start_sec:end_sec + 1]))
-        state_data = {
-            state: np.concatenate([
-                channel_data[int(each[0] * sf): int(each[1] * sf)]
-                for each in sleep_state if each[2] == state
-            ])
-            for state in state_codes
-        }
-
-        threshold = self.ArtThresholdSpinBox.value() if self.RejectArtifactCheckBox.isChecked() else 1.5
-        if self.RejectArtifactCheckBox.isChecked():
-            state_data = {
-                state: reject_artifact(data, sf=sf, threshold=threshold)
-                for state, data in state_data.items()
-            }
-
+        reject = self.RejectArtifactCheckBox.isChecked()
+        threshold = self.ArtThresholdSpinBox.value()
         relative = self.RelativeCheckBox.isChecked()
-        spectra = {
-            state: cal_draw_spectrum(data=data, sf=sf, nperseg=nperseg,
-                                     freq_band=freq_band, relative=relative,
-                                     nfft=nfft, gaussian_sigma=gaussian_sigma)
-            for state, data in state_data.items()
-        }
+        hour_segment = self.HourSegmentCheckBox.isChecked()
+        # The labels may change on the UI thread while ``work`` runs
+        sleep_state = np.array(mianno.sleep_state[start_sec:end_sec + 1])
+
+        # Welch periodograms of every window of the channel, computed once;
+        # each state (and hour) spectrum is the mean of its windows' rows,
+        # restricted to windows lying inside one bout (no splicing).
+        spec_band = list(freq_band)
+        if gaussian_sigma is not None:
+            # Keep the bins the smoothing kernel reaches beyond the band
+            margin = (int(4 * gaussian_sigma + 0.5) + 1) * sf / (nfft or nperseg)
+            spec_band = [freq_band[0] - margin, freq_band[1] + margin]
+        params = {"win_sec": nperseg / sf, "step_sec": None, "nfft": nfft,
+                  "band": spec_band, "dtype": np.float64,
+                  "method": config.get("spec", "method", fallback="welch")}
+        if params["method"] == "multitaper":
+            params["nw"] = config.getfloat("spec", "multitaper_nw", fallback=3.0)
+        persist = config.getboolean("spec", "persist_spectra", fallback=False)
+        cache_dir = sidecar_dir(data_path) if persist and data_path else None
+
+        def work(report):
+            # Nothing is modified below, so the data is only cropped (views)
+            channel_data = midata.crop([start_sec, end_sec]).signals[channel_idx]
+            if bp_filter:
+                report(5, "Filtering")
+                # Cached on the (uncropped) data, then cropped
+                channel_data = midata.filtered_signal(
+                    midata.channels[channel_idx], btype="bandpass",
+                    low=freq_band[0], high=freq_band[1])[
+                    int(start_sec * sf): int(start_sec * sf) + channel_data.size]
+
+            report(20, "Computing spectra")
+            if cache_dir is not None:
+                epochs = EpochSpectra.cached(channel_data, sf, cache_dir, **params)
+            else:
+                epochs = EpochSpectra.compute(channel_data, sf, **params)
+            freq, times, psd = epochs.freq, epochs.times, epochs.psd
+            epoch_state = epochs.states(sleep_state[:end_sec - start_sec])
+            sd = None
+            if reject:
+                report(60, "Rejecting artifacts")
+                sd = epoch_std(channel_data, sf, win_sec=nperseg / sf)
+
+            def subset(mask):
+                return mask if sd is None else reject_epochs(sd, mask, threshold=threshold)
+
+            report(80, "Averaging states")
+            spectra = {}
+            for state in sorted(set(sleep_state.tolist())):
+                mask = subset(epoch_state == state)
+                if not mask.any():
+                    logger.warning(f"State spectral: no {win_length:g} s window inside a bout "
+                                   f"of state {state}, skipped")
+                    continue
+                spectra[state] = finish_spectrum(freq, psd[mask].mean(axis=0), freq_band=freq_band,
+                                                 relative=relative, gaussian_sigma=gaussian_sigma)
+
+            # Optional per-hour spectral segmentation
+            hour_spec = {state: [] for state in spectra}
+            if hour_segment:
+                epoch_hour = (times // 3600).astype(int)
+                for hour in range(-(-(end_sec - start_sec) // 3600)):
+                    report(80 + 20 * hour * 3600 // max(end_sec - start_sec, 1), "Averaging hours")
+                    for state in spectra:
+                        mask = subset((epoch_state == state) & (epoch_hour == hour))
+                        if mask.any():
+                            hour_spec[state].append(finish_spectrum(
+                                freq, psd[mask].mean(axis=0), freq_band=freq_band,
+                                relative=relative, gaussian_sigma=gaussian_sigma)[1])
+            return {"spectra": spectra, "hour_spec": hour_spec, "freq_band": freq_band}
+
+        return work
+
+    def export_spectra(self, result, mianno, config):
+        """Ask for a folder and save the spectra of :meth:`spectral_task`.
 
-        name_map = mianno.state_map
+        Returns
+        -------
+        bool or None
+            True when saved, False on a permission error, None when the
+            user cancelled the folder selection.
+        """
+        import pandas as pd
 
-        # Optional per-hour spectral segmentation
-        hour_spec = {state: [] for state in spectra}
-        if self.HourSegmentCheckBox.isChecked():
-            for sec in range(0, end_sec - start_sec, 3600):
-                hour_states = mianno.sleep_state[start_sec + sec:start_sec + sec + 3600]
-                hour_states = lst2group([[idx + sec, each]
-                                         for idx, each in enumerate(hour_states)])
-                for state in spectra:
-                    data_parts = [channel_data[int(each[0] * sf): int(each[1] * sf)]
-                                  for each in hour_states if each[2] == state]
-                    data = np.concatenate(data_parts) if data_parts else np.array([])
-                    if self.RejectArtifactCheckBox.isChecked() and len(data):
-                        data = reject_artifact(data, sf=sf, threshold=threshold)
-                    if len(data) > sf * 10:
-                        hour_spec[state].append(cal_draw_spectrum(
-                            data=data, sf=sf, nperseg=nperseg,
-                            freq_band=freq_band, relative=relative, nfft=nfft,
-                            gaussian_sigma=gaussian_sigma)[0][1])
+        spectra, hour_spec = result["spectra"], result["hour_spec"]
+        name_map = mianno.state_map
 
         fd = QFileDialog.getExistingDirectory(self, "Select a folder to save states' data",
                                               f"{config['gui']['openpath']}")
         if fd == "":
             return None
 
-        figures = [figure for _, figure in spectra.values()]
+        figures = []
         try:
             output = fd + \
                 f"/{os.path.basename(config['gui']['openpath']).split('.')[0]}_power_results.xlsx"
             with pd.ExcelWriter(output) as writer:
-                for state, (spec, figure) in spectra.items():
+                for state, spec in spectra.items():
                     state_name = str(name_map.get(state, state))
                     safe_name = "".join(
                         c if c not in '\\/:*?"<>|' else "_"
                         for c in state_name)
+                    figure = spectrum_figure(spec, freq_band=result["freq_band"])
+                    figures.append(figure)
                     figure.savefig(fd + "/" + safe_name + "_spectrum.pdf")
                     _df = pd.DataFrame(
                         data=spec.T, columns=["frequency", "power"])
@@ -497,7 +554,7 @@ class StateSpectralDialog(QDialog, Ui_StateSpectralDialog):
             QMessageBox.about(self, "Error", "Close the PDF or EXCEL file under this folder first.")
             return False
         finally:
-            # The figures from cal_draw_spectrum are non-pyplot Figure
+            # The figures from spectrum_figure are non-pyplot Figure
             # objects; clear() releases their memory without touching the
             # main window's figures.
             for figure in figures:
@@ -658,41 +715,64 @@ class SWADetectionDialog(QDialog, Ui_SWADetectDialog):
 
     def swa_detection(self, midata, mianno, config):
         """Run SWA detection on the selected channel and states."""
-        import pandas as pd
+        return self.export_result(self.detection_task(midata, mianno)(_no_progress), config)
+
+    def detection_task(self, midata, mianno):
+        """Read the dialog and return the detection as a ``work(report)`` function.
+
+        ``work`` returns the list of detected slow waves; pass it to
+        :meth:`export_result` on the UI thread.
+        """
         from misleep.analysis.detection import SWA_detection
 
         freq_low = self.FreqLowEditor.value()
         freq_high = self.FreqHighEditor.value()
-        channel_idx = self.ChannelComBox.currentIndex()
-        channel = midata.channels[channel_idx]
-        signal_data = deepcopy(midata.pick_chs([channel]))
-        signal_sf = signal_data.sf[0]
-        signal_data = signal_data.signals[0]
-
+        channel = midata.channels[self.ChannelComBox.currentIndex()]
         std_thresh = self.StdEditor.value()
-
-        sleep_state = lst2group([[idx, each] for idx, each in enumerate(deepcopy(mianno.sleep_state))])
-        swa_lst = []
-        for state, state_name in [(1, "NREM"), (2, "REM"), (3, "Wake"), (4, "Init")]:
-            checkbox = {1: self.NREMCheckbox, 2: self.REMCheckbox,
-                        3: self.WakeCheckbox, 4: self.InitCheckbox}[state]
-            if not checkbox.isChecked():
-                continue
-            amp_threshold_low, amp_threshold_high = self.get_state_thres(
-                data=signal_data, sf=signal_sf, sleep_state=sleep_state,
-                state=state, thres=std_thresh)
-            for each in sleep_state:
-                if each[2] == state and each[1] - each[0] > 5:
-                    data_ = signal_data[int(each[0] * signal_sf): int(each[1] * signal_sf)]
-                    swa_lst_ = SWA_detection(
-                        data_, signal_sf, freq_band=[freq_low, freq_high],
-                        amp_threshold=(amp_threshold_low, amp_threshold_high),
-                        start_time_sec=each[0])
-                    if swa_lst_ is None:
-                        continue
-                    for each in swa_lst_:
-                        each.append(state_name)
-                        swa_lst.append(each)
+        states = [(state, state_name) for state, state_name, checkbox in (
+            (1, "NREM", self.NREMCheckbox), (2, "REM", self.REMCheckbox),
+            (3, "Wake", self.WakeCheckbox), (4, "Init", self.InitCheckbox))
+            if checkbox.isChecked()]
+        labels = list(mianno.sleep_state)
+        self._log_params = f"Freq_thres: {[freq_low, freq_high]}, std_thresh: {std_thresh}"
+
+        def work(report):
+            signal_data = deepcopy(midata.pick_chs([channel]))
+            signal_sf = signal_data.sf[0]
+            signal_data = signal_data.signals[0]
+            # Band-pass once (cached on the MiData) instead of once per bout
+            report(5, "Filtering")
+            band_data = midata.filtered_signal(channel, btype="bandpass", low=freq_low, high=freq_high)
+
+            sleep_state = lst2group([[idx, each] for idx, each in enumerate(labels)])
+            swa_lst = []
+            for done, (state, state_name) in enumerate(states):
+                report(10 + 90 * done // len(states), f"Detecting in {state_name}")
+                amp_threshold_low, amp_threshold_high = self.get_state_thres(
+                    data=signal_data, sf=signal_sf, sleep_state=sleep_state,
+                    state=state, thres=std_thresh)
+                for each in sleep_state:
+                    if each[2] == state and each[1] - each[0] > 5:
+                        data_ = band_data[int(each[0] * signal_sf): int(each[1] * signal_sf)]
+                        swa_lst_ = SWA_detection(
+                            data_, signal_sf, freq_band=[freq_low, freq_high],
+                            amp_threshold=(amp_threshold_low, amp_threshold_high),
+                            start_time_sec=each[0], prefiltered=True)
+                        if swa_lst_ is None:
+                            continue
+                        for each in swa_lst_:
+                            each.append(state_name)
+                            swa_lst.append(each)
+            return swa_lst
+
+        return work
+
+    def export_result(self, swa_lst, config):
+        """Export the result of :meth:`detection_task` when asked to.
+
+        Returns ``swa_lst``, or None when the export was cancelled or failed.
+        """
+        import pandas as pd
 
         if self.ExportCheckbox.isChecked():
             df = pd.DataFrame(swa_lst, columns=["StartTime", "NegTime", "MiddleTime",
@@ -709,14 +789,12 @@ class SWADetectionDialog(QDialog, Ui_SWADetectDialog):
                 QMessageBox.critical(self, "Error", f"Permission denied: {e}, close the file first")
                 return
 
-        logger.info(f"SWA_detection: Freq_thres: {[freq_low, freq_high]}, std_thresh: {std_thresh}")
+        logger.info(f"SWA_detection: {self._log_params}")
         return swa_lst
 
     def get_state_thres(self, data, sf, sleep_state, state, thres):
         """Compute amplitude thresholds from the full state data."""
-        all_data = [data[int(each[0] * sf): int(each[1] * sf)]
-                    for each in sleep_state if each[2] == state]
-        all_data = [item for each in all_data for item in each]
+        all_data = _state_data(data, sf, sleep_state, state)
         mean_ = np.mean(all_data)
         std_ = np.std(all_data)
         return thres * std_ + mean_, 10 * std_ + mean_
@@ -751,42 +829,64 @@ class SpindleDetectionDialog(QDialog, Ui_SpindleDetectDialog):
 
     def spindle_detection(self, midata, mianno, config):
         """Run spindle detection on the selected channel and states."""
-        import pandas as pd
+        return self.export_result(self.detection_task(midata, mianno)(_no_progress), config)
+
+    def detection_task(self, midata, mianno):
+        """Read the dialog and return the detection as a ``work(report)`` function.
+
+        ``work`` returns the list of detected spindles; pass it to
+        :meth:`export_result` on the UI thread.
+        """
         from misleep.analysis.detection import spindle_detection
 
         freq_low = self.FreqLowEditor.value()
         freq_high = self.FreqHighEditor.value()
-        channel_idx = self.ChannelComBox.currentIndex()
-        channel = midata.channels[channel_idx]
-        signal_data = deepcopy(midata.pick_chs([channel]))
-        signal_sf = signal_data.sf[0]
-        signal_data = signal_data.signals[0]
-
+        channel = midata.channels[self.ChannelComBox.currentIndex()]
         std_thres_input = self.StdEditor.value()
         duration_thres_input = self.durationThresholdEditor.value()
-
-        sleep_state = lst2group([[idx, each] for idx, each in enumerate(deepcopy(mianno.sleep_state))])
-        spindle_lst = []
-        for state, state_name in [(1, "NREM"), (2, "REM"), (3, "Wake"), (4, "Init")]:
-            checkbox = {1: self.NREMCheckbox, 2: self.REMCheckbox,
-                        3: self.WakeCheckbox, 4: self.InitCheckbox}[state]
-            if not checkbox.isChecked():
-                continue
-            std_thres, duration_thres = self.get_state_thres(
-                data=signal_data, sf=signal_sf, sleep_state=sleep_state, state=state,
-                thres1=std_thres_input, thres2=duration_thres_input)
-            for each in sleep_state:
-                if each[2] == state and each[1] - each[0] > 5:
-                    data_ = signal_data[int(each[0] * signal_sf): int(each[1] * signal_sf)]
-                    spindle_lst_ = spindle_detection(
-                        data_, signal_sf, freq_band=[freq_low, freq_high],
-                        std_thresh=std_thres, duration_thresh=duration_thres,
-                        start_time_sec=each[0])
-                    if spindle_lst_ is None:
-                        continue
-                    for each in spindle_lst_:
-                        each.append(state_name)
-                        spindle_lst.append(each)
+        states = [(state, state_name) for state, state_name, checkbox in (
+            (1, "NREM", self.NREMCheckbox), (2, "REM", self.REMCheckbox),
+            (3, "Wake", self.WakeCheckbox), (4, "Init", self.InitCheckbox))
+            if checkbox.isChecked()]
+        labels = list(mianno.sleep_state)
+        self._log_params = (f"Freq_thres: {[freq_low, freq_high]}, "
+                            f"std_thresh_input: {std_thres_input}, "
+                            f"duration_thresh_input: {duration_thres_input}")
+
+        def work(report):
+            signal_data = deepcopy(midata.pick_chs([channel]))
+            signal_sf = signal_data.sf[0]
+            signal_data = signal_data.signals[0]
+
+            sleep_state = lst2group([[idx, each] for idx, each in enumerate(labels)])
+            spindle_lst = []
+            for done, (state, state_name) in enumerate(states):
+                report(100 * done // len(states), f"Detecting in {state_name}")
+                std_thres, duration_thres = self.get_state_thres(
+                    data=signal_data, sf=signal_sf, sleep_state=sleep_state, state=state,
+                    thres1=std_thres_input, thres2=duration_thres_input)
+                for each in sleep_state:
+                    if each[2] == state and each[1] - each[0] > 5:
+                        data_ = signal_data[int(each[0] * signal_sf): int(each[1] * signal_sf)]
+                        spindle_lst_ = spindle_detection(
+                            data_, signal_sf, freq_band=[freq_low, freq_high],
+                            std_thresh=std_thres, duration_thresh=duration_thres,
+                            start_time_sec=each[0])
+                        if spindle_lst_ is None:
+                            continue
+                        for each in spindle_lst_:
+                            each.append(state_name)
+                            spindle_lst.append(each)
+            return spindle_lst
+
+        return work
+
+    def export_result(self, spindle_lst, config):
+        """Export the result of :meth:`detection_task` when asked to.
+
+        Returns ``spindle_lst``, or None when the export was cancelled or failed.
+        """
+        import pandas as pd
 
         if self.ExportCheckbox.isChecked():
             df = pd.DataFrame(spindle_lst, columns=["StartTime", "EndTime", "State"])
@@ -801,16 +901,12 @@ class SpindleDetectionDialog(QDialog, Ui_SpindleDetectDialog):
                 QMessageBox.critical(self, "Error", f"Permission denied: {e}, close the file first")
                 return
 
-        logger.info(f"Spindle_detection: Freq_thres: {[freq_low, freq_high]}, "
-                    f"std_thresh_input: {std_thres_input}, "
-                    f"duration_thresh_input: {duration_thres_input}")
+        logger.info(f"Spindle_detection: {self._log_params}")
         return spindle_lst
 
     def get_state_thres(self, data, sf, sleep_state, state, thres1, thres2):
         """Compute thresholds from the full state data."""
-        all_data = [data[int(each[0] * sf): int(each[1] * sf)]
-                    for each in sleep_state if each[2] == state]
-        all_data = [item for each in all_data for item in each]
+        all_data = _state_data(data, sf, sleep_state, state)
         mean_ = np.mean(all_data)
         std_ = np.std(all_data)
         return thres1 * std_ + mean_, thres2 * std_ + mean_
@@ -883,25 +979,57 @@ class AutoStageLightGBMDialog(QDialog, Ui_AutoStageLightGBMDialog):
             was on (and the annotation should be saved), the per-epoch
             confidence array, and the low-confidence display threshold.
         """
+        return self.apply_result(self.auto_stage_task(midata, mianno)(_no_progress), mianno)
+
+    def auto_stage_task(self, midata, mianno):
+        """Read the dialog and return the staging as a ``work(report)`` function.
+
+        ``work`` returns the ``(pred_label, confidence)`` predictions
+        without touching ``mianno``; :meth:`apply_result` applies them on
+        the UI thread.
+        """
         from misleep.analysis.auto_stage import auto_stage_gbm
+        from misleep.analysis.autostage.benchmark import filter_role
 
         eeg_idx = self.EEGChannelCombox.currentIndex()
-        EEG = deepcopy(midata.signals[eeg_idx])
-        EMG = (None if not self.UseEMGCheckbox.isChecked()
-               else deepcopy(midata.signals[self.EMGchannelCombox.currentIndex()]))
-        ACC = (None if not self.UseACCCheckbox.isChecked()
-               else deepcopy(midata.signals[self.ACCchannelCombox.currentIndex()]))
+        roles = [("eeg", eeg_idx)]
+        if self.UseEMGCheckbox.isChecked():
+            roles.append(("emg", self.EMGchannelCombox.currentIndex()))
+        if self.UseACCCheckbox.isChecked():
+            roles.append(("acc", self.ACCchannelCombox.currentIndex()))
         label = deepcopy(mianno._sleep_state)
-        sf = deepcopy(midata.sf[eeg_idx])
+        sf = midata.sf[eeg_idx]
 
         EEG_site = ["P", "F"][self.EEGSiteCombox.currentIndex()]
         mouse_age = ["adult", "ado", "P30"][self.AgeCombox.currentIndex()]
         temperature = self.HMMTemperatureSpin.value()
 
-        pred_label, conf = auto_stage_gbm(
-            EEG=EEG, EMG=EMG, label=label, sf=sf,
-            EEG_channel=EEG_site, mouse_age=mouse_age,
-            ACC=ACC, return_probs=True, temperature=temperature)
+        def work(report):
+            signals = {role: deepcopy(midata.signals[idx]) for role, idx in roles}
+            # Band-passed channels are cached on the MiData, so re-running auto
+            # staging (e.g. with another HMM temperature) skips the filtering.
+            filtered = {}
+            for done, (role, idx) in enumerate(roles):
+                report(30 * done // len(roles), f"Filtering {role.upper()}")
+                filtered[role] = midata.derived_signal(
+                    midata.channels[idx], ("autostage", role),
+                    lambda sig, sf_, role=role: filter_role(sig, sf_, role))
+
+            report(30, "Staging")
+            return auto_stage_gbm(
+                EEG=signals["eeg"], EMG=signals.get("emg"), label=label, sf=sf,
+                EEG_channel=EEG_site, mouse_age=mouse_age,
+                ACC=signals.get("acc"), return_probs=True, temperature=temperature,
+                filtered=filtered)
+
+        return work
+
+    def apply_result(self, result, mianno):
+        """Apply the ``(pred_label, confidence)`` of :meth:`auto_stage_task`.
+
+        Returns the same tuple as :meth:`auto_stage`.
+        """
+        pred_label, conf = result
         save_anno = self.SaveAnnoCheckbox.isChecked()
 
         # Apply the predictions to the annotation. ``pred_label`` is
@@ -959,6 +1087,14 @@ class AutoStageCausalTransformerDialog(QDialog, Ui_AutoStageCausalTransformerDia
 
     def auto_stage(self, midata, mianno):
         """Run transformer auto staging on the selected channels."""
+        return self.auto_stage_task(midata, mianno)(_no_progress)
+
+    def auto_stage_task(self, midata, mianno):
+        """Read the dialog and return the staging as a ``work(report)`` function.
+
+        ``work`` returns ``(pred_label, save_anno)``. Raises ImportError
+        right away when PyTorch is missing.
+        """
         try:
             from misleep.analysis.transformer import AutoStageConfig, auto_stage_llm
         except ImportError as e:
@@ -969,29 +1105,35 @@ class AutoStageCausalTransformerDialog(QDialog, Ui_AutoStageCausalTransformerDia
 
         EEG_channel_idx = self.EEGChannelCombox.currentIndex()
         EMG_channel_idx = self.EMGchannelCombox.currentIndex()
-        EEG = deepcopy(midata.signals[EEG_channel_idx])
-        EMG = deepcopy(midata.signals[EMG_channel_idx])
         label = deepcopy(mianno._sleep_state)
-        sf = deepcopy(midata.sf[EEG_channel_idx])
-
-        config = AutoStageConfig()
-        config.sf = sf
-        config.label_stride_seconds = 5
-        config.output_stride_seconds = 5
-        label = downsample_by_most_frequent(label, 5)
-        pred_label = auto_stage_llm(EEG=EEG, EMG=EMG, label=label, config=config)
-        pred_label = [[each] * 5 for each in pred_label]
-        pred_label = [item for each in pred_label for item in each]
-        for idx in range(1, len(pred_label) - 1):
-            label_ = pred_label[idx]
-            if label_ == 4:
-                pred_label[idx] = 3
-            if label_ == 3 and pred_label[idx + 1] == 2:  # REM after Wake
-                pred_label[idx + 1] = 1
-            if pred_label[idx - 1] == pred_label[idx + 1] and pred_label[idx] != 3:
-                pred_label[idx] = pred_label[idx - 1]
+        sf = midata.sf[EEG_channel_idx]
         save_anno = self.SaveAnnoCheckbox.isChecked()
-        return pred_label, save_anno
+
+        def work(report):
+            EEG = deepcopy(midata.signals[EEG_channel_idx])
+            EMG = deepcopy(midata.signals[EMG_channel_idx])
+
+            config = AutoStageConfig()
+            config.sf = sf
+            config.label_stride_seconds = 5
+            config.output_stride_seconds = 5
+            report(10, "Staging")
+            pred_label = auto_stage_llm(EEG=EEG, EMG=EMG, label=downsample_by_most_frequent(label, 5),
+                                        config=config)
+            report(90, "Smoothing")
+            pred_label = [[each] * 5 for each in pred_label]
+            pred_label = [item for each in pred_label for item in each]
+            for idx in range(1, len(pred_label) - 1):
+                label_ = pred_label[idx]
+                if label_ == 4:
+                    pred_label[idx] = 3
+                if label_ == 3 and pred_label[idx + 1] == 2:  # REM after Wake
+                    pred_label[idx + 1] = 1
+                if pred_label[idx - 1] == pred_label[idx + 1] and pred_label[idx] != 3:
+                    pred_label[idx] = pred_label[idx - 1]
+            return pred_label, save_anno
+
+        return work
 
     def ok_event(self):
         self.closed = False
@@ -1074,6 +1216,7 @@ class EventListDialog(QDialog):
         layout.addWidget(self.hint)
 
         self.list = QListWidget()
+        self.list.setUniformItemSizes(True)
         layout.addWidget(self.list, 1)
         self.list.itemDoubleClicked.connect(self._jump)
 
@@ -1100,19 +1243,29 @@ class EventListDialog(QDialog):
         self.setWindowTitle("Markers" if kind == "marker" else "Start-End events")
         self._refresh()
 
-    def _refresh(self):
+    def _events(self):
         mianno = self._main().mianno
-        self.list.clear()
+        return mianno.marker if self._kind == "marker" else mianno.start_end
+
+    def _item_text(self, each):
         if self._kind == "marker":
-            for each in mianno.marker:
-                self.list.addItem(f"{each[0]:.3f} s — {each[1]}")
-            self.hint.setText(
-                f"{len(mianno.marker)} marker(s) — double-click to jump")
+            return f"{each[0]:.3f} s — {each[1]}"
+        return f"{each[0]:.3f} — {each[1]:.3f} s — {each[2]}"
+
+    def _update_hint(self):
+        n = len(self._events())
+        if self._kind == "marker":
+            self.hint.setText(f"{n} marker(s) — double-click to jump")
         else:
-            for each in mianno.start_end:
-                self.list.addItem(f"{each[0]:.3f} — {each[1]:.3f} s — {each[2]}")
-            self.hint.setText(
-                f"{len(mianno.start_end)} start-end event(s) — double-click to jump")
+            self.hint.setText(f"{n} start-end event(s) — double-click to jump")
+
+    def _refresh(self):
+        # one batched insert; later adds/deletes patch the list in place
+        self.list.setUpdatesEnabled(False)
+        self.list.clear()
+        self.list.addItems([self._item_text(each) for each in self._events()])
+        self.list.setUpdatesEnabled(True)
+        self._update_hint()
 
     def _jump(self):
         row = self.list.currentRow()
@@ -1135,6 +1288,8 @@ class EventListDialog(QDialog):
                                              labels, 0, True)
             if ok and label:
                 mianno.marker.append([float(main.current_sec), label])
+                main._journal_edit("marker", mianno.marker[-1])
+                self.list.addItem(self._item_text(mianno.marker[-1]))
         else:
             labels = main.label_dialog.start_end_label
             label, ok = QInputDialog.getItem(self, "Add start-end", "Label:",
@@ -1142,19 +1297,19 @@ class EventListDialog(QDialog):
             if ok and label:
                 start = float(main.current_sec)
                 mianno.start_end.append([start, start + 5, label])
-        self._refresh()
+                main._journal_edit("start_end", mianno.start_end[-1])
+                self.list.addItem(self._item_text(mianno.start_end[-1]))
+        self._update_hint()
         self._after_change()
 
     def _delete(self):
         row = self.list.currentRow()
         if row < 0:
             return
-        mianno = self._main().mianno
-        if self._kind == "marker":
-            mianno.marker.pop(row)
-        else:
-            mianno.start_end.pop(row)
-        self._refresh()
+        removed = self._events().pop(row)
+        self._main()._journal_edit(self._kind, removed, removed=True)
+        self.list.takeItem(row)
+        self._update_hint()
         self._after_change()
 
     def _after_change(self):
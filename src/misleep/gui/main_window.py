@@ -17,7 +17,8 @@ from contextlib import contextmanager
 import numpy as np
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.collections import PolyCollection
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba_array
 from PySide6.QtCore import QEvent, QTimer, Qt
 from PySide6.QtGui import QColor, QKeySequence, QShortcut
 from PySide6.QtWidgets import (
@@ -29,6 +30,7 @@ from PySide6.QtWidgets import (
     QGridLayout,
     QMainWindow,
     QMessageBox,
+    QProgressDialog,
     QPushButton,
     QScrollArea,
     QSizePolicy,
@@ -40,6 +42,9 @@ from PySide6.QtWidgets import (
 from misleep import __version__ as _pkg_version
 from misleep.config import default_config_path, load_config, save_config, user_config_path
 from misleep.data import MiAnnotation, MiData
+from misleep.gui.blit import BlitManager
+from misleep.gui.prefetch import PagePrefetcher
+from misleep.gui.signal_view import SignalView
 from misleep.gui.config_dialog import SettingsDialog
 from misleep.gui.dialogs import (
     AboutDialog,
@@ -71,11 +76,16 @@ from misleep.gui.style import (
     retheme_figures,
 )
 from misleep.gui.uis.main_window_ui import Ui_MiSleep
-from misleep.gui.workers import SaveThread
-from misleep.io.annotation import available_annotation_readers, load_annotation
-from misleep.io import available_readers, available_writers, load_signal
+from misleep.gui.workers import LoadThread, SaveThread, run_task
+from misleep.io.annotation import (
+    AnnotationJournal,
+    available_annotation_readers,
+    load_annotation,
+)
+from misleep.io import available_readers, available_writers
 from misleep.logger import logger
-from misleep.utils.annotation import lst2group
+from misleep.utils.annotation import lst2group, relabel_runs
+from misleep.viz.hypnogram import dominant_states
 from misleep.viz.spectral import spectrogram_color_limits
 
 
@@ -160,6 +170,13 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         self.signal_figure.subplots_adjust(hspace=0)
         self.signal_canvas = FigureCanvas(self.signal_figure)
         self.signal_canvas.mpl_connect("button_release_event", self.click_signal)
+        self._signal_blit = BlitManager(self.signal_canvas)
+        # Optional QPainter renderer of the same figure ([gui] signal_view)
+        self.signal_view = SignalView(self.signal_figure)
+        self.signal_view.clicked.connect(self.click_signal)
+        self._signal_view_name = self.config.get("gui", "signal_view", fallback="matplotlib")
+        if self._signal_view_name not in ("matplotlib", "qpainter"):
+            self._signal_view_name = "matplotlib"
         # start and end axvline, only two lines
         self.signal_start_end_axvline = []
         self.signal_marker_axvline = []
@@ -177,18 +194,34 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             left=0.09, right=0.99, top=0.97, bottom=0.14)
         self.hypo_canvas = FigureCanvas(self.hypo_figure)
         self.hypo_canvas.mpl_connect("button_release_event", self.click_hypo)
+        self._hypo_blit = BlitManager(self.hypo_canvas)
         self.hypo_axvline = self.hypo_ax.axvline(
             self.current_sec, color="gray", alpha=0.8)
 
         # Caches for fast page flips (spectrogram / hypnogram are static
         # between flips, so they are computed once and reused).
-        self._spec_full_cache = {}           # channel idx -> (f, t, Sxx) of whole file
-        self._spec_cache_max_sec = 4 * 3600  # longer files compute per window
+        # Spectrogram strip tiles of the shown channel and settings
+        self._spec_tiles = {}
+        # Traces, spectrogram columns and state runs of the adjacent pages
+        # are prepared in a worker thread after every redraw
+        self._prefetch = PagePrefetcher()
+        self._task = None                    # running analysis Task, one at a time
+        self._loader = None                  # running LoadThread
+        self._anno_saver = None              # running annotation SaveThread
+        self._anno_save_queued = None        # just_save of a save asked meanwhile
+        self._data_saver = None              # running data export SaveThread
+        self._spec_task = None               # background spectrogram strip Task
+        self._spec_async = False             # compute the strip in the background
         self._hypo_key = None                # fingerprint of the drawn hypnogram base
         self._hypo_revision = 0              # increments only when states change
         self._hypo_steps = []                # base step artists of the hypnogram
+        self._hypo_rgba = None               # per-pixel state image of the hypnogram
+        self._hypo_markers = None            # binned marker lines of the hypnogram
+        self._hypo_marker_key = None
         self._hypo_transient = []            # per-flip overlay artists
-        self._signal_artists = {}            # signal-axes idx -> artists we own
+        self._signal_artists = {}            # signal-axes idx -> transient artists we own
+        self._page_artists = {}              # signal-axes idx -> (trace, states, grid)
+        self._page_runs = []                 # sleep-state runs of the drawn page
         self._spec_artist = None             # current spectrogram QuadMesh
 
         # Auto-staging confidence threshold (display setting for the
@@ -232,6 +265,14 @@ class MainWindow(QMainWindow, Ui_MiSleep):
 
         # Check whether operations are saved or not
         self.is_saved = True
+        # Auto-saves append edits to a journal next to the annotation file
+        # and only rewrite the whole file every few auto-saves, or after
+        # bulk edits (detection, auto staging) that are not journaled.
+        self._anno_journal = None
+        self._anno_journal_owner = None
+        self._journal_full_save = False
+        self._journal_flushes = 0
+        self._journal_compact_every = 6
 
         # Timer to auto-save annotations every 5 minutes
         self.save_timer = QTimer()
@@ -241,6 +282,7 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         self.SignalArea.installEventFilter(self)
         self.HypnoArea.installEventFilter(self)
         self.signal_canvas.installEventFilter(self)
+        self.signal_view.installEventFilter(self)
         self.hypo_canvas.installEventFilter(self)
         # The mouse wheel over the signal / hypnogram panels flips pages
         self.SignalArea.viewport().installEventFilter(self)
@@ -281,6 +323,91 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             setattr(self, attribute, dialog)
         return dialog
 
+    def _busy_progress(self, text):
+        """Busy indicator for background file I/O, shown after 0.5 s."""
+        progress = QProgressDialog(text, None, 0, 0, self)
+        progress.setWindowTitle("MiSleep")
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.setValue(0)
+        return progress
+
+    def _finish_io(self, attribute, progress=None):
+        """Forget a finished I/O thread and close its busy indicator."""
+        setattr(self, attribute, None)
+        if progress is not None:
+            progress.close()
+            progress.deleteLater()
+
+    def _wait_io(self):
+        """Process events until the background loads and saves are done."""
+        while any(each is not None for each in
+                  (self._loader, self._anno_saver, self._data_saver)):
+            QApplication.processEvents()
+            time.sleep(0.005)
+
+    def _run_task(self, title, work, on_result, on_error=None):
+        """Run an analysis ``work(report)`` off the UI thread.
+
+        A progress dialog with a Cancel button is shown meanwhile; the
+        window stays usable. ``on_result(result)`` runs on the UI thread
+        once ``work`` returns, unless another data or annotation file was
+        opened in between (the result was built from the old one).
+        ``on_error(exception)`` defaults to logging and an error box.
+
+        Returns
+        -------
+        Task or None
+            None when another analysis is still running.
+        """
+        if self._task is not None:
+            QMessageBox.about(self, "Info", "Another analysis is still running")
+            return None
+        midata, mianno = self.midata, self.mianno
+        progress = QProgressDialog(f"{title}...", "Cancel", 0, 100, self)
+        progress.setWindowTitle(title)
+        progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        started = time.perf_counter()
+
+        def done():
+            self._task = None
+            progress.close()
+            progress.deleteLater()
+
+        def on_progress(percent, message):
+            progress.setValue(percent)
+            if message:
+                progress.setLabelText(f"{title}: {message}...")
+
+        def finished(result):
+            done()
+            logger.info(f"{title} finished in {time.perf_counter() - started:.1f} s")
+            if self.midata is not midata or self.mianno is not mianno:
+                logger.info(f"{title}: another file was opened, result dropped")
+                return
+            on_result(result)
+
+        def failed(exc):
+            done()
+            if on_error is not None:
+                on_error(exc)
+                return
+            logger.error(f"{title} ERROR: {exc}")
+            QMessageBox.about(self, "Error", f"{title} ERROR. {exc}")
+
+        def cancelled():
+            done()
+            logger.info(f"{title} cancelled")
+
+        self._task = run_task(work, on_result=finished, on_error=failed,
+                              on_progress=on_progress, on_cancel=cancelled)
+        progress.canceled.connect(self._task.cancel)
+        progress.show()
+        return self._task
+
     @contextmanager
     def _busy_operation(self):
         """Disable interaction during synchronous work and always restore it.
@@ -298,7 +425,7 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         finally:
             self.setEnabled(True)
             QApplication.restoreOverrideCursor()
-            self.signal_canvas.update()
+            self._signal_widget().update()
             self.hypo_canvas.update()
             self.update()
             QApplication.processEvents()
@@ -779,41 +906,63 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         with a data file argument (``misleep data.mat``) or by
         double-clicking a registered file.
 
+        The file is read in a :class:`~misleep.gui.workers.LoadThread`;
+        the window stays usable, showing the current recording, until the
+        new one is read and drawn.
+
         Parameters
         ----------
         data_path : str
             Path of any registered signal file to load.
+
+        Returns
+        -------
+        LoadThread or None
+            None when the file does not exist or another one is loading.
         """
         load_started = time.perf_counter()
         if not os.path.exists(data_path):
             QMessageBox.about(
                 self, "Error",
                 f"Data file not found:\n{data_path}")
-            return
+            return None
+        if self._loader is not None:
+            QMessageBox.about(self, "Info", "Another data file is still loading")
+            return None
+
+        progress = self._busy_progress(f"Loading {os.path.basename(data_path)}...")
+        loader = LoadThread(self, file_path=data_path)
+
+        def loaded(midata):
+            self._finish_io("_loader", progress)
+            if not isinstance(midata, MiData):
+                failed(ValueError("The reader did not return valid MiData"))
+                return
+            self._show_data(data_path, midata, time.perf_counter() - load_started)
 
-        self.data_path = data_path
-        self.midata = None
-        try:
-            self.midata = load_signal(self.data_path)
-            if not isinstance(self.midata, MiData):
-                raise ValueError("The reader did not return valid MiData")
-        except Exception as exc:
-            logger.exception("Could not load signal file %s", self.data_path)
+        def failed(exc):
+            self._finish_io("_loader", progress)
+            logger.error(f"Could not load signal file {data_path}: {exc}")
             QMessageBox.critical(
                 self, "Could not load data",
                 f"MiSleep could not open this signal file.\n\n{exc}")
-            self.data_path = ""
-            self.change_Bts_status(True)
-            self.mianno = None
-            return
-        read_elapsed = time.perf_counter() - load_started
+
+        loader.succeeded.connect(loaded)
+        loader.failed.connect(failed)
+        loader.finished.connect(loader.deleteLater)
+        self._loader = loader
+        loader.start()
+        return loader
+
+    def _show_data(self, data_path, midata, read_elapsed):
+        """Show a recording read by :meth:`open_data`."""
+        draw_started = time.perf_counter()
+        self.data_path = data_path
+        self.midata = midata
 
         # Save config
         self.save_config({"openpath": self.data_path})
 
-        # New file: drop the cached whole-file spectrograms
-        self._spec_full_cache = {}
-
         # Set meta info
         self.DataPathEdit.setText(self.data_path)
         self.ac_time = datetime.datetime.strptime(self.midata.time, "%Y%m%d-%H:%M:%S")
@@ -835,7 +984,7 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         except Exception as e:
             logger.error(f"Check Show ERROR: {e}")
         logger.info("Data timing: read %.3f s, initialize/draw %.3f s",
-                    read_elapsed, time.perf_counter() - load_started - read_elapsed)
+                    read_elapsed, time.perf_counter() - draw_started)
 
     def load_anno(self):
         """Triggered by actionLoadAnnotation: ask for an annotation file."""
@@ -861,6 +1010,10 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         anno_path : str
             Path of the annotation ``.txt`` file.
         """
+        if self._loader is not None:
+            # open it on top of the data file being loaded
+            self._loader.succeeded.connect(lambda _: self.open_annotation(anno_path))
+            return
         load_started = time.perf_counter()
         if not os.path.exists(anno_path):
             QMessageBox.about(self, "Error", f"Annotation file not found:\n{anno_path}")
@@ -949,7 +1102,6 @@ class MainWindow(QMainWindow, Ui_MiSleep):
                 self.mianno = create_new_mianno(self.midata.duration)
         self.total_seconds = self.midata.duration if \
             self.midata.duration < self.mianno.anno_length else self.mianno.anno_length
-        self.reset_sec_limit()
 
         self.hypo_ax = self.hypo_figure.subplots(nrows=1, ncols=1)
         self.hypo_figure.subplots_adjust(
@@ -964,16 +1116,24 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         # Keep the canvases hidden until their final axes and DPI-aware size
         # are ready.  Otherwise Qt briefly paints the tiny default figure and
         # users see it grow after loading or adding a filtered channel.
-        self.signal_canvas.hide()
+        self._signal_widget().hide()
         self.hypo_canvas.hide()
-        self.SignalArea.setWidget(self.signal_canvas)
+        self.SignalArea.setWidget(self._signal_widget())
         self.HypnoArea.setWidget(self.hypo_canvas)
 
         self.horizontal_line = {}
         for channel in self.midata.channels:
             self.horizontal_line[channel] = []
 
-        self.redraw_all(second=0)
+        # Progressive first paint: the first signal page is drawn now, with
+        # its spectrogram strip computed in the background; the hypnogram
+        # and the scroll range follow on the next event-loop turn.
+        opened = time.perf_counter()
+        self._spec_async = True
+        try:
+            self.redraw_all(second=0, hypnogram=False)
+        finally:
+            self._spec_async = False
         self.change_Bts_status(False)
 
         self.setWindowTitle(
@@ -994,8 +1154,21 @@ class MainWindow(QMainWindow, Ui_MiSleep):
 
         # Fit the canvases to the (high-DPI aware) window size
         self._fit_canvases()
-        self.signal_canvas.show()
+        self._signal_widget().show()
         self.hypo_canvas.show()
+        self._signal_widget().repaint()
+        first_page = time.perf_counter() - opened
+        midata = self.midata
+        QTimer.singleShot(0, lambda: self._finish_open(midata, opened, first_page))
+
+    def _finish_open(self, midata, opened, first_page):
+        """Second stage of :meth:`check_show`: hypnogram and scroll range."""
+        if self.midata is not midata:
+            return  # another file was opened meanwhile
+        self.reset_sec_limit()
+        self.plot_hypo()
+        logger.info("Open timing: first page %.3f s, hypnogram and scroll range %.3f s",
+                    first_page, time.perf_counter() - opened - first_page)
 
     def reset_sec_limit(self):
         """Update scrollbar / spin / datetime limits when show duration changes."""
@@ -1019,6 +1192,8 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             # the old axes are gone; force a rebuild on the next plot
             self.signal_ax = None
             self._signal_artists = {}
+            self._page_artists = {}
+            self._page_runs = []
             self._spec_artist = None
             self._hypo_key = None
             self._hypo_steps = []
@@ -1029,6 +1204,9 @@ class MainWindow(QMainWindow, Ui_MiSleep):
 
         self.hypo_figure.canvas.draw()
         self.hypo_figure.canvas.flush_events()
+        if self._signal_view_name == "qpainter":
+            self.signal_view.repaint()
+            return
         self.signal_figure.canvas.draw()
         self.signal_figure.canvas.flush_events()
 
@@ -1054,9 +1232,14 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             self.signal_ax = None
             self.signal_canvas = FigureCanvas(self.signal_figure)
             self.signal_canvas.mpl_connect("button_release_event", self.click_signal)
+            self._signal_blit = BlitManager(self.signal_canvas)
             self.signal_canvas.installEventFilter(self)
-            self.SignalArea.setWidget(self.signal_canvas)
+            self.signal_view.figure = self.signal_figure
+            if self._signal_view_name == "matplotlib":
+                self.SignalArea.setWidget(self.signal_canvas)
             self._signal_artists = {}
+            self._page_artists = {}
+            self._page_runs = []
             self._spec_artist = None
             logger.warning("Signal canvas was closed externally - recreated")
 
@@ -1067,6 +1250,7 @@ class MainWindow(QMainWindow, Ui_MiSleep):
                 left=0.09, right=0.99, top=0.97, bottom=0.14)
             self.hypo_canvas = FigureCanvas(self.hypo_figure)
             self.hypo_canvas.mpl_connect("button_release_event", self.click_hypo)
+            self._hypo_blit = BlitManager(self.hypo_canvas)
             self.hypo_canvas.installEventFilter(self)
             self.HypnoArea.setWidget(self.hypo_canvas)
             self._hypo_conf_mode = False  # single-axes structure
@@ -1085,9 +1269,10 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         of a crushed plot.
         """
         try:
-            sig_dpr = self.signal_canvas.devicePixelRatioF() or 1.0
-            sig_w = self.signal_canvas.width() * sig_dpr
-            sig_h = self.signal_canvas.height() * sig_dpr
+            signal_widget = self._signal_widget()
+            sig_dpr = signal_widget.devicePixelRatioF() or 1.0
+            sig_w = signal_widget.width() * sig_dpr
+            sig_h = signal_widget.height() * sig_dpr
             if sig_w < 50 or sig_h < 50:
                 sig_w = self.SignalArea.viewport().width() * sig_dpr
                 sig_h = self.SignalArea.viewport().height() * sig_dpr
@@ -1095,9 +1280,12 @@ class MainWindow(QMainWindow, Ui_MiSleep):
                 self.signal_figure.set_size_inches(
                     sig_w / self.signal_figure.dpi,
                     sig_h / self.signal_figure.dpi)
-                self.signal_canvas.setMinimumSize(300, 200)
+                signal_widget.setMinimumSize(300, 200)
                 self._apply_signal_layout()
-                self.signal_figure.canvas.draw_idle()
+                if signal_widget is self.signal_view:
+                    signal_widget.update()
+                else:
+                    self.signal_figure.canvas.draw_idle()
 
             hypo_dpr = self.hypo_canvas.devicePixelRatioF() or 1.0
             hypo_w = self.hypo_canvas.width() * hypo_dpr
@@ -1110,6 +1298,8 @@ class MainWindow(QMainWindow, Ui_MiSleep):
                     hypo_w / self.hypo_figure.dpi,
                     max(1.0, hypo_h / self.hypo_figure.dpi))
                 self.hypo_canvas.setMinimumSize(300, 60)
+                if self._hypo_key is not None and self._hypo_key[-1] != self._hypo_columns():
+                    self.plot_hypo()  # one image column per pixel again
                 self.hypo_figure.canvas.draw_idle()
         except Exception as e:  # pragma: no cover
             logger.debug(f"fit canvases skipped: {e}")
@@ -1117,12 +1307,12 @@ class MainWindow(QMainWindow, Ui_MiSleep):
     def eventFilter(self, obj, event):
         """Track canvas/scroll-area resizes; flip pages on mouse wheel."""
         if event.type() == QEvent.Type.Resize:
-            if obj in (self.signal_canvas, self.hypo_canvas,
+            if obj in (self.signal_canvas, self.signal_view, self.hypo_canvas,
                        self.SignalArea, self.HypnoArea):
                 self._fit_canvases()
         elif event.type() == QEvent.Type.Wheel:
             if obj in (self.SignalArea.viewport(), self.HypnoArea.viewport(),
-                       self.signal_canvas, self.hypo_canvas):
+                       self.signal_canvas, self.signal_view, self.hypo_canvas):
                 delta = event.angleDelta().y()
                 if delta < 0:
                     self.next_page()
@@ -1171,16 +1361,19 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         if structure_changed:
             # No event-loop turn occurs between hide/show, so the user sees
             # only the completed layout, never matplotlib's resize stages.
-            self.signal_canvas.hide()
+            self._signal_widget().hide()
             self.signal_figure.clf()
             self.signal_ax = list(self.signal_figure.subplots(
                 nrows=need, ncols=1,
                 gridspec_kw={"height_ratios": [0.8] + [1.0] * n}))
+            # the time tick labels change on every flip
+            self.signal_ax[-1].xaxis.set_animated(True)
             self._signal_artists = {}
+            self._page_artists = {}
             self._spec_artist = None
         else:
-            # Remove only the artists we own from the previous flip - far
-            # cheaper than clearing the whole axes.
+            # Remove the transient artists of the previous flip; the trace,
+            # state and grid artists are kept and only get new data.
             for ax_idx, artists in self._signal_artists.items():
                 for art in artists:
                     try:
@@ -1193,9 +1386,8 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         self._style_signal_boxes()
 
         # Sleep-state groups inside the current window
-        sleep_state = self.mianno.sleep_state[
-            self.current_sec: self.current_sec + self.show_duration + 1]
-        sleep_state = lst2group([i, each] for i, each in enumerate(sleep_state))
+        sleep_state = self._page_state_runs(self.current_sec)
+        self._page_runs = sleep_state
 
         tick_step = self._choose_tick_step(self.show_duration)
 
@@ -1204,22 +1396,13 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             y_lim = self.y_lims[each]
             y_shift = self.y_shift[each]
             sf = self.midata.sf[each]
+            if i + 1 not in self._page_artists:
+                self._page_artists[i + 1] = self._new_page_artists(ax)
+            trace, states, grid = self._page_artists[i + 1]
 
-            seg = self.midata.signals[each][
-                int(self.current_sec * sf): int(
-                    (self.current_sec + self.show_duration) * sf)]
-            # Short windows (up to ~3 min at 300 Hz) keep every sample;
-            # long windows use a min/max envelope so the waveform keeps its
-            # shape without the obvious thinning of every-Nth decimation.
-            if len(seg) <= 60000:
-                xs, ys = None, seg
-            else:
-                xs, ys = self._decimate_trace(seg)
-            if xs is None:
-                line, = ax.plot(ys, color=self._plot_trace, linewidth=0.5)
-            else:
-                line, = ax.plot(xs, ys, color=self._plot_trace, linewidth=0.5)
-            self._signal_artists.setdefault(i + 1, []).append(line)
+            trace.set_data(*self._prefetch.get(
+                *self._trace_job(each, self.current_sec, self._trace_bins(ax))))
+            trace.set_color(self._plot_trace)
             ax.set_ylim(ymin=-y_lim + y_shift, ymax=y_lim + y_shift)
             ax.set_xlim(xmin=0, xmax=self.show_duration * sf)
             ax.xaxis.set_ticks([])
@@ -1228,20 +1411,12 @@ class MainWindow(QMainWindow, Ui_MiSleep):
 
             # grid lines: 5 s for short windows, tick step for long ones
             grid_step = 5 if self.show_duration < 300 else tick_step
-            for pos_ in range(0, self.show_duration, grid_step):
-                grid_line = ax.axvline(pos_ * sf, color=self._plot_grid,
-                                       linestyle="--", linewidth=1, alpha=0.45)
-                self._signal_artists[i + 1].append(grid_line)
-
-            # Sleep-state background: one rectangle per run (the fill spans
-            # the full height, so two x-points are exact and cheap to draw)
-            for state in sleep_state:
-                fill = ax.fill_between(
-                    [int(state[0] * sf), int(state[1] * sf)],
-                    -y_lim + y_shift, y_lim + y_shift,
-                    facecolor=self.state_color_dict[state[2]],
-                    alpha=float(self.config["gui"]["statecolorbgalpha"]))
-                self._signal_artists[i + 1].append(fill)
+            grid.set_segments([[(pos_ * sf, 0), (pos_ * sf, 1)]
+                               for pos_ in range(0, self.show_duration, grid_step)])
+            grid.set_color(self._plot_grid)
+
+            self._set_state_runs(states, sleep_state, sf)
+            states.set_alpha(float(self.config["gui"]["statecolorbgalpha"]))
 
         # Time ticks only on the last channel box (auto-reduced for long windows)
         last_sf = self.midata.sf[self.show_idx[-1]]
@@ -1249,10 +1424,11 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             [int(each * last_sf) for each in range(0, self.show_duration + 1, tick_step)],
             range(self.current_sec, self.current_sec + self.show_duration + 1, tick_step),
             rotation=45)
-        if self.show_duration < 300:
-            self.signal_ax[-1].xaxis.set_ticks(
-                [int(each * last_sf) for each in range(0, self.show_duration + 1)],
-                minor=True)
+        # per-second minor ticks for short windows (cleared for long ones,
+        # the box is reused across window lengths)
+        self.signal_ax[-1].xaxis.set_ticks(
+            [int(each * last_sf) for each in range(0, self.show_duration + 1)]
+            if self.show_duration < 300 else [], minor=True)
 
         if self.StartEndRadio.isChecked():
             self.plot_start_end_line(flush=False, ms=True)
@@ -1267,12 +1443,78 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         # page flip - that alone shaves ~20 ms off each flip.
         self.signal_figure.subplots_adjust(hspace=0)
 
-        if flush:
-            self.signal_figure.canvas.draw()
-            self.signal_figure.canvas.flush_events()
         if structure_changed:
+            # the widget is hidden and about to be resized: drawing now
+            # would be at the wrong size, so only the fitted draw is done
             self._fit_canvases()
-            self.signal_canvas.show()
+            self._signal_widget().show()
+        elif flush:
+            self._refresh_signal_canvas()
+
+    def _new_page_artists(self, ax):
+        """Create the per-page artists of a channel box (filled on every flip).
+
+        The trace, the sleep-state background (one ``PolyCollection``) and
+        the grid (one ``LineCollection``) are animated, so page flips update
+        their data and blit them over the cached background.
+        """
+        trace, = ax.plot([], [], color=self._plot_trace, linewidth=0.5, animated=True)
+        grid = ax.add_collection(LineCollection(
+            [], linestyles="--", linewidths=1, alpha=0.45,
+            transform=ax.get_xaxis_transform(), animated=True), autolim=False)
+        states = ax.add_collection(PolyCollection(
+            [], edgecolors="none", transform=ax.get_xaxis_transform(),
+            zorder=1, animated=True), autolim=False)
+        return trace, states, grid
+
+    def _set_state_runs(self, states, runs, sf):
+        """Sleep-state background: one full-height rectangle per run."""
+        states.set_verts([[(int(run[0] * sf), 0), (int(run[0] * sf), 1),
+                           (int(run[1] * sf), 1), (int(run[1] * sf), 0)]
+                          for run in runs])
+        states.set_facecolor([self.state_color_dict[run[2]] for run in runs])
+
+    def _signal_layout_key(self):
+        """Fingerprint of the non-animated parts of the signal figure."""
+        return (self._theme_name, self._tone_name,
+                tuple((ax.get_ylabel(), ax.get_ylim(), tuple(ax.get_facecolor()))
+                      for ax in self.signal_ax),
+                tuple(ax.get_xlim() for ax in self.signal_ax[1:]))
+
+    def _signal_widget(self):
+        """Widget showing the signal figure: the matplotlib canvas or the
+        :class:`SignalView` (``[gui] signal_view``)."""
+        return self.signal_view if self._signal_view_name == "qpainter" else self.signal_canvas
+
+    def _set_signal_view(self, name):
+        """Switch the signal panel renderer (``"matplotlib"`` or ``"qpainter"``)."""
+        if name not in ("matplotlib", "qpainter"):
+            name = "matplotlib"
+        if name == self._signal_view_name:
+            return
+        self._signal_view_name = name
+        if self.SignalArea.widget() is None:
+            return  # nothing loaded yet; the widget is set when data loads
+        # setWidget() deletes the previous widget, take it back first
+        self.SignalArea.takeWidget().hide()
+        self.SignalArea.setWidget(self._signal_widget())
+        self._signal_widget().show()
+        self._signal_blit.invalidate()
+        self._fit_canvases()
+
+    def _refresh_signal_canvas(self, axes=None):
+        """Repaint the signal canvas, blitting when only per-page artists changed.
+
+        ``axes`` limits the blit to those axes (see :meth:`BlitManager.update`).
+        """
+        if self._signal_view_name == "qpainter":
+            self.signal_view.repaint()
+            return
+        if isinstance(self.signal_ax, (list, tuple)):
+            self._signal_blit.update(self._signal_layout_key(), axes=axes)
+        else:
+            self.signal_figure.canvas.draw()
+        self.signal_figure.canvas.flush_events()
 
     def _apply_signal_layout(self):
         """Tighten the signal figure layout so the panels touch each other."""
@@ -1315,30 +1557,143 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         ys[1::2] = mx
         return xs, ys
 
+    @staticmethod
+    def _trace_bins(ax):
+        """Envelope bins of a channel box.
+
+        Windows with more samples than the box has pixels are drawn as a
+        min/max envelope of about one bin per pixel column (0.7-1.4 with the
+        pyramid's power-of-two bins): the waveform keeps its shape without
+        the thinning of every-Nth decimation, and Agg strokes a few thousand
+        vertices instead of every sample (past ~1.5 bins per pixel it gets
+        several times slower, with no visible gain).
+        """
+        return max(int(1.4 * ax.bbox.width), 500)
+
+    def _trace_job(self, each, second, bins):
+        """Prefetch job ``(key, compute)`` of the trace of channel ``each``.
+
+        Long windows slice the channel's cached pyramid, so a page costs
+        O(pixels) whatever the window length.
+        """
+        signal = self.midata.signals[each]
+        sf = self.midata.sf[each]
+        start = int(second * sf)
+        stop = int((second + self.show_duration) * sf)
+        pyramid = None
+        if stop - start > 2 * bins:
+            pyramid = self.midata.minmax_pyramid(self.midata.channels[each])
+
+        def compute():
+            envelope = None if pyramid is None else pyramid.envelope(start, stop, bins)
+            if envelope is None:
+                envelope = self._decimate_trace(signal[start:stop], bins)
+            return envelope
+
+        return ("trace", id(signal), start, stop, bins), compute
+
+    def _state_runs_job(self, second):
+        """Prefetch job ``(key, compute)`` of the sleep-state runs of a page.
+
+        The result keeps the labels it was grouped from, so
+        :meth:`_page_state_runs` can tell when they were edited since.
+        """
+        sleep_state = self.mianno.sleep_state
+        stop = second + self.show_duration + 1
+
+        def compute():
+            labels = sleep_state[second:stop]
+            return labels, lst2group([i, each] for i, each in enumerate(labels))
+
+        return ("states", id(sleep_state), second, stop), compute
+
+    def _page_state_runs(self, second):
+        """``[start, end, state]`` runs of the page at ``second`` (relative seconds)."""
+        key, compute = self._state_runs_job(second)
+        labels, runs = self._prefetch.get(key, compute)
+        if labels != self.mianno.sleep_state[second:second + self.show_duration + 1]:
+            labels, runs = compute()  # labeled since it was prepared
+        return runs
+
+    def _spectrogram_tiles(self):
+        """Spectrogram tiles of the current spectrogram channel and settings."""
+        from misleep.preprocessing.epoch_spectra import SpectrogramTiles, sidecar_dir
+
+        ch = self.current_spectrogram_idx
+        signal = self.midata.signals[ch]
+        params = {"win_sec": 5.0, "step_sec": 1.0, "band": tuple(
+            float(x) for x in self.config["gui"]["freq_range"].strip("[]").split(","))}
+        params["method"] = self.config.get("spec", "method", fallback="welch")
+        if params["method"] == "multitaper":
+            params["nw"] = self.config.getfloat("spec", "multitaper_nw", fallback=3.0)
+        persist = self.config.getboolean("spec", "persist_spectra", fallback=False)
+        cache_dir = sidecar_dir(self.data_path) if persist else None
+        key = (self.midata.channels[ch], id(signal), tuple(params.items()), cache_dir)
+        tiles = self._spec_tiles.get(key)
+        if tiles is None:
+            # only the shown channel and settings are kept
+            tiles = SpectrogramTiles(signal, self.midata.sf[ch], cache_dir=cache_dir, **params)
+            self._spec_tiles = {key: tiles}
+        return tiles
+
+    def _spectrogram_job(self, second):
+        """Prefetch job ``(key, compute)`` of the spectrogram strip of a page.
+
+        ``compute()`` returns the column times, the frequencies and the power
+        relative to the whole band in every column, or ``None`` for an empty
+        window. Columns come from the channel's spectrogram tiles, computed
+        where a page (or a prefetched neighbour) needs them.
+        """
+        tiles = self._spectrogram_tiles()
+        duration = self.show_duration
+
+        def compute():
+            t, f, Sxx = tiles.window(second, second + duration)
+            if t.size == 0:
+                return None
+            # Long windows: cap the number of time columns drawn
+            if t.size > 2000:
+                step_t = max(1, -(-t.size // 2000))
+                t = t[::step_t]
+                Sxx = Sxx[:, ::step_t]
+            return t, f, Sxx
+
+        return ("spectrogram", id(tiles), second, duration), compute
+
+    def _prefetch_adjacent_pages(self):
+        """Prepare the data of the previous and next pages in the background."""
+        if self.midata is None or not isinstance(self.signal_ax, (list, tuple)):
+            return
+        # the current page, the two prepared ones and one being left behind
+        self._prefetch.max_entries = 4 * (len(self.show_idx) + 2)
+        for step in (self.show_duration, -self.show_duration):
+            second = min(max(self.current_sec + step, 0),
+                         max(self.total_seconds - self.show_duration, 0))
+            if second == self.current_sec:
+                continue
+            self._prefetch.submit(*self._spectrogram_job(second))
+            self._prefetch.submit(*self._state_runs_job(second))
+            for i, each in enumerate(self.show_idx):
+                self._prefetch.submit(*self._trace_job(
+                    each, second, self._trace_bins(self.signal_ax[i + 1])))
+
     def replot_sleep_state_bg(self, state):
-        """Replot the sleep-state background of the selected start-end area."""
-        replot_start = 0 if self.current_sec >= self.start_end[0] \
-            else (self.start_end[0] - self.current_sec)
-        replot_end = self.show_duration if (
-            self.current_sec + self.show_duration <= self.start_end[1]
-        ) else (self.start_end[1] - self.current_sec)
+        """Replot the sleep-state background of the selected start-end area.
 
+        Only the page runs overlapping the area change: the state
+        collection of every channel box is updated in place and just the
+        channel boxes are blitted.
+        """
+        page_end = self._page_runs[-1][1] if self._page_runs else 0
+        start = max(self.start_end[0] - self.current_sec, 0)
+        end = min(self.start_end[1] - self.current_sec, page_end)
+        if start >= end:
+            return
+        self._page_runs = relabel_runs(self._page_runs, start, end, state)
         for i, each in enumerate(self.show_idx):
-            y_lim = self.y_lims[each]
-            y_shift = self.y_shift[each]
-            sf = self.midata.sf[each]
-            x = range(int(replot_start * sf), int(replot_end * sf))
-            cover = self.signal_ax[i + 1].fill_between(
-                x, -y_lim + y_shift, y_lim + y_shift,
-                facecolor=resolved_theme(
-                    self._theme_name, self._tone_name)["plot"]["bg"], alpha=1)
-            fill = self.signal_ax[i + 1].fill_between(
-                x, -y_lim + y_shift, y_lim + y_shift,
-                facecolor=self.state_color_dict[state],
-                alpha=float(self.config["gui"]["statecolorbgalpha"]))
-            self._signal_artists.setdefault(i + 1, []).extend([cover, fill])
-        self.signal_figure.canvas.draw()
-        self.signal_figure.canvas.flush_events()
+            _, states, _ = self._page_artists[i + 1]
+            self._set_state_runs(states, self._page_runs, self.midata.sf[each])
+        self._refresh_signal_canvas(axes=self.signal_ax[1:])
 
     def spec_percentile_change(self):
         """Triggered by the spectrogram percentile spin box."""
@@ -1356,11 +1711,28 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         self.current_spectrogram_idx = selected_channel[0]
         self.plot_spectrogram(flush=True)
 
+    def _spectrogram_in_background(self, key, compute):
+        """Compute a spectrogram strip in a :class:`Task`, then draw it."""
+        midata, started = self.midata, time.perf_counter()
+
+        def done(page):
+            self._spec_task = None
+            self._prefetch.put(key, page)
+            logger.info("Open timing: spectrogram strip %.3f s in the background",
+                        time.perf_counter() - started)
+            if self.midata is midata and isinstance(self.signal_ax, (list, tuple)):
+                self.plot_spectrogram(flush=True)
+
+        def failed(exc):
+            self._spec_task = None
+            logger.error(f"Spectrogram ERROR: {exc}")
+
+        self._spec_task = run_task(lambda report: compute(), on_result=done, on_error=failed)
+
     def plot_spectrogram(self, flush=False):
-        """Redraw the spectrogram strip (cached whole-file STFT when possible)."""
+        """Redraw the spectrogram strip (cached whole-file epoch spectra when possible)."""
         if self.midata is None:
             return
-        from misleep.preprocessing.spectral import spectrogram
         # remove the previous spectrogram artist (cheaper than clearing axes)
         if getattr(self, "_spec_artist", None) is not None:
             try:
@@ -1370,37 +1742,14 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             self._spec_artist = None
         freq_range = [float(x) for x in self.config["gui"]["freq_range"].strip("[]").split(",")]
         ch = self.current_spectrogram_idx
-        sf = self.midata.sf[ch]
-
-        # Cache the STFT of the whole file per channel; page flips then only
-        # slice the cached spectrogram instead of recomputing it.
-        if ch not in self._spec_full_cache:
-            if self.midata.duration <= self._spec_cache_max_sec:
-                f, t, Sxx = spectrogram(
-                    signal=self.midata.signals[ch], sf=sf,
-                    band=freq_range, step=1, win_sec=5, norm=True)
-                self._spec_full_cache[ch] = (f, t, Sxx)
-            else:
-                self._spec_full_cache[ch] = None  # too long: per-window
-
-        cached = self._spec_full_cache.get(ch)
-        if cached is not None:
-            f, t, Sxx = cached
-            sel = (t >= self.current_sec) & (t <= self.current_sec + self.show_duration)
-            t = t[sel]
-            Sxx = Sxx[:, sel]
-        else:
-            f, t, Sxx = spectrogram(
-                signal=self.midata.signals[ch][
-                    int(self.current_sec * sf): int(
-                        (self.current_sec + self.show_duration) * sf)],
-                sf=sf, band=freq_range, step=1, win_sec=5, norm=True)
-
-        # Long windows: cap the number of time columns drawn
-        if t.size > 2000:
-            step_t = max(1, -(-t.size // 2000))
-            t = t[::step_t]
-            Sxx = Sxx[:, ::step_t]
+        key, compute = self._spectrogram_job(self.current_sec)
+        if self._spec_async and not self._prefetch.ready(key):
+            self._spectrogram_in_background(key, compute)
+            return
+        page = self._prefetch.get(key, compute)
+        if page is None:
+            return
+        t, f, Sxx = page
 
         cmap_name = self.config.get("gui", "spectrogram_cmap", fallback="jet")
         try:
@@ -1409,6 +1758,15 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             cmap = plt.get_cmap("jet")
         vmin, vmax = spectrogram_color_limits(Sxx, self.spectrogram_percentile)
 
+        # Times and frequencies are evenly spaced, so an image with the
+        # cell edges of ``pcolormesh(shading='auto')`` draws the same
+        # strip in a fraction of the time of a quad mesh.
+        dt = t[1] - t[0] if t.size > 1 else 1.0
+        df = f[1] - f[0]
+        self._spec_artist = self.signal_ax[0].imshow(
+            Sxx, cmap=cmap, vmin=vmin, vmax=vmax, origin="lower", aspect="auto",
+            interpolation="nearest", animated=True,
+            extent=(t[0] - dt / 2, t[-1] + dt / 2, f[0] - df / 2, f[-1] + df / 2))
         self.signal_ax[0].set_xticks([])
         # Pin the horizontal extent explicitly: with reused axes the
         # auto-limit can stay stuck at a previous (longer) window, which
@@ -1417,14 +1775,11 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         self.signal_ax[0].set_ylim(freq_range)
         self.signal_ax[0].set_ylabel(f"{self.midata.channels[ch]}")
         # Match v2's dark low-power background even in the light theme and
-        # eliminate axes-color seams around the pcolormesh.
+        # eliminate axes-color seams around the spectrogram.
         self.signal_ax[0].set_facecolor(cmap(0.0))
-        self._spec_artist = self.signal_ax[0].pcolormesh(
-            t, f, Sxx, cmap=cmap, vmin=vmin, vmax=vmax, shading="auto")
 
         if flush:
-            self.signal_figure.canvas.draw()
-            self.signal_figure.canvas.flush_events()
+            self._refresh_signal_canvas()
 
     def plot_start_end_line(self, flush=True, ms=False):
         """Plot the interactive start/end selection lines in the signal area."""
@@ -1448,21 +1803,21 @@ class MainWindow(QMainWindow, Ui_MiSleep):
 
                     if i in (0, 1):
                         self.signal_start_end_axvline.append(
-                            self.signal_ax[idx + 1].axvline(x, color="lime", alpha=1))
+                            self.signal_ax[idx + 1].axvline(
+                                x, color="lime", alpha=1, animated=True))
 
                 if i == 0:
                     self.signal_start_end_axvline.append(
                         self.signal_ax[idx + 1].text(
-                            x=x, y=-y_lim + y_shift, s="S", color="lime"))
+                            x=x, y=-y_lim + y_shift, s="S", color="lime", animated=True))
                 if i == 1:
                     self.signal_start_end_axvline.append(
                         self.signal_ax[idx + 1].text(
                             x=x, y=-y_lim + y_shift,
-                            horizontalalignment="right", s="E", color="lime"))
+                            horizontalalignment="right", s="E", color="lime", animated=True))
 
         if flush:
-            self.signal_figure.canvas.draw()
-            self.signal_figure.canvas.flush_events()
+            self._refresh_signal_canvas()
             self.plot_hypo()
 
     def plot_marker_line(self, flush=True):
@@ -1475,22 +1830,21 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             except Exception:
                 pass
         self.signal_marker_axvline = []
-        for each in self.mianno.marker:
-            if self.current_sec <= each[0] <= self.current_sec + self.show_duration:
-                for idx, show_ in enumerate(self.show_idx):
-                    self.signal_marker_axvline.append(
-                        self.signal_ax[idx + 1].axvline(
-                            int((each[0] - self.current_sec) * self.midata.sf[show_]),
-                            color=marker_color, alpha=1))
-                self.signal_marker_axvline.append(
-                    self.signal_ax[1].text(
-                        x=int((each[0] - self.current_sec) * self.midata.sf[self.show_idx[0]]),
-                        y=self.y_lims[self.show_idx[0]] + self.y_shift[self.show_idx[0]],
-                        s=each[1], verticalalignment="top", color=marker_color))
+        # interval-index query: only the markers on the current page
+        markers = list(self.mianno.marker.events_in(
+            self.current_sec, self.current_sec + self.show_duration))
+        if markers:
+            self._signal_vlines(self.signal_marker_axvline,
+                                [(each[0], marker_color) for each in markers])
+        for each in markers:
+            self.signal_marker_axvline.append(
+                self.signal_ax[1].text(
+                    x=int((each[0] - self.current_sec) * self.midata.sf[self.show_idx[0]]),
+                    y=self.y_lims[self.show_idx[0]] + self.y_shift[self.show_idx[0]],
+                    s=each[1], verticalalignment="top", color=marker_color, animated=True))
 
         if flush:
-            self.signal_figure.canvas.draw()
-            self.signal_figure.canvas.flush_events()
+            self._refresh_signal_canvas()
             self.plot_hypo()
 
     def plot_start_end_label_line(self, flush=True):
@@ -1501,37 +1855,44 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             except Exception:
                 pass
         self.signal_se_label_axvline = []
-        for each in self.mianno.start_end:
+        lines = []
+        for each in self.mianno.start_end.events_in(
+                self.current_sec, self.current_sec + self.show_duration):
             if self.current_sec <= each[0] <= self.current_sec + self.show_duration:
-                for idx, show_ in enumerate(self.show_idx):
-                    self.signal_se_label_axvline.append(
-                        self.signal_ax[idx + 1].axvline(
-                            int((each[0] - self.current_sec) * self.midata.sf[show_]),
-                            color=identify_startend_color(self.start_end_color_dict, each[2]),
-                            alpha=1))
+                color = identify_startend_color(self.start_end_color_dict, each[2])
+                lines.append((each[0], color))
                 self.signal_se_label_axvline.append(
                     self.signal_ax[1].text(
                         x=int((each[0] - self.current_sec) * self.midata.sf[self.show_idx[0]]),
                         y=self.y_lims[self.show_idx[0]] + self.y_shift[self.show_idx[0]],
-                        s=each[2] + "-S", verticalalignment="top",
-                        color=identify_startend_color(self.start_end_color_dict, each[2])))
+                        s=each[2] + "-S", verticalalignment="top", color=color,
+                        animated=True))
 
             if self.current_sec <= each[1] <= self.current_sec + self.show_duration:
-                for idx, show_ in enumerate(self.show_idx):
-                    self.signal_se_label_axvline.append(
-                        self.signal_ax[idx + 1].axvline(
-                            int((each[1] - self.current_sec) * self.midata.sf[show_]),
-                            color="orange", alpha=1))
+                lines.append((each[1], "orange"))
                 self.signal_se_label_axvline.append(
                     self.signal_ax[1].text(
                         x=int((each[1] - self.current_sec) * self.midata.sf[self.show_idx[0]]),
                         y=self.y_lims[self.show_idx[0]] + self.y_shift[self.show_idx[0]],
                         s=each[2] + "-E", verticalalignment="top",
-                        horizontalalignment="right", color="orange"))
+                        horizontalalignment="right", color="orange", animated=True))
+        if lines:
+            self._signal_vlines(self.signal_se_label_axvline, lines)
 
         if flush:
-            self.signal_figure.canvas.draw()
-            self.signal_figure.canvas.flush_events()
+            self._refresh_signal_canvas()
+
+    def _signal_vlines(self, artists, lines):
+        """Draw full-height ``(second, color)`` lines as one collection per box.
+
+        The collections are animated and appended to ``artists``.
+        """
+        for idx, show_ in enumerate(self.show_idx):
+            ax = self.signal_ax[idx + 1]
+            artists.append(ax.vlines(
+                [int((sec - self.current_sec) * self.midata.sf[show_]) for sec, _ in lines],
+                0, 1, transform=ax.get_xaxis_transform(),
+                colors=[color for _, color in lines], alpha=1, zorder=2, animated=True))
 
     def plot_horizontal_line(self, flush=True):
         """Plot the horizontal reference lines."""
@@ -1545,16 +1906,16 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             sf = self.midata.sf[show_]
             for line_value, color, comment in self.horizontal_line.get(ch, []):
                 self.axhline_horizontal.append(
-                    self.signal_ax[idx + 1].axhline(line_value, color=color, alpha=1))
+                    self.signal_ax[idx + 1].axhline(
+                        line_value, color=color, alpha=1, animated=True))
                 self.axhline_horizontal.append(
                     self.signal_ax[idx + 1].text(
                         x=int(self.show_duration * sf), y=line_value,
                         s=f"{line_value:.2e}",
-                        horizontalalignment="left", color=color))
+                        horizontalalignment="left", color=color, animated=True))
 
         if flush:
-            self.signal_figure.canvas.draw()
-            self.signal_figure.canvas.flush_events()
+            self._refresh_signal_canvas()
 
     def plot_hypo(self):
         """Redraw the hypnogram area (state bands + confidence chart).
@@ -1597,32 +1958,29 @@ class MainWindow(QMainWindow, Ui_MiSleep):
                 tuple(sorted(self.state_color_dict.items())),
                 float(self.config["gui"].get("hypnogramstatealpha", "0.55")),
                 want_conf,
+                self._hypo_columns(),
             )
         if key != self._hypo_key:
             self.hypo_ax.clear()
             self._hypo_transient = []
-            # One thick filled bar per consecutive run of the same state,
-            # spanning the full state band (edges touch between states).
-            # All bars are drawn as a single PolyCollection, so building the
-            # hypnogram stays fast even for multi-hour recordings with tens
-            # of thousands of state runs.
-            band = 0.5  # half height of each bar (state +/- band)
-            runs = lst2group([i, each] for i, each in enumerate(self.mianno.sleep_state))
-            rects = []
-            colors = []
-            for start, end, state in runs:
-                if end <= start:
-                    continue
-                y0 = state - band
-                y1 = state + band
-                rects.append([(start, y0), (end, y0), (end, y1), (start, y1)])
-                colors.append(self.state_color_dict.get(state, "#8892a0"))
-            if rects:
-                collection = PolyCollection(
-                    rects, facecolors=colors, edgecolors="none",
-                    alpha=float(self.config["gui"].get(
-                        "hypnogramstatealpha", "0.55")), zorder=1)
-                self._hypo_steps.append(self.hypo_ax.add_collection(collection))
+            self._hypo_blit.invalidate()
+            # Level of detail: one image column per pixel, colored in the
+            # band of the state dominating its seconds (bands of +/- 0.5
+            # around each state, touching between states). Its cost
+            # depends on the axes width, not on the number of state runs,
+            # and label edits only patch their columns (_patch_hypnogram).
+            self._hypo_steps = []
+            self._hypo_rgba = None
+            self._hypo_markers = None
+            self._hypo_marker_key = None
+            n_labels = len(self.mianno.sleep_state)
+            codes = [code for code in sorted(self.state_map_dict) if code > 0]
+            if n_labels and codes:
+                self._hypo_rgba = self._hypo_raster(key[-1], 0, key[-1])
+                self._hypo_steps.append(self.hypo_ax.imshow(
+                    self._hypo_rgba, origin="lower", aspect="auto",
+                    interpolation="nearest", zorder=1,
+                    extent=(0, n_labels, 0.5, max(codes) + 0.5)))
 
             self.hypo_ax.set_ylim(0, len(list(self.state_map_dict.keys())) + 0.5)
             self.hypo_ax.set_xlim(0, self.total_seconds)
@@ -1649,28 +2007,83 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             self.hypo_axvline.remove()
         except Exception:
             pass  # axes may have been recreated; a new line is drawn below
+        # the overlays are animated: a flip blits them over the cached base
         self.hypo_axvline = self.hypo_ax.axvline(
-            self.current_sec, color="gray", alpha=0.8)
+            self.current_sec, color="gray", alpha=0.8, animated=True)
         self._hypo_transient.append(self.hypo_axvline)
 
         if self.StartEndRadio.isChecked():
             for each in self.start_end_ms:
                 self._hypo_transient.append(
-                    self.hypo_ax.axvline(each, color="lime", alpha=1))
+                    self.hypo_ax.axvline(each, color="lime", alpha=1, animated=True))
         if self.SleepStateRadio.isChecked():
             for each in self.start_end:
                 self._hypo_transient.append(
-                    self.hypo_ax.axvline(each, color="lime", alpha=1))
-        for each in self.mianno.marker:
-            self._hypo_transient.append(
-                self.hypo_ax.axvline(
-                    each[0], color=self.config["gui"].get(
-                        "markerlinecolor", "red").strip("\"'"), alpha=1,
-                    linewidth=1.6, zorder=6))
+                    self.hypo_ax.axvline(each, color="lime", alpha=1, animated=True))
+        self._update_hypo_markers()
 
-        self.hypo_figure.canvas.draw()
+        self._hypo_blit.update(self._hypo_key)
         self.hypo_figure.canvas.flush_events()
 
+    def _hypo_columns(self):
+        """Number of hypnogram image columns: the axes width in pixels."""
+        n_labels = len(self.mianno.sleep_state) if self.mianno is not None else 0
+        width = int(self.hypo_ax.get_window_extent().width)
+        return max(1, min(width, n_labels))
+
+    def _hypo_raster(self, n_cols, first, last):
+        """RGBA columns ``first`` to ``last - 1`` of an ``n_cols`` hypnogram image."""
+        codes = [code for code in sorted(self.state_map_dict) if code > 0]
+        dominant = dominant_states(self.mianno.sleep_state, n_cols, codes, first, last)
+        colors = to_rgba_array([self.state_color_dict.get(code, "#8892a0") for code in codes])
+        colors[:, 3] = float(self.config["gui"].get("hypnogramstatealpha", "0.55"))
+        rgba = np.zeros((max(codes), last - first, 4))
+        cols = np.flatnonzero(dominant)
+        rgba[dominant[cols] - 1, cols] = colors[np.searchsorted(codes, dominant[cols])]
+        return rgba
+
+    def _patch_hypnogram(self, start, end):
+        """Redraw only the hypnogram columns of the seconds ``[start, end)``."""
+        image = self._hypo_steps[0] if self._hypo_steps else None
+        if image is None or self._hypo_rgba is None:
+            self._hypo_revision += 1  # not drawn yet: rebuilt in full
+            return
+        n_labels = len(self.mianno.sleep_state)
+        n_cols = self._hypo_rgba.shape[1]
+        edges = np.arange(n_cols + 1, dtype=np.int64) * n_labels // n_cols
+        first = max(int(np.searchsorted(edges, start, side="right")) - 1, 0)
+        last = min(int(np.searchsorted(edges, end, side="left")), n_cols)
+        if last > first:
+            self._hypo_rgba[:, first:last] = self._hypo_raster(n_cols, first, last)
+            image.set_data(self._hypo_rgba)
+            self._hypo_blit.invalidate()
+
+    def _update_hypo_markers(self):
+        """Draw the markers as one line per occupied pixel column."""
+        n_cols = self._hypo_key[-1] if self._hypo_key is not None else 0
+        key = (self.mianno.marker.revision, len(self.mianno.marker), n_cols)
+        if key == self._hypo_marker_key:
+            return
+        self._hypo_marker_key = key
+        marker_times = np.asarray(self.mianno.marker.starts, dtype=float)
+        if not len(marker_times) or not n_cols:
+            if self._hypo_markers is not None:
+                self._hypo_markers.set_segments([])
+            return
+        # markers sharing a pixel column are drawn once, at its center
+        n_labels = len(self.mianno.sleep_state)
+        columns = np.unique(np.clip((marker_times * n_cols // n_labels).astype(int), 0, n_cols - 1))
+        xs = (columns + 0.5) * n_labels / n_cols
+        segments = np.stack([np.column_stack([xs, np.zeros_like(xs)]),
+                             np.column_stack([xs, np.ones_like(xs)])], axis=1)
+        if self._hypo_markers is None:
+            self._hypo_markers = self.hypo_ax.add_collection(LineCollection(
+                segments, transform=self.hypo_ax.get_xaxis_transform(),
+                colors=self.config["gui"].get("markerlinecolor", "red").strip("\"'"),
+                alpha=1, linewidths=1.6, zorder=6, animated=True), autolim=False)
+        else:
+            self._hypo_markers.set_segments(segments)
+
     def _draw_confidence_chart(self):
         """Draw the per-epoch confidence line + threshold line.
 
@@ -1696,8 +2109,12 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         ax.set_xlabel("Time (s)")
         ax.grid(axis="x", alpha=0.2)
 
-    def redraw_all(self, second=0):
-        """Validate ``second`` and redraw everything."""
+    def redraw_all(self, second=0, hypnogram=True):
+        """Validate ``second`` and redraw everything.
+
+        With ``hypnogram=False`` only the signal page is drawn (see
+        :meth:`check_show`).
+        """
         # heal the canvases first in case an export closed a figure
         self._repair_canvases()
 
@@ -1719,10 +2136,15 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         self.SecondSpin.blockSignals(False)
         self.DateTimeEdit.blockSignals(False)
         self.plot_signals()
-        self.plot_hypo()
+        if hypnogram:
+            self.plot_hypo()
+        self._prefetch_adjacent_pages()
 
     def fill_channel_listView(self):
         """Fill the channel list view with ``self.midata.channels``."""
+        # channels were loaded, added, removed or reordered
+        self._prefetch.clear()
+        self._spec_tiles = {}
         self._updating_ch_list = True
         try:
             self.channel_slm.setChannels(self.midata.channels)
@@ -1930,9 +2352,12 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         if self.SleepStateRadio.isChecked():
             if event.button == 3:
                 # Right click: remove the line(s) at this second
-                for each in self.mianno.start_end:
+                for each in self.mianno.start_end.events_in(sec, sec):
                     if each[0] == sec or each[1] == sec:
                         self.mianno.start_end.remove(each)
+                        self._journal_edit("start_end", each, removed=True)
+                        self.is_saved = False
+                        self.AnnotationPathLabel.setText("*Annotation path:")
                         self.plot_signals()
                         return
                 if len(self.start_end) == 0:
@@ -1960,9 +2385,11 @@ class MainWindow(QMainWindow, Ui_MiSleep):
 
         if self.MarkerRadio.isChecked():
             if event.button == 3:
-                for each in self.mianno.marker:
-                    if abs(each[0] - sec) <= 1:
-                        self.mianno.marker.remove(each)
+                for each in self.mianno.marker.events_in(sec - 1, sec + 1):
+                    self.mianno.marker.remove(each)
+                    self._journal_edit("marker", each, removed=True)
+                    self.is_saved = False
+                    self.AnnotationPathLabel.setText("*Annotation path:")
                 self.plot_signals()
                 self.plot_hypo()
                 return
@@ -1977,6 +2404,7 @@ class MainWindow(QMainWindow, Ui_MiSleep):
 
             label_name = self.label_dialog.label_name
             self.mianno.marker.append([x, label_name])
+            self._journal_edit("marker", [x, label_name])
             self.plot_marker_line()
 
             self.is_saved = False
@@ -1985,9 +2413,12 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         if self.StartEndRadio.isChecked():
             x = round(event.xdata / sf, 3) + self.current_sec
             if event.button == 3:
-                for each in self.mianno.start_end:
+                for each in self.mianno.start_end.events_in(sec, sec + 1):
                     if int(each[0]) == sec or int(each[1]) == sec:
                         self.mianno.start_end.remove(each)
+                        self._journal_edit("start_end", each, removed=True)
+                        self.is_saved = False
+                        self.AnnotationPathLabel.setText("*Annotation path:")
                         self.plot_signals()
                         return
                 if len(self.start_end_ms) == 0:
@@ -2280,8 +2711,15 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         try:
             spec_window = self._ensure_dialog("spec_window", SpecWindow)
             freq_range = [float(x) for x in self.config["gui"]["freq_range"].strip("[]").split(",")]
+            # Slices the band-passed channel when it is cached, else filters
+            # only the (padded) selection
+            band_data = self.midata.filtered_segment(
+                self.midata.channels[channel],
+                int(start_ * self.midata.sf[channel]), int(end_ * self.midata.sf[channel]),
+                btype="bandpass", low=freq_range[0], high=freq_range[1])
             freq, psd = spectrum(
-                signal=signal_data,
+                signal=band_data,
+                prefiltered=True,
                 sf=self.midata.sf[channel],
                 band=freq_range,
                 nfft=nfft,
@@ -2386,7 +2824,8 @@ class MainWindow(QMainWindow, Ui_MiSleep):
 
         self.mianno.sleep_state[self.start_end[0]: self.start_end[1]] = \
             [sleep_type] * (self.start_end[1] - self.start_end[0])
-        self._hypo_revision += 1
+        self._patch_hypnogram(self.start_end[0], self.start_end[1])
+        self._journal_edit("state", self.start_end[0], self.start_end[1], sleep_type)
 
         self.is_saved = False
         self.AnnotationPathLabel.setText("*Annotation path:")
@@ -2411,6 +2850,7 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         label_name = self.label_dialog.label_name
         self.mianno.start_end.append(
             [self.start_end_ms[0], self.start_end_ms[1], label_name])
+        self._journal_edit("start_end", self.mianno.start_end[-1])
         self.plot_start_end_label_line()
 
         self.is_saved = False
@@ -2452,16 +2892,29 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         if dialog.closed:
             return
         try:
-            with self._busy_operation():
-                saved = dialog.spectral_analysis(
-                    midata=self.midata, mianno=self.mianno,
-                    config=self.config)
+            work = dialog.spectral_task(
+                midata=self.midata, mianno=self.mianno, config=self.config,
+                data_path=self.data_path)
         except Exception as exc:
-            logger.exception("State spectral export failed")
+            logger.exception("State spectral analysis failed")
             QMessageBox.about(self, "Error", f"Spectral export failed: {exc}")
             return
-        if saved:
-            QMessageBox.about(self, "Info", "Spectral analysis finished")
+
+        def export(result):
+            try:
+                saved = dialog.export_spectra(result, mianno=self.mianno, config=self.config)
+            except Exception as exc:
+                logger.exception("State spectral export failed")
+                QMessageBox.about(self, "Error", f"Spectral export failed: {exc}")
+                return
+            if saved:
+                QMessageBox.about(self, "Info", "Spectral analysis finished")
+
+        def failed(exc):
+            logger.error(f"State spectral analysis failed: {exc}")
+            QMessageBox.about(self, "Error", f"Spectral export failed: {exc}")
+
+        self._run_task("State spectral analysis", work, export, on_error=failed)
 
     def add_horizontal_line(self):
         """Add a horizontal reference line."""
@@ -2490,17 +2943,23 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             dialog.exec()
             if dialog.closed:
                 return
-            swa_lst = dialog.swa_detection(
-                self.midata, self.mianno, self.config)
+            work = dialog.detection_task(self.midata, self.mianno)
+        except Exception as e:
+            logger.error(f"SWA_detection ERROR: {e}")
+            QMessageBox.about(self, "Error", f"SWA detection ERROR. {e}")
+            return
 
+        def add_events(result):
+            swa_lst = dialog.export_result(result, self.config)
+            if swa_lst is None:
+                return
             self.mianno._start_end += [[each[0], each[4], "SWA"] for each in swa_lst]
+            self._journal_full_save = True
             self.plot_start_end_label_line()
             self.is_saved = False
             self.AnnotationPathLabel.setText("*Annotation path:")
-        except Exception as e:
-            logger.error(f"SWA_detection ERROR: {e}")
-            QMessageBox.about(self, "Error", f"SWA detection ERROR. {e}")
-            return
+
+        self._run_task("SWA detection", work, add_events)
 
     def spindle_detection(self):
         """Sleep spindle detection."""
@@ -2511,17 +2970,39 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             dialog.exec()
             if dialog.closed:
                 return
-            spindle_lst = dialog.spindle_detection(
-                self.midata, self.mianno, self.config)
+            work = dialog.detection_task(self.midata, self.mianno)
+        except Exception as e:
+            logger.error(f"Spindel_detection ERROR: {e}")
+            QMessageBox.about(self, "Error", "Spindle detection ERROR")
+            return
 
+        def add_events(result):
+            spindle_lst = dialog.export_result(result, self.config)
+            if spindle_lst is None:
+                return
             self.mianno._start_end += [[each[0], each[1], "Spindle"] for each in spindle_lst]
+            self._journal_full_save = True
             self.plot_start_end_label_line()
             self.is_saved = False
             self.AnnotationPathLabel.setText("*Annotation path:")
-        except Exception as e:
-            logger.error(f"Spindel_detection ERROR: {e}")
-            QMessageBox.about(self, "Error", "Spindle detection ERROR")
-            return
+
+        self._run_task("Spindle detection", work, add_events)
+
+    def _auto_stage_applied(self, save_anno):
+        """Redraw and mark the annotation changed after auto staging."""
+        self._hypo_revision += 1
+        self._journal_full_save = True
+
+        if save_anno:
+            self.save_anno()
+        self.is_saved = False
+        self.AnnotationPathLabel.setText("*Annotation path:")
+        self.plot_signals()
+        self.plot_hypo()
+
+    def _auto_stage_failed(self, exc):
+        logger.error(f"Auto stage ERROR: {exc}")
+        QMessageBox.about(self, "Error", "Auto stage ERROR")
 
     def auto_stage_LightGBM(self):
         """Auto stage with the LightGBM model."""
@@ -2532,29 +3013,24 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             dialog.exec()
             if dialog.closed:
                 return
-            # The dialog applies the predictions (cover-current or full
-            # overwrite), attaches the per-second confidence to the
-            # annotation, and returns the display threshold.
-            pred, save_anno, conf, conf_thr = dialog.auto_stage(
-                self.midata, self.mianno)
-
-            self._auto_stage_conf_threshold = float(conf_thr)
-            self._hypo_revision += 1
-
-            if save_anno:
-                self.save_anno()
-            self.is_saved = False
-            self.AnnotationPathLabel.setText("*Annotation path:")
-            self.plot_signals()
-            self.plot_hypo()
+            work = dialog.auto_stage_task(self.midata, self.mianno)
         except ImportError as e:
             QMessageBox.about(self, "Error", str(e))
             return
         except Exception as e:
-            logger.error(f"Auto stage ERROR: {e}")
-            QMessageBox.about(self, "Error", "Auto stage ERROR")
+            self._auto_stage_failed(e)
             return
 
+        def apply(result):
+            # The dialog applies the predictions (cover-current or full
+            # overwrite), attaches the per-second confidence to the
+            # annotation, and returns the display threshold.
+            pred, save_anno, conf, conf_thr = dialog.apply_result(result, self.mianno)
+            self._auto_stage_conf_threshold = float(conf_thr)
+            self._auto_stage_applied(save_anno)
+
+        self._run_task("Auto staging", work, apply, on_error=self._auto_stage_failed)
+
     def auto_stage_CausalTransformer(self):
         """Auto stage with the causal-transformer model."""
         try:
@@ -2565,26 +3041,22 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             dialog.exec()
             if dialog.closed:
                 return
-            auto_stage_lst, save_anno = dialog.auto_stage(self.midata, self.mianno)
-
-            limit = min(len(self.mianno._sleep_state), len(auto_stage_lst))
-            self.mianno._sleep_state[:limit] = auto_stage_lst[:limit]
-            self._hypo_revision += 1
-
-            if save_anno:
-                self.save_anno()
-            self.is_saved = False
-            self.AnnotationPathLabel.setText("*Annotation path:")
-            self.plot_signals()
-            self.plot_hypo()
+            work = dialog.auto_stage_task(self.midata, self.mianno)
         except ImportError as e:
             QMessageBox.about(self, "Error", str(e))
             return
         except Exception as e:
-            logger.error(f"Auto stage ERROR: {e}")
-            QMessageBox.about(self, "Error", "Auto stage ERROR")
+            self._auto_stage_failed(e)
             return
 
+        def apply(result):
+            auto_stage_lst, save_anno = result
+            limit = min(len(self.mianno._sleep_state), len(auto_stage_lst))
+            self.mianno._sleep_state[:limit] = auto_stage_lst[:limit]
+            self._auto_stage_applied(save_anno)
+
+        self._run_task("Auto staging", work, apply, on_error=self._auto_stage_failed)
+
     # ------------------------------------------------------------------
     # Saving
     # ------------------------------------------------------------------
@@ -2607,13 +3079,68 @@ class MainWindow(QMainWindow, Ui_MiSleep):
                 self.anno_path = anno_path
                 self.AnnoPathEdit.setText(self.anno_path)
 
-        save_thread = SaveThread(file=[self.mianno, self.midata],
-                                 file_path=self.anno_path)
-        saved = save_thread.save_anno()
-        if saved and not just_save:
+        if self._anno_saver is not None:
+            # one save at a time: save again once the running one is done
+            queued = self._anno_save_queued
+            self._anno_save_queued = just_save if queued is None else queued and just_save
+            return
+
+        # Save a snapshot in the background; edits made meanwhile stay in
+        # the journal and mark the annotation unsaved again.
+        journal = self._annotation_journal()
+        pending = journal.pending if journal is not None else 0
+        full_save, flushes = self._journal_full_save, self._journal_flushes
+        self._journal_full_save = False
+        self._journal_flushes = 0
+        if not just_save:
             self.is_saved = True
-            self.AnnotationPathLabel.setText("Annotation path:")
-        save_thread.quit()
+        save_thread = SaveThread(self, file=[self.mianno.copy(), self.midata],
+                                 file_path=self.anno_path, kind="anno")
+
+        def done(saved):
+            self._finish_io("_anno_saver")
+            if saved:
+                # the full file now contains every journaled edit
+                if journal is not None:
+                    journal.reset(keep=journal.pending - pending)
+            else:
+                self._journal_full_save = self._journal_full_save or full_save
+                self._journal_flushes += flushes
+            if not just_save:
+                self.is_saved = self.is_saved and bool(saved)
+                self.AnnotationPathLabel.setText(
+                    "Annotation path:" if self.is_saved else "*Annotation path:")
+            queued, self._anno_save_queued = self._anno_save_queued, None
+            if queued is not None:
+                self.save_anno(just_save=queued)
+
+        def failed(exc):
+            logger.error(f"Save annotation ERROR: {exc}")
+            QMessageBox.about(self, "Error", f"Save annotation failed: {exc}")
+            done(False)
+
+        save_thread.succeeded.connect(done)
+        save_thread.failed.connect(failed)
+        save_thread.finished.connect(save_thread.deleteLater)
+        self._anno_saver = save_thread
+        save_thread.start()
+
+    def _annotation_journal(self):
+        """Edit journal of the current ``.txt`` annotation file, or None."""
+        if (self.mianno is None or not self.anno_path
+                or not self.anno_path.lower().endswith(".txt")):
+            return None
+        owner = self._anno_journal_owner
+        if owner is None or owner[0] != self.anno_path or owner[1] is not self.mianno:
+            self._anno_journal = AnnotationJournal(self.anno_path)
+            self._anno_journal_owner = (self.anno_path, self.mianno)
+        return self._anno_journal
+
+    def _journal_edit(self, kind, *args, **kwargs):
+        """Record an annotation edit (``kind``: state/marker/start_end)."""
+        journal = self._annotation_journal()
+        if journal is not None:
+            getattr(journal, f"record_{kind}")(*args, **kwargs)
 
     def save_data(self):
         """Export (cropped, channel-selected) data to ``.mat``/``.edf``."""
@@ -2663,19 +3190,30 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         if data_path == "":
             return
 
-        save_thread = SaveThread(file=midata_to_save, file_path=data_path)
-        try:
-            with self._busy_operation():
-                saved = save_thread.save_data()
-        except Exception as exc:
-            logger.exception("Data export failed")
-            QMessageBox.about(self, "Error", f"Data save failed: {exc}")
+        if self._data_saver is not None:
+            QMessageBox.about(self, "Info", "Another data file is still being saved")
             return
-        if saved:
-            QMessageBox.about(self, "Info", f"Data Saved to {data_path}")
-        else:
-            QMessageBox.about(self, "Error", "Data save ERROR")
-        save_thread.quit()
+
+        progress = self._busy_progress(f"Saving {os.path.basename(data_path)}...")
+        save_thread = SaveThread(self, file=midata_to_save, file_path=data_path, kind="data")
+
+        def done(saved):
+            self._finish_io("_data_saver", progress)
+            if saved:
+                QMessageBox.about(self, "Info", f"Data Saved to {data_path}")
+            else:
+                QMessageBox.about(self, "Error", "Data save ERROR")
+
+        def failed(exc):
+            self._finish_io("_data_saver", progress)
+            logger.error(f"Data export failed: {exc}")
+            QMessageBox.about(self, "Error", f"Data save failed: {exc}")
+
+        save_thread.succeeded.connect(done)
+        save_thread.failed.connect(failed)
+        save_thread.finished.connect(save_thread.deleteLater)
+        self._data_saver = save_thread
+        save_thread.start()
 
     # ------------------------------------------------------------------
     # Configuration
@@ -2711,6 +3249,8 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             self._set_plot_colors()
             self._update_theme_action()
 
+        self._set_signal_view(gui.get("signal_view", fallback="matplotlib"))
+
         # Reload the parsed dictionaries
         self.state_map_dict = {int(key): value for key, value
                                in json.loads(gui["statemap"]).items()}
@@ -2747,8 +3287,6 @@ class MainWindow(QMainWindow, Ui_MiSleep):
         self._hypo_revision += 1
         self._hypo_steps = []
         self._hypo_transient = []
-        # Frequency range changes also invalidate the cached whole-file STFT.
-        self._spec_full_cache = {}
 
         # Redraw with the new colors / frequency range (skip before data loads)
         if self.midata is not None and self.mianno is not None:
@@ -2775,9 +3313,24 @@ class MainWindow(QMainWindow, Ui_MiSleep):
             QMessageBox.about(self, "Error", f"Open config.ini ERROR: {e}")
 
     def auto_save(self):
-        """Auto-save the annotation every 5 minutes when modified."""
-        if not self.is_saved:
-            self.save_anno()
+        """Auto-save the annotation every 5 minutes when modified.
+
+        Only the edits since the last auto-save are appended to the
+        annotation journal; the full file is rewritten every
+        ``_journal_compact_every`` auto-saves, after bulk edits, or when the
+        annotation has no ``.txt`` file yet. Full saves run in the
+        background; while one is running, this auto-save is skipped.
+        """
+        if not self.is_saved and self._anno_saver is None:
+            journal = self._annotation_journal()
+            if (journal is None or self._journal_full_save
+                    or self._journal_flushes >= self._journal_compact_every):
+                self.save_anno()
+            else:
+                journal.flush()
+                self._journal_flushes += 1
+                self.is_saved = True
+                self.AnnotationPathLabel.setText("Annotation path:")
         self.save_timer.start(5 * 60 * 1000)
 
     def save_config(self, config_dict):
@@ -2805,6 +3358,12 @@ class MainWindow(QMainWindow, Ui_MiSleep):
 
     def closeEvent(self, event):
         """Ask for confirmation when there are unsaved labels."""
+        self._wait_io()
+        journal = self._annotation_journal()
+        if self.is_saved and journal is not None and journal.exists():
+            # fold the auto-save journal back into the annotation file
+            self.save_anno()
+            self._wait_io()
         if not self.is_saved:
             box = QMessageBox.question(
                 self, "Warning",
@@ -2816,6 +3375,7 @@ class MainWindow(QMainWindow, Ui_MiSleep):
 
             if box == QMessageBox.StandardButton.Yes:
                 self.save_anno()
+                self._wait_io()
                 event.accept()
             elif box == QMessageBox.StandardButton.No:
                 event.accept()
@@ -2824,6 +3384,9 @@ class MainWindow(QMainWindow, Ui_MiSleep):
 
         if event.isAccepted():
             self.save_timer.stop()
+            self._prefetch.shutdown()
+            if self._task is not None:
+                self._task.cancel()
             if self.spec_window is not None:
                 self.spec_window.close()
             plt.close(self.signal_figure)
@@ -0,0 +1,117 @@
+# -*- coding: UTF-8 -*-
+"""Background preparation of the data of adjacent signal pages.
+
+Users mostly page through a recording sequentially, so after drawing a
+page the main window asks :class:`PagePrefetcher` to prepare the previous
+and next ones -- decimated traces, spectrogram columns and sleep-state
+runs -- in a worker thread. The next flip then picks the results up and
+only renders. Jobs are plain ``(key, compute)`` pairs: ``compute()`` must
+only read data captured when the job was made (no Qt or matplotlib
+objects), and ``key`` must describe everything its result depends on.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+from misleep.logger import logger
+
+
+class PagePrefetcher:
+    """Run page-preparation jobs in a worker thread and keep their results.
+
+    Parameters
+    ----------
+    max_entries : int
+        Number of results (finished or pending) kept, least recently used
+        first out. Default is 64.
+
+    Notes
+    -----
+    :meth:`get` returns the prefetched result of a key -- waiting for it
+    when the worker is still on it -- or computes it in the calling thread
+    when it was never submitted or failed, so a miss costs what an
+    unprefetched page always did.
+    """
+
+    def __init__(self, max_entries=64):
+        if not isinstance(max_entries, int) or max_entries < 1:
+            raise ValueError(f"'max_entries' should be a positive integer, got {max_entries!r}")
+        self.max_entries = max_entries
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="misleep-prefetch")
+        self.hits = 0
+        self.misses = 0
+
+    def _store(self, key, future):
+        self._futures[key] = future
+        self._futures.move_to_end(key)
+        while len(self._futures) > self.max_entries:
+            _, old = self._futures.popitem(last=False)
+            old.cancel()
+
+    def submit(self, key, compute):
+        """Schedule ``compute()`` for ``key`` unless it is already known."""
+        with self._lock:
+            if key in self._futures:
+                self._futures.move_to_end(key)
+                return
+            try:
+                self._store(key, self._executor.submit(compute))
+            except RuntimeError:  # shut down
+                pass
+
+    def get(self, key, compute):
+        """Result of ``key``: prefetched when available, else ``compute()`` now."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self._futures.move_to_end(key)
+        if future is not None:
+            try:
+                value = future.result()
+            except CancelledError:
+                pass
+            except Exception as e:
+                logger.debug(f"prefetch of {key[0]} failed, computing it again: {e}")
+            else:
+                self.hits += 1
+                return value
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def ready(self, key):
+        """Whether :meth:`get` of ``key`` would return without computing."""
+        with self._lock:
+            future = self._futures.get(key)
+        return future is not None and future.done() and not future.cancelled() \
+            and future.exception() is None
+
+    def put(self, key, value):
+        """Store a result computed elsewhere (e.g. in a GUI task)."""
+        done = Future()
+        done.set_result(value)
+        with self._lock:
+            self._store(key, done)
+
+    def clear(self):
+        """Drop every result and cancel the pending jobs."""
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+
+    def shutdown(self):
+        """Cancel the pending jobs and stop the worker."""
+        self.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __len__(self):
+        return len(self._futures)
+
+    def __repr__(self):
+        return (f"PagePrefetcher({len(self)}/{self.max_entries} entries, "
+                f"{self.hits} hits, {self.misses} misses)")
@@ -210,33 +210,80 @@ def cal_draw_spectrum(data, sf, nperseg, freq_band=None, relative=None, nfft=Non
         ``spectrum`` is an array of shape ``(2, n_freq)`` (frequencies and
         powers); ``figure`` is the matplotlib figure.
     """
-    # IMPORTANT: build the figure with matplotlib.figure.Figure directly
-    # (not pyplot).  The old ``plt.close()`` here silently closed the main
-    # window's figures, which froze the signal/hypnogram panels after an
-    # export.  A non-pyplot figure is invisible to pyplot bookkeeping.
     import numpy as np
-    from matplotlib.figure import Figure
-    from scipy.ndimage import gaussian_filter1d
     from scipy.signal import welch
 
-    if freq_band is None:
-        freq_band = [0.5, 30]
     F, P = welch(data, sf, nperseg=nperseg, nfft=nfft, scaling="density")
+    F = np.round(F, 2)
+    return draw_spectrum(F, P, freq_band=freq_band, relative=relative,
+                         gaussian_sigma=gaussian_sigma)
+
+
+def finish_spectrum(F, P, freq_band=None, relative=None, gaussian_sigma=None):
+    """Smooth, crop and normalize an already computed power spectrum.
+
+    The post-processing of :func:`cal_draw_spectrum`, for spectra averaged
+    from :func:`misleep.preprocessing.spectral.epoch_psd` rows. Smoothing
+    runs on the spectrum as given, so pass a few bins beyond ``freq_band``
+    to smooth the band edges exactly like :func:`cal_draw_spectrum`.
 
-    F = np.array([round(each, 2) for each in F])
+    Parameters
+    ----------
+    F, P : ndarray
+        Frequencies (rounded to 0.01 Hz) and power spectral density.
+    freq_band, relative, gaussian_sigma
+        See :func:`cal_draw_spectrum`.
+
+    Returns
+    -------
+    ndarray
+        ``(2, n_freq)`` array of frequencies and powers within ``freq_band``.
+    """
+    import numpy as np
+    from scipy.ndimage import gaussian_filter1d
+
+    if freq_band is None:
+        freq_band = [0.5, 30]
     if gaussian_sigma is not None:
         P = gaussian_filter1d(P, sigma=gaussian_sigma)
 
-    if freq_band is not None:
-        idx_band = np.logical_and(F >= freq_band[0], F <= freq_band[1])
-        F = F[idx_band]
-        P = P[idx_band]
+    idx_band = np.logical_and(F >= freq_band[0], F <= freq_band[1])
+    F = F[idx_band]
+    P = P[idx_band]
 
     if relative:
-        total = sum(P)
+        total = P.sum()
         if total > 0:
-            P = [each / total for each in P]
+            P = P / total
+    return np.array([F, P])
+
+
+def draw_spectrum(F, P, freq_band=None, relative=None, gaussian_sigma=None):
+    """:func:`finish_spectrum` a power spectrum and plot it.
+
+    Returns
+    -------
+    (spectrum, figure) : tuple
+        As :func:`cal_draw_spectrum`.
+    """
+    if freq_band is None:
+        freq_band = [0.5, 30]
+    spectrum = finish_spectrum(F, P, freq_band=freq_band, relative=relative,
+                               gaussian_sigma=gaussian_sigma)
+    return spectrum, spectrum_figure(spectrum, freq_band=freq_band)
 
+
+def spectrum_figure(spectrum, freq_band=None):
+    """Plot a ``(2, n)`` frequency/power spectrum on a new figure."""
+    # IMPORTANT: build the figure with matplotlib.figure.Figure directly
+    # (not pyplot).  The old ``plt.close()`` here silently closed the main
+    # window's figures, which froze the signal/hypnogram panels after an
+    # export.  A non-pyplot figure is invisible to pyplot bookkeeping.
+    import numpy as np
+    from matplotlib.figure import Figure
+
+    if freq_band is None:
+        freq_band = [0.5, 30]
     major_ticks_top = np.linspace(0, freq_band[1] + 0.1, 10)
 
     figure = Figure(figsize=(10, 7))
@@ -247,11 +294,11 @@ def cal_draw_spectrum(data, sf, nperseg, freq_band=None, relative=None, nfft=Non
     ax.grid(which="major", alpha=0.6)
 
     ax.set_xlim(freq_band[0], freq_band[1] + 0.1)
-    ax.plot(F, P)
+    ax.plot(spectrum[0], spectrum[1])
     ax.set_xlabel("Frequency (Hz)")
     ax.set_ylabel("Power spectral density (Power/Hz)")
 
-    return np.array([F, P]), figure
+    return figure
 
 
 # Re-export shared helpers so existing imports of ``misleep.gui.utils`` keep working.
@@ -266,6 +313,9 @@ from misleep.utils.annotation import insert_row, temp_loop4below_row  # noqa: E4
 
 __all__ = [
     "cal_draw_spectrum",
+    "draw_spectrum",
+    "finish_spectrum",
+    "spectrum_figure",
     "create_new_mianno",
     "identify_startend_color",
     "get_base_path",
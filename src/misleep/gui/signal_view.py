@@ -0,0 +1,338 @@
+# -*- coding: UTF-8 -*-
+"""QPainter signal view: a lightweight alternative to the matplotlib canvas.
+
+:class:`SignalView` paints the signal figure -- spectrogram strip and
+channel boxes -- with ``QPainter`` instead of matplotlib's Agg renderer.
+The main window keeps building the figure exactly as for the matplotlib
+canvas (traces as min/max envelopes, state backgrounds, grid, markers,
+labels); the view walks the artists of every axes and maps their
+geometry through the artists' own transforms, so both backends show the
+same page and the figure can still be exported with ``savefig``. Traces
+become ``QPainterPath`` polylines built in one pass from the envelope
+arrays (:func:`polyline_path`), which Qt rasterizes several times faster
+than Agg strokes them.
+
+Only the artists the signal panel uses are supported: lines, line and
+polygon collections, texts, images, spines, y labels and x ticks. It is
+selected with the ``[gui] signal_view = qpainter`` option.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
+from matplotlib.image import AxesImage
+from matplotlib.lines import Line2D
+from matplotlib.text import Text
+from PySide6.QtCore import QByteArray, QDataStream, QRectF, Qt, Signal
+from PySide6.QtGui import (QColor, QFont, QFontMetricsF, QImage, QPainter, QPainterPath,
+                           QPen)
+from PySide6.QtWidgets import QSizePolicy, QWidget
+
+#: Mouse event passed to the click handlers (``inaxes``, ``xdata``,
+#: ``ydata`` and ``button`` like a matplotlib ``MouseEvent``; ``button`` is
+#: 1 for left, 2 for middle and 3 for right clicks).
+ViewMouseEvent = namedtuple("ViewMouseEvent", ["inaxes", "xdata", "ydata", "button"])
+
+_BUTTONS = {Qt.MouseButton.LeftButton: 1, Qt.MouseButton.MiddleButton: 2,
+            Qt.MouseButton.RightButton: 3}
+_PATH_RECORD = np.dtype([("type", ">i4"), ("x", ">f8"), ("y", ">f8")])
+
+
+def polyline_path(*polylines):
+    """Build a ``QPainterPath`` from ``(n, 2)`` arrays of points, one subpath each.
+
+    The points are written in the binary layout of ``QDataStream`` and read
+    back in one call, which avoids creating one ``QPointF`` per vertex.
+    Non-finite points are dropped.
+    """
+    polylines = [xy[np.isfinite(xy).all(axis=1)]
+                 for xy in (np.asarray(each, dtype=np.float64).reshape(-1, 2)
+                            for each in polylines)]
+    polylines = [xy for xy in polylines if len(xy)]
+    sizes = np.array([len(xy) for xy in polylines], dtype=np.intp)
+    records = np.zeros(sizes.sum(), dtype=_PATH_RECORD)
+    records["type"] = 1  # LineToElement
+    starts = np.cumsum(sizes) - sizes
+    records["type"][starts] = 0  # MoveToElement
+    if polylines:
+        xy = np.concatenate(polylines)
+        records["x"] = xy[:, 0]
+        records["y"] = xy[:, 1]
+    # element count, elements, start of the last subpath and fill rule
+    footer = np.array([starts[-1] if starts.size else 0, 0], dtype=">i4")
+    data = (np.array([records.size], dtype=">i4").tobytes() + records.tobytes()
+            + footer.tobytes())
+    path = QPainterPath()
+    QDataStream(QByteArray(data)) >> path
+    return path
+
+
+def _qcolor(color, alpha=None):
+    r, g, b, a = to_rgba(color, alpha)
+    return QColor.fromRgbF(r, g, b, a)
+
+
+class SignalView(QWidget):
+    """Widget painting a matplotlib figure's signal panel with ``QPainter``.
+
+    Parameters
+    ----------
+    figure : matplotlib.figure.Figure
+        Figure to paint; its size should follow the widget (the main window
+        resizes it on every widget resize). Assign :attr:`figure` to switch
+        to another figure.
+    parent : QWidget, optional
+
+    Notes
+    -----
+    :attr:`clicked` is emitted on mouse release with a
+    :data:`ViewMouseEvent`, so the main window's matplotlib click handler
+    can be connected as is.
+    """
+
+    clicked = Signal(object)
+
+    def __init__(self, figure, parent=None):
+        super().__init__(parent)
+        self.figure = figure
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+    # ------------------------------------------------------------------
+    # Geometry
+    # ------------------------------------------------------------------
+    def _scale(self):
+        """Widget pixels per figure pixel."""
+        width = self.figure.bbox.width
+        return self.width() / width if width else 1.0
+
+    def _to_widget(self, xy):
+        """Figure display coordinates -> figure pixels with y pointing down."""
+        xy = np.array(xy, dtype=np.float64, ndmin=2)
+        xy[:, 1] = self.figure.bbox.height - xy[:, 1]
+        return xy
+
+    def _axes_rect(self, ax):
+        x0, y0, x1, y1 = ax.bbox.extents
+        height = self.figure.bbox.height
+        return QRectF(x0, height - y1, x1 - x0, y1 - y0)
+
+    def _px(self, points):
+        return points * self.figure.dpi / 72
+
+    def _font(self, text):
+        font = QFont(self.font())
+        font.setPixelSize(max(1, round(self._px(text.get_fontsize()))))
+        return font
+
+    def event_at(self, pos, button=1):
+        """:data:`ViewMouseEvent` at the widget position ``pos``."""
+        scale = self._scale()
+        x = pos.x() / scale
+        y = self.figure.bbox.height - pos.y() / scale
+        for ax in self.figure.axes:
+            if ax.bbox.contains(x, y):
+                xdata, ydata = ax.transData.inverted().transform((x, y))
+                return ViewMouseEvent(ax, float(xdata), float(ydata), button)
+        return ViewMouseEvent(None, None, None, button)
+
+    def mouseReleaseEvent(self, event):
+        self.clicked.emit(self.event_at(event.position(), _BUTTONS.get(event.button(), 0)))
+        super().mouseReleaseEvent(event)
+
+    # ------------------------------------------------------------------
+    # Painting
+    # ------------------------------------------------------------------
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        try:
+            painter.fillRect(self.rect(), _qcolor(self.figure.get_facecolor()))
+            painter.scale(self._scale(), self._scale())
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+            for ax in self.figure.axes:
+                if ax.get_visible():
+                    self._paint_axes(painter, ax)
+        finally:
+            painter.end()
+
+    def _paint_axes(self, painter, ax):
+        rect = self._axes_rect(ax)
+        if ax.patch.get_visible():
+            painter.fillRect(rect, _qcolor(ax.get_facecolor()))
+        artists = [art for art in ax.get_children() if art.get_visible()
+                   and isinstance(art, (Line2D, LineCollection, PolyCollection, Text,
+                                        AxesImage))
+                   and art not in (ax.title, ax._left_title, ax._right_title)]
+        for art in sorted(artists, key=lambda art: art.get_zorder()):
+            painter.save()
+            if art.get_clip_on():
+                painter.setClipRect(rect)
+            if isinstance(art, Line2D):
+                self._paint_line(painter, art)
+            elif isinstance(art, LineCollection):
+                self._paint_line_collection(painter, art)
+            elif isinstance(art, PolyCollection):
+                self._paint_poly_collection(painter, art)
+            elif isinstance(art, AxesImage):
+                self._paint_image(painter, art)
+            else:
+                self._paint_text(painter, art)
+            painter.restore()
+        for spine in ax.spines.values():
+            if spine.get_visible():
+                self._paint_spine(painter, spine)
+        self._paint_ticks(painter, ax.xaxis, rect)
+        self._paint_ylabel(painter, ax, rect, self._paint_ticks(painter, ax.yaxis, rect))
+
+    def _pen(self, color, alpha, linewidth, linestyle="-"):
+        pen = QPen(_qcolor(color, alpha))
+        pen.setWidthF(self._px(linewidth))
+        if linestyle not in ("-", "solid", None):
+            pen.setStyle(Qt.PenStyle.DashLine if linestyle in ("--", "dashed")
+                         else Qt.PenStyle.DotLine)
+        return pen
+
+    def _paint_line(self, painter, line):
+        xy = line.get_xydata()
+        if len(xy) < 2:
+            return
+        painter.setPen(self._pen(line.get_color(), line.get_alpha(),
+                                 line.get_linewidth(), line.get_linestyle()))
+        painter.drawPath(polyline_path(self._to_widget(line.get_transform().transform(xy))))
+
+    def _paint_line_collection(self, painter, collection):
+        segments = collection.get_segments()
+        colors = collection.get_colors()
+        if not segments or not len(colors):
+            return
+        transform = collection.get_transform()
+        dashed = any(dashes is not None for _, dashes in collection.get_linestyle())
+        # one path per color (the panel's collections use one or a few)
+        for color in np.unique(colors, axis=0):
+            group = [self._to_widget(transform.transform(segment))
+                     for i, segment in enumerate(segments)
+                     if (colors[i % len(colors)] == color).all()]
+            painter.setPen(self._pen(color, collection.get_alpha(),
+                                     collection.get_linewidths()[0], "--" if dashed else "-"))
+            painter.drawPath(polyline_path(*group))
+
+    def _paint_poly_collection(self, painter, collection):
+        paths = collection.get_paths()
+        colors = collection.get_facecolors()
+        if not paths or not len(colors):
+            return
+        transform = collection.get_transform()
+        for color in np.unique(colors, axis=0):
+            group = [self._to_widget(transform.transform(path.vertices))
+                     for i, path in enumerate(paths)
+                     if (colors[i % len(colors)] == color).all()]
+            painter.fillPath(polyline_path(*group), _qcolor(color))
+
+    def _paint_image(self, painter, image):
+        rgba = image.to_rgba(image.get_array(), bytes=True)
+        if image.origin == "lower":
+            rgba = rgba[::-1]
+        # copy into an image owning its pixels (wrapping the numpy buffer in
+        # a QImage upsets PySide's reference counting)
+        qimage = QImage(rgba.shape[1], rgba.shape[0], QImage.Format.Format_RGBA8888)
+        pixels = np.frombuffer(qimage.bits(), dtype=np.uint8)
+        pixels.reshape(rgba.shape[0], qimage.bytesPerLine())[:, :rgba.shape[1] * 4] = \
+            rgba.reshape(rgba.shape[0], -1)
+        x0, x1, y0, y1 = image.get_extent()
+        (left, top), (right, bottom) = self._to_widget(
+            image.get_transform().transform([(x0, y1), (x1, y0)]))
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, False)
+        painter.drawImage(QRectF(left, top, right - left, bottom - top), qimage)
+
+    def _paint_text(self, painter, text, position=None, ha=None, va=None):
+        """Draw ``text`` like matplotlib's default rotation mode: the bounding
+        box of the rotated text is aligned on the anchor ``position``."""
+        content = text.get_text()
+        if not content:
+            return
+        if position is None:
+            position = self._to_widget(text.get_transform().transform(text.get_position()))[0]
+        font = self._font(text)
+        box = QFontMetricsF(font).boundingRect(QRectF(0, 0, 1e5, 1e5),
+                                                int(Qt.AlignmentFlag.AlignCenter), content)
+        angle = np.deg2rad(text.get_rotation())
+        cos, sin = abs(np.cos(angle)), abs(np.sin(angle))
+        width = box.width() * cos + box.height() * sin
+        height = box.width() * sin + box.height() * cos
+        ha = ha or text.get_horizontalalignment()
+        va = va or text.get_verticalalignment()
+        x = position[0] + {"left": width / 2, "right": -width / 2}.get(ha, 0)
+        y = position[1] + {"top": height / 2, "bottom": -height / 2,
+                           "baseline": -height / 2}.get(va, 0)
+        painter.save()
+        painter.setFont(font)
+        painter.setPen(_qcolor(text.get_color(), text.get_alpha()))
+        painter.translate(x, y)
+        painter.rotate(-text.get_rotation())
+        painter.drawText(QRectF(-box.width() / 2, -box.height() / 2, box.width(), box.height()),
+                         Qt.AlignmentFlag.AlignCenter, content)
+        painter.restore()
+
+    def _paint_spine(self, painter, spine):
+        painter.setPen(self._pen(spine.get_edgecolor(), None, spine.get_linewidth()))
+        path = spine.get_path()
+        painter.drawPath(polyline_path(self._to_widget(
+            spine.get_transform().transform(path.vertices))))
+
+    def _paint_ylabel(self, painter, ax, rect, reach):
+        label = ax.yaxis.label
+        if label.get_visible():
+            x = rect.left() - reach - self._px(ax.yaxis.labelpad)
+            self._paint_text(painter, label, (x, rect.center().y()), ha="right", va="center")
+
+    def _paint_ticks(self, painter, axis, rect):
+        """Ticks and labels of ``axis`` (x ticks at the bottom, y ticks at the left).
+
+        Returns how far the ticks and labels reach out of the axes, in
+        figure pixels.
+        """
+        reach = 0.0
+        if not axis.get_visible():
+            return reach
+        is_x = axis.axis_name == "x"
+        ax = axis.axes
+        transform = ax.get_xaxis_transform() if is_x else ax.get_yaxis_transform()
+        low, high = sorted(ax.get_xlim() if is_x else ax.get_ylim())
+        for minor in (True, False):
+            locs = np.asarray(axis.get_minorticklocs() if minor else axis.get_majorticklocs())
+            if not locs.size:
+                continue
+            ticks = axis.get_minor_ticks(locs.size) if minor else axis.get_major_ticks(locs.size)
+            # labels are formatted before dropping the ticks outside the view,
+            # fixed formatters index them by position
+            labels = [] if minor else axis.get_major_formatter().format_ticks(locs)
+            inside = (locs >= low) & (locs <= high)
+            tick_line = ticks[0].tick1line
+            length = self._px(tick_line.get_markersize())
+            painter.setPen(self._pen(tick_line.get_color(), None,
+                                     tick_line.get_markeredgewidth()))
+            points = np.zeros((locs.size, 2))
+            points[:, 0 if is_x else 1] = locs
+            positions = self._to_widget(transform.transform(points))[:, 0 if is_x else 1]
+            if is_x:
+                lines = [((pos, rect.bottom()), (pos, rect.bottom() + length))
+                         for pos in positions[inside]]
+            else:
+                lines = [((rect.left() - length, pos), (rect.left(), pos))
+                         for pos in positions[inside]]
+            painter.drawPath(polyline_path(*lines))
+            template = ticks[0].label1
+            pad = length + self._px(ticks[0].get_pad())
+            reach = max(reach, length)
+            font = QFontMetricsF(self._font(template))
+            for pos, label, keep in zip(positions, labels, inside):
+                if keep and str(label):
+                    template.set_text(str(label))
+                    if is_x:
+                        self._paint_text(painter, template, (pos, rect.bottom() + pad))
+                    else:
+                        self._paint_text(painter, template, (rect.left() - pad, pos))
+                        reach = max(reach, pad + font.horizontalAdvance(str(label)))
+        return reach
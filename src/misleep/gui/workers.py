@@ -1,14 +1,19 @@
 # -*- coding: UTF-8 -*-
 """Background worker threads for the GUI.
 
-These QThread subclasses keep file I/O off the UI thread so the interface
-stays responsive while saving large files.
+:class:`SaveThread` and :class:`LoadThread` keep file I/O off the UI
+thread: ``start()`` runs the job in the thread and emits ``succeeded`` or
+``failed``, which are delivered on the UI thread. Their ``save_*`` and
+``load_*`` methods can still be called directly to run a job
+synchronously. :class:`Task` runs analysis work (detection, spectral
+analysis, auto staging) on the global QThreadPool and reports progress,
+failures and cancellation through Qt signals the same way.
 """
 
-from PySide6.QtCore import QThread
+from PySide6.QtCore import QObject, QRunnable, QThread, QThreadPool, Signal
 
 from misleep.io.annotation import save_misleep_anno
-from misleep.io.base import write_signal
+from misleep.io.base import load_signal, write_signal
 from misleep.io.mat import load_mat
 
 
@@ -23,12 +28,33 @@ class SaveThread(QThread):
         ``MiData`` for data, or a ConfigParser for configuration.
     file_path : str, optional
         Destination path.
+    kind : {"anno", "data", "config"}, optional
+        The ``save_<kind>`` method :meth:`run` calls.
+
+    Notes
+    -----
+    The object must not change while the thread runs: save a copy of an
+    annotation that is still being edited.
     """
 
-    def __init__(self, parent=None, file=None, file_path=None):
+    #: the value returned by the save method
+    succeeded = Signal(object)
+    #: the exception raised by the save method
+    failed = Signal(object)
+
+    def __init__(self, parent=None, file=None, file_path=None, kind=None):
         super().__init__(parent)
         self.file = file
         self.file_path = file_path
+        self.kind = kind
+
+    def run(self):
+        try:
+            result = getattr(self, f"save_{self.kind}")()
+        except Exception as e:
+            self.failed.emit(e)
+        else:
+            self.succeeded.emit(result)
 
     def save_config(self):
         """Save a ConfigParser to ``self.file_path``."""
@@ -60,10 +86,125 @@ class LoadThread(QThread):
         File to load.
     """
 
+    #: the loaded :class:`MiData`
+    succeeded = Signal(object)
+    #: the exception raised by the reader
+    failed = Signal(object)
+
     def __init__(self, parent=None, file_path=None):
         super().__init__(parent)
         self.file_path = file_path
 
+    def run(self):
+        try:
+            result = self.load_data()
+        except Exception as e:
+            self.failed.emit(e)
+        else:
+            self.succeeded.emit(result)
+
+    def load_data(self):
+        """Load any registered signal format (see :func:`misleep.io.load_signal`)."""
+        return load_signal(self.file_path)
+
     def load_mat_data(self):
         """Load data from a ``.mat`` file."""
         return load_mat(data_path=self.file_path)
+
+
+class TaskCancelled(Exception):
+    """Raised by a task's ``report`` callback once the task was cancelled."""
+
+
+class TaskSignals(QObject):
+    """Signals of a :class:`Task` (a QRunnable cannot own signals)."""
+
+    #: percent (0-100) and a short description of the current step
+    progress = Signal(int, str)
+    #: the value returned by the task function
+    finished = Signal(object)
+    #: the exception raised by the task function
+    failed = Signal(object)
+    cancelled = Signal()
+
+
+class Task(QRunnable):
+    """Run ``function(report)`` on a worker thread.
+
+    Parameters
+    ----------
+    function : callable
+        Called as ``function(report)`` where ``report(percent, message="")``
+        emits :attr:`TaskSignals.progress` and raises :class:`TaskCancelled`
+        after :meth:`cancel`, so cancellation takes effect at the next
+        progress report. It must not touch widgets or figures.
+
+    Notes
+    -----
+    Exactly one of ``finished``, ``failed`` or ``cancelled`` is emitted.
+    The signals are queued to the thread owning :attr:`signals` (the UI
+    thread), so the slots connected to them may update the GUI.
+    """
+
+    def __init__(self, function):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.function = function
+        self.signals = TaskSignals()
+        self._cancelled = False
+
+    @property
+    def is_cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """Ask the task to stop at its next progress report."""
+        self._cancelled = True
+
+    def report(self, percent, message=""):
+        if self._cancelled:
+            raise TaskCancelled()
+        self.signals.progress.emit(int(percent), str(message))
+
+    def run(self):
+        try:
+            self.report(0)
+            result = self.function(self.report)
+            if self._cancelled:
+                raise TaskCancelled()
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+def run_task(function, on_result=None, on_error=None, on_progress=None,
+             on_cancel=None, pool=None):
+    """Start ``function(report)`` as a :class:`Task` and connect its callbacks.
+
+    Parameters
+    ----------
+    function : callable
+        See :class:`Task`.
+    on_result, on_error, on_progress, on_cancel : callable, optional
+        Slots for the ``finished(result)``, ``failed(exception)``,
+        ``progress(percent, message)`` and ``cancelled()`` signals.
+    pool : QThreadPool, optional
+        Default is ``QThreadPool.globalInstance()``.
+
+    Returns
+    -------
+    Task
+        Keep a reference to it until one of its final signals arrives.
+    """
+    task = Task(function)
+    for signal, slot in ((task.signals.finished, on_result),
+                         (task.signals.failed, on_error),
+                         (task.signals.progress, on_progress),
+                         (task.signals.cancelled, on_cancel)):
+        if slot is not None:
+            signal.connect(slot)
+    (pool or QThreadPool.globalInstance()).start(task)
+    return task
@@ -6,6 +6,7 @@ Public API:
 * :func:`misleep.io.mat.load_mat` / :func:`misleep.io.mat.write_mat`
 * :func:`misleep.io.edf.load_edf` / :func:`misleep.io.edf.write_edf`
 * :func:`misleep.io.annotation.load_misleep_anno` / ``save_misleep_anno``
+* :class:`misleep.io.annotation.AnnotationJournal` -- auto-save edit journal
 * :func:`misleep.io.annotation.transfer_result`
 * :func:`misleep.io.base.load_signal` / ``write_signal`` -- extension dispatch
 """
@@ -24,6 +25,7 @@ from .mat import load_mat, write_mat
 from .edf import load_edf, write_edf
 from .array import load_npy, load_npz, load_csv, load_tsv, write_npz
 from .annotation import (
+    AnnotationJournal,
     available_annotation_readers,
     load_annotation,
     load_bio_anno,
@@ -53,6 +55,7 @@ __all__ = [
     "write_npz",
     "load_misleep_anno",
     "save_misleep_anno",
+    "AnnotationJournal",
     "load_bio_anno",
     "transfer_result",
     "load_annotation",
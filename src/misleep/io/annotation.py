@@ -10,6 +10,9 @@ with three sections:
 
 A bio-signal annotation format (first two lines are a header, then
 tab-separated state rows) is also supported through :func:`load_bio_anno`.
+
+Edits made between two full saves can be appended to an
+:class:`AnnotationJournal` next to the file instead of rewriting it.
 """
 
 import datetime
@@ -21,15 +24,17 @@ from misleep.data import MiAnnotation
 from misleep.io.base import MiData  # noqa: F401 (kept for API symmetry)
 from misleep.logger import logger
 from misleep.utils.annotation import (
-    lst2group,
+    bin_state_stats,
     marker2mianno,
+    runs_from_states,
     sleep_state2mianno,
+    split_runs,
     start_end2mianno,
 )
-from misleep.utils.time_utils import transfer_time
+from misleep.utils.time_utils import TimeFormatter, transfer_time
 
 
-def load_misleep_anno(file_path, state_map=None):
+def load_misleep_anno(file_path, state_map=None, journal=True):
     """Load annotations from a MiSleep annotation file.
 
     Parameters
@@ -38,6 +43,9 @@ def load_misleep_anno(file_path, state_map=None):
         Path of the annotation file.
     state_map : dict, optional
         Custom state code -> name mapping.
+    journal : bool
+        Replay the edits of an :class:`AnnotationJournal` left next to the
+        file by auto-saves since the last full save. Defaults to True.
 
     Returns
     -------
@@ -45,27 +53,56 @@ def load_misleep_anno(file_path, state_map=None):
         The parsed annotation.
     """
     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        annotation = f.read().split("\n")
+        annotation = f.read()
 
-    if annotation == [""]:
+    if annotation == "":
         raise AssertionError("Empty")
 
     try:
-        marker_idx = annotation.index("==========Marker==========")
-        start_end_idx = annotation.index("==========Start-End==========")
+        marker_idx = _section_offset(annotation, "==========Marker==========")
+        start_end_idx = _section_offset(annotation, "==========Start-End==========")
         try:
-            sleep_state_idx = annotation.index("==========Sleep state==========")
+            sleep_state_idx = _section_offset(annotation, "==========Sleep state==========")
         except ValueError:
-            sleep_state_idx = annotation.index("==========Sleep stage==========")
+            sleep_state_idx = _section_offset(annotation, "==========Sleep stage==========")
     except Exception:
         raise AssertionError("Invalid")
 
-    marker = marker2mianno(annotation[marker_idx + 1: start_end_idx])
-    start_end = start_end2mianno(annotation[start_end_idx + 1: sleep_state_idx])
-    sleep_state = sleep_state2mianno(annotation[sleep_state_idx + 1:])
+    marker = marker2mianno(_section_lines(annotation, marker_idx, start_end_idx))
+    start_end = start_end2mianno(_section_lines(annotation, start_end_idx, sleep_state_idx))
+    # the state rows are decoded straight from the text into run arrays
+    sleep_state = sleep_state2mianno(annotation[sleep_state_idx[1]:])
+
+    mianno = MiAnnotation(sleep_state=sleep_state, start_end=start_end,
+                          marker=marker, state_map=state_map)
+    if journal:
+        applied = AnnotationJournal(file_path).replay(mianno)
+        if applied:
+            logger.info("Replayed %d journaled edit(s) onto %s", applied, file_path)
+    return mianno
+
+
+def _section_offset(text, header):
+    """Return ``(header_start, body_start)`` of the line equal to ``header``.
+
+    Raises
+    ------
+    ValueError
+        If no line of ``text`` equals ``header``.
+    """
+    pos = text.find(header)
+    while pos != -1:
+        end = pos + len(header)
+        if (pos == 0 or text[pos - 1] == "\n") and (end == len(text) or text[end] == "\n"):
+            return pos, min(end + 1, len(text))
+        pos = text.find(header, end)
+    raise ValueError(f"Section {header!r} not found")
+
 
-    return MiAnnotation(sleep_state=sleep_state, start_end=start_end,
-                        marker=marker, state_map=state_map)
+def _section_lines(text, section, next_section):
+    """Lines between the header of ``section`` and that of ``next_section``."""
+    body = text[section[1]: next_section[0]].rstrip("\n")
+    return body.split("\n") if body else []
 
 
 def load_bio_anno(file_path):
@@ -280,28 +317,22 @@ def save_misleep_anno(mianno, midata, file_path):
     bool
         True on success.
     """
-    from misleep.utils.time_utils import second2time
-
     ac_time = datetime.datetime.strptime(midata.time, "%Y%m%d-%H:%M:%S")
+    fmt = TimeFormatter(ac_time)
+
+    def _event_row(start, end, label):
+        start, end = round(start, 3), round(end, 3)
+        return (f"{fmt(start, ms=True)}, {start}, 1, "
+                f"{fmt(end, ms=True)}, {end}, 0, 1, {label}")
 
-    marker = [", ".join([
-        second2time(round(each[0], 3), ac_time=ac_time, ms=True), str(round(each[0], 3)), "1",
-        second2time(round(each[0], 3), ac_time=ac_time, ms=True), str(round(each[0], 3)), "0",
-        "1", each[1]
-    ]) for each in mianno.marker]
-
-    start_end_label = [", ".join([
-        second2time(round(each[0], 3), ac_time=ac_time, ms=True), str(round(each[0], 3)), "1",
-        second2time(round(each[1], 3), ac_time=ac_time, ms=True), str(round(each[1], 3)), "0",
-        "1", each[2]
-    ]) for each in mianno.start_end]
-
-    sleep_state = lst2group([[idx, each] for idx, each in enumerate(mianno.sleep_state)])
-    sleep_state = [", ".join([
-        second2time(each[0], ac_time=ac_time), str(each[0]), "1",
-        second2time(each[1], ac_time=ac_time), str(each[1]),
-        "0", str(each[2]), mianno.state_map[each[2]]
-    ]) for each in sleep_state]
+    marker = [_event_row(each[0], each[0], each[1]) for each in mianno.marker]
+    start_end_label = [_event_row(each[0], each[1], each[2]) for each in mianno.start_end]
+
+    state_map = mianno.state_map
+    starts, ends, codes = runs_from_states(mianno.sleep_state)
+    sleep_state = [
+        f"{fmt(start)}, {start}, 1, {fmt(end)}, {end}, 0, {code}, {state_map[code]}"
+        for start, end, code in zip(starts.tolist(), ends.tolist(), codes.tolist())]
 
     if len(marker) > 0:
         marker = [""] + marker
@@ -317,17 +348,155 @@ def save_misleep_anno(mianno, midata, file_path):
         "==========Sleep stage==========", "\n".join(sleep_state)
     ]
 
+    # the whole file is assembled in memory and written in one call
     with open(file_path, "w", encoding="utf-8") as f:
         f.write("\n".join(annos))
     return True
 
 
-def transfer_result(mianno, ac_time):
+class AnnotationJournal:
+    """Append-only edit journal kept next to a MiSleep annotation file.
+
+    Between two full saves, edits are recorded as JSON lines in
+    ``<file_path>.journal`` so that periodic auto-saves only append what
+    changed since the last flush, independent of the annotation size.
+    :func:`load_misleep_anno` replays an existing journal on top of the
+    file; a full :func:`save_misleep_anno` followed by :meth:`reset`
+    compacts it away.
+
+    Parameters
+    ----------
+    file_path : str
+        Path of the annotation file the journal belongs to.
+    """
+
+    SUFFIX = ".journal"
+
+    def __init__(self, file_path):
+        self.path = Path(str(file_path) + self.SUFFIX)
+        self._pending = []
+
+    @property
+    def pending(self):
+        """Number of recorded edits not yet flushed to disk."""
+        return len(self._pending)
+
+    def exists(self):
+        """Whether a journal file with flushed edits exists on disk."""
+        return self.path.exists()
+
+    def record_state(self, start, end, code):
+        """Record ``sleep_state[start:end] = code``."""
+        self._pending.append(["state", int(start), int(end), int(code)])
+
+    def record_marker(self, event, removed=False):
+        """Record an added (or removed) ``[time, label]`` marker."""
+        self._pending.append(["marker-" if removed else "marker+",
+                              float(event[0]), str(event[1])])
+
+    def record_start_end(self, event, removed=False):
+        """Record an added (or removed) ``[start, end, label]`` event."""
+        self._pending.append(["start_end-" if removed else "start_end+",
+                              float(event[0]), float(event[1]), str(event[2])])
+
+    def flush(self):
+        """Append the pending edits to the journal file.
+
+        Returns
+        -------
+        int
+            Number of edits written.
+        """
+        if not self._pending:
+            return 0
+        lines = "".join(json.dumps(each) + "\n" for each in self._pending)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        written = len(self._pending)
+        self._pending = []
+        return written
+
+    def reset(self, keep=0):
+        """Forget pending edits and delete the journal file (after a full save).
+
+        Parameters
+        ----------
+        keep : int
+            Number of most recent pending edits to keep: those made after
+            the snapshot the full save wrote. Default is 0.
+        """
+        self._pending = self._pending[len(self._pending) - keep:] if keep > 0 else []
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def replay(self, mianno):
+        """Apply the journal file to ``mianno`` in place.
+
+        A truncated last line (e.g. after a crash during a flush) is
+        ignored. Removed events are matched on label and time (to the
+        millisecond precision of the annotation file).
+
+        Returns
+        -------
+        int
+            Number of edits applied.
+        """
+        if not self.exists():
+            return 0
+        applied = 0
+        with open(self.path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping unreadable journal entry in %s", self.path)
+                    continue
+                kind, args = entry[0], entry[1:]
+                if kind == "state":
+                    start, end, code = args
+                    end = min(end, len(mianno.sleep_state))
+                    mianno.sleep_state[start:end] = [code] * (end - start)
+                elif kind == "marker+":
+                    mianno.marker.append(args)
+                elif kind == "start_end+":
+                    mianno.start_end.append(args)
+                elif kind in ("marker-", "start_end-"):
+                    events = mianno.marker if kind == "marker-" else mianno.start_end
+                    for each in events.events_in(args[0] - 1e-3, args[-2] + 1e-3):
+                        if each[-1] == args[-1] and all(
+                                abs(a - b) <= 1e-3 for a, b in zip(each[:-1], args[:-1])):
+                            events.remove(each)
+                            break
+                else:
+                    continue
+                applied += 1
+        return applied
+
+
+_BIN_SIZES = {"hour": 3600, "zt_block": 12 * 3600}
+
+
+def _datetime_strings(ac_time, seconds):
+    """Vectorized ``transfer_time(ac_time, s, '%Y-%m-%d %H:%M:%S')`` for whole seconds."""
+    import numpy as np
+
+    stamps = np.datetime64(ac_time, "us") + np.asarray(seconds, dtype=np.int64) * np.timedelta64(1, "s")
+    return [each.replace("T", " ") for each in np.datetime_as_string(stamps, unit="s").tolist()]
+
+
+def transfer_result(mianno, ac_time, bin_size="hour"):
     """Convert a :class:`MiAnnotation` into analysis dataframes.
 
-    Produces per-hour sleep statistics (duration, bout count, average bout
-    length, percentage for every state), plus a 12h light/dark phase
-    summary. Also returns the raw marker/start-end dataframes.
+    Produces per-bin (hourly by default) sleep statistics (duration, bout
+    count, average bout length, percentage for every state), plus a 12h
+    light/dark phase summary. Also returns the raw marker/start-end
+    dataframes.
+
+    The statistics are computed on state run arrays: the runs are cut at
+    the bin boundaries and summed with ``np.bincount``, so the cost no
+    longer depends on per-bout Python work.
 
     Parameters
     ----------
@@ -335,13 +504,23 @@ def transfer_result(mianno, ac_time):
         Annotation to transfer.
     ac_time : datetime.datetime
         Acquisition time of the recording.
+    bin_size : str or int
+        ``'hour'`` (default), ``'zt_block'`` (12 h) or a custom bin width
+        in whole seconds. The ``hour`` column of ``df`` holds the bin index
+        and percentages are relative to the bin width.
 
     Returns
     -------
     (df, analyse_df, start_end_df, marker_df) : tuple of pandas.DataFrame
     """
+    import numpy as np
     import pandas as pd
 
+    bin_sec = _BIN_SIZES.get(bin_size, bin_size)
+    if isinstance(bin_sec, str):
+        raise ValueError(f"Unknown 'bin_size' {bin_size!r}, use one of {list(_BIN_SIZES)} "
+                         f"or a number of seconds")
+
     marker = [[
         transfer_time(ac_time, each[0], "%Y-%m-%d %H:%M:%S", ms=True),
         each[0], each[1]] for each in mianno.marker]
@@ -352,54 +531,53 @@ def transfer_result(mianno, ac_time):
         each[2], each[1] - each[0]
     ] for each in mianno.start_end]
 
-    # Split the sleep state into per-hour groups
-    sleep_state = []
-    for each in range(int(len(mianno.sleep_state) / 3600) + 1):
-        temp_hour_label = mianno.sleep_state[each * 3600: (each + 1) * 3600]
-        if temp_hour_label != []:
-            sleep_state.append(temp_hour_label)
-
-    marker_sleep_state = []
-    for hour, label in enumerate(sleep_state):
-        hour_sleep_state = lst2group(
-            [idx + hour * 3600, each] for idx, each in enumerate(label))
-        marker_sleep_state += [[
-            transfer_time(ac_time, each[0], "%Y-%m-%d %H:%M:%S"), each[0], 1,
-            transfer_time(ac_time, each[1], "%Y-%m-%d %H:%M:%S"), each[1], 0,
-            each[2], mianno.state_map[each[2]], each[1] - each[0], hour
-        ] for each in hour_sleep_state]
-
-        marker_sleep_state += [[
-            transfer_time(ac_time, (hour + 1) * 3600, "%Y-%m-%d %H:%M:%S"), (hour + 1) * 3600, 1,
-            transfer_time(ac_time, (hour + 1) * 3600, "%Y-%m-%d %H:%M:%S"), (hour + 1) * 3600, 0,
-            5, "MARKER", "", ""]]
-
-    columns = ["start_time", "start_time_sec", "start_code",
-               "end_time", "end_time_sec", "end_code",
-               "state_code", "state", "bout_duration", "hour"]
-
-    df = pd.DataFrame(data=marker_sleep_state, columns=columns)
-
-    df["hour"] = df.apply(
-        lambda x: "" if x["state"] == "MARKER" else int(x["start_time_sec"] / 3600), axis=1)
-    analyse_df = pd.DataFrame()
+    # State runs cut at every bin boundary; one MARKER row closes each bin
+    starts, ends, codes, bins = split_runs(*runs_from_states(mianno.sleep_state), bin_sec=bin_sec)
+    n_bins = -(-len(mianno.sleep_state) // int(bin_sec))
+    n_rows = starts.size + n_bins
+    bin_ids = np.arange(n_bins)
+    marker_pos = np.searchsorted(bins, bin_ids, side="right") + bin_ids
+    run_pos = np.arange(starts.size) + bins
+    boundary = (bin_ids + 1) * int(bin_sec)
+
+    def _column(run_values, marker_values, dtype=None):
+        column = np.empty(n_rows, dtype=dtype if dtype is not None else object)
+        column[run_pos] = run_values
+        column[marker_pos] = marker_values
+        return column
+
+    state_codes, code_idx = np.unique(codes, return_inverse=True)
+    state_names = np.array([mianno.state_map[each] for each in state_codes.tolist()], dtype=object)
+    start_sec = _column(starts, boundary, np.int64)
+    end_sec = _column(ends, boundary, np.int64)
+    time_strings = _datetime_strings(ac_time, np.concatenate((start_sec, end_sec)))
+    df = pd.DataFrame({
+        "start_time": time_strings[:n_rows],
+        "start_time_sec": start_sec,
+        "start_code": np.ones(n_rows, dtype=np.int64),
+        "end_time": time_strings[n_rows:],
+        "end_time_sec": end_sec,
+        "end_code": np.zeros(n_rows, dtype=np.int64),
+        "state_code": _column(codes, 5, np.int64),
+        "state": _column(state_names[code_idx.ravel()], "MARKER"),
+        "bout_duration": _column((ends - starts).tolist(), ""),
+        "hour": _column(bins.tolist(), ""),
+    })
 
-    temp_hour = list(set(list(df["hour"])))
-    temp_hour.remove("")
-    temp_hour = sorted(temp_hour)
-    analyse_df["date_time"] = [transfer_time(ac_time, each * 3600, "%Y-%m-%d %H:%M:%S")
-                               for each in temp_hour]
-
-    features = []
-    for each in temp_hour:
-        df_ = df[df["hour"] == each]
-        temp_lst = []
-        for phase in ["NREM", "REM", "Wake", "INIT"]:
-            _duration = df_[df_["state"] == phase]["bout_duration"].sum()
-            _bout = df_[df_["state"] == phase]["bout_duration"].count()
-            temp_lst += [_duration, _bout, round(_duration / _bout, 2) if _bout != 0 else 0,
-                         round(_duration / 3600, 4) * 100]
-        features.append(temp_lst)
+    analyse_df = pd.DataFrame()
+    analyse_df["date_time"] = _datetime_strings(ac_time, bin_ids * int(bin_sec))
+
+    _, duration, bouts = bin_state_stats(bins, code_idx.ravel(), ends - starts, n_bins)
+    features = [[] for _ in range(n_bins)]
+    for phase in ["NREM", "REM", "Wake", "INIT"]:
+        match = state_names == phase
+        phase_duration = duration[:, match].sum(axis=1)
+        phase_bouts = bouts[:, match].sum(axis=1)
+        for each in range(n_bins):
+            _duration = int(phase_duration[each])
+            _bout = phase_bouts[each]
+            features[each] += [_duration, _bout, round(_duration / _bout, 2) if _bout != 0 else 0,
+                               round(_duration / bin_sec, 4) * 100]
 
     analyse_df[["NREM_duration", "NREM_bout", "NREM_ave", "NREM_percentage",
                 "REM_duration", "REM_bout", "REM_ave", "REM_percentage",
@@ -411,22 +589,22 @@ def transfer_result(mianno, ac_time):
         ["NREM_duration", "NREM_bout", "REM_duration", "REM_bout", "WAKE_duration",
          "WAKE_bout", "INIT_duration", "INIT_bout"]].astype(int)
 
-    # 12-h light/dark phase summary (first hour treated as ZT0 by default)
+    # 12-h light/dark phase summary (first bin treated as ZT0 by default)
     try:
+        block = bin_ids * int(bin_sec) // (12 * 3600)
+        blocks = [block == 0, block == 1]
         phase_data = pd.DataFrame()
         phase_data["date_time"] = ["ZT0-ZT12", "ZT12-ZT24"]
         for phase in ["NREM", "REM", "WAKE", "INIT"]:
             duration_key = f"{phase}_duration"
             bout_key = f"{phase}_bout"
-            ave_key = f"{phase}_ave"
-            pct_key = f"{phase}_percentage"
-            phase_data[duration_key] = [analyse_df[duration_key].iloc[:12].sum(),
-                                        analyse_df[duration_key].iloc[12:24].sum()]
-            phase_data[bout_key] = [analyse_df[bout_key].iloc[:12].sum(),
-                                    analyse_df[bout_key].iloc[12:24].sum()]
-            phase_data[ave_key] = phase_data.apply(
-                lambda x: x[duration_key] / x[bout_key] if x[bout_key] != 0 else 0, axis=1)
-            phase_data[pct_key] = phase_data.apply(lambda x: x[duration_key] / (3600 * 12), axis=1)
+            phase_duration = [analyse_df[duration_key].to_numpy()[each].sum() for each in blocks]
+            phase_bouts = [analyse_df[bout_key].to_numpy()[each].sum() for each in blocks]
+            phase_data[duration_key] = phase_duration
+            phase_data[bout_key] = phase_bouts
+            phase_data[f"{phase}_ave"] = [d / b if b != 0 else 0
+                                          for d, b in zip(phase_duration, phase_bouts)]
+            phase_data[f"{phase}_percentage"] = [d / (3600 * 12) for d in phase_duration]
 
         analyse_df = pd.concat([analyse_df, phase_data])
         analyse_df.reset_index(inplace=True)
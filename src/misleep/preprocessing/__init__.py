@@ -4,20 +4,32 @@
 * :mod:`misleep.preprocessing.filtering` -- filtering (Butterworth, mains noise)
 * :mod:`misleep.preprocessing.artifacts` -- artifact rejection
 * :mod:`misleep.preprocessing.spectral`  -- spectrum / spectrogram / band power
+* :mod:`misleep.preprocessing.epoch_spectra` -- per-epoch spectra and spectrogram tiles
 """
 
-from .filtering import signal_filter, filter_power_line_noise
+from .filtering import (signal_filter, filter_power_line_noise, design_sos, notch_sos, apply_sos,
+                        sosfiltfilt_chunked, fftfiltfilt)
 from .artifacts import z_score, reject_artifact
-from .spectral import spectrum, spectrogram, band_power
+from .spectral import spectrum, spectrogram, band_power, spectral_kernel, epoch_multitaper
+from .epoch_spectra import EpochSpectra, SpectrogramTiles
 from .segment import crop_state_data
 
 __all__ = [
     "signal_filter",
     "filter_power_line_noise",
+    "design_sos",
+    "notch_sos",
+    "apply_sos",
+    "sosfiltfilt_chunked",
+    "fftfiltfilt",
     "z_score",
     "reject_artifact",
     "spectrum",
     "spectrogram",
     "band_power",
+    "spectral_kernel",
+    "epoch_multitaper",
+    "EpochSpectra",
+    "SpectrogramTiles",
     "crop_state_data",
 ]
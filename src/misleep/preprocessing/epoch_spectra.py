@@ -0,0 +1,411 @@
+# -*- coding: UTF-8 -*-
+"""Per-epoch power spectra of a channel, computed once per recording.
+
+:class:`EpochSpectra` holds the power spectrum of every window of one
+channel (by default 5 s windows every second, float32), as computed by
+:func:`misleep.preprocessing.spectral.epoch_psd` (Welch periodogram) or
+:func:`~misleep.preprocessing.spectral.epoch_multitaper` (DPSS multitaper,
+``method='multitaper'``). The spectrogram strip of
+the GUI and the state spectral analysis read their spectra from it, and
+:meth:`EpochSpectra.band_power` gives per-epoch band power series.
+
+Spectra can be persisted in a sidecar folder next to the recording
+(:func:`sidecar_dir`), one ``.npz`` file per spectra named after a hash of
+the samples and the spectral parameters (:meth:`EpochSpectra.cached`), so
+reopening a recording loads them instead of recomputing them.
+
+:class:`SpectrogramTiles` serves the spectrogram strip of the GUI: the
+same spectra, normalized per column, computed in fixed time tiles only
+where a window is shown and kept in a memory-capped LRU, so any window of
+a recording of any length is available after computing a tile or two.
+
+The sidecar folder thus holds two kinds of files with the same format:
+whole-signal spectra (``MiData.epoch_spectra``, the state spectral
+analysis; one file per channel, filter and time range) and the tiles of
+the spectrogram strip (one file per tile, keyed on the tile's samples).
+They differ in window length and band, so they are not shared.
+"""
+
+import hashlib
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+from scipy.integrate import simpson
+
+from misleep.logger import logger
+from misleep.preprocessing.spectral import epoch_multitaper, epoch_psd, epoch_states
+
+_METHODS = ("welch", "multitaper")
+
+
+def sidecar_dir(data_path):
+    """Folder holding the persisted spectra of a recording (``<data>.spectra``)."""
+    return Path(f"{data_path}.spectra")
+
+
+class EpochSpectra:
+    """Power spectra of every epoch window of one channel.
+
+    Usually built with :meth:`compute` or :meth:`cached`.
+
+    Parameters
+    ----------
+    freq : ndarray
+        Frequencies in Hz.
+    times : ndarray
+        Window starts in seconds.
+    psd : ndarray
+        ``(n_epochs, n_freq)`` power spectral density (stored read-only).
+    win_sec : float
+        Window length in seconds.
+    """
+
+    def __init__(self, freq, times, psd, win_sec):
+        self._freq = np.asarray(freq)
+        self._times = np.asarray(times)
+        self._psd = np.asarray(psd)
+        self._psd.flags.writeable = False
+        self._win_sec = float(win_sec)
+
+    # ------------------------------------------------------------------
+    # Construction / persistence
+    # ------------------------------------------------------------------
+    @classmethod
+    def compute(cls, signal, sf, win_sec=5, step_sec=1, band=None, nfft=None,
+                dtype=np.float32, method="welch", nw=3):
+        """Compute the spectra of ``signal``.
+
+        ``method`` is ``'welch'`` (:func:`epoch_psd`) or ``'multitaper'``
+        (:func:`epoch_multitaper` with time-bandwidth product ``nw``); see
+        those functions for the other parameters.
+        """
+        if method not in _METHODS:
+            raise ValueError(f"'method' should be one of {_METHODS}, got {method!r}")
+        if method == "multitaper":
+            freq, times, psd = epoch_multitaper(signal, sf, win_sec=win_sec, step_sec=step_sec,
+                                                nw=nw, nfft=nfft, band=band, dtype=dtype)
+        else:
+            freq, times, psd = epoch_psd(signal, sf, win_sec=win_sec, step_sec=step_sec,
+                                         nfft=nfft, band=band, dtype=dtype)
+        return cls(freq, times, psd, win_sec)
+
+    @staticmethod
+    def cache_key(signal, sf, **params):
+        """Hash of the samples, the sampling rate and the spectral parameters."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(signal).view(np.uint8))
+        digest.update(repr((str(signal.dtype), float(sf), sorted(params.items()))).encode())
+        return digest.hexdigest()
+
+    @classmethod
+    def cached(cls, signal, sf, cache_dir, **params):
+        """Load the spectra of ``signal`` from ``cache_dir``, or compute and save them.
+
+        Parameters
+        ----------
+        signal : ndarray
+            1-D signal.
+        sf : float
+            Sampling frequency.
+        cache_dir : str or Path
+            Folder of the persisted spectra, e.g. :func:`sidecar_dir`.
+        **params
+            Keyword arguments of :meth:`compute`; part of the file key.
+
+        Returns
+        -------
+        EpochSpectra
+        """
+        path = Path(cache_dir) / f"{cls.cache_key(signal, sf, **params)}.npz"
+        if path.exists():
+            try:
+                return cls.load(path)
+            except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+                logger.warning(f"Could not read cached spectra {path}, recomputing: {e}")
+        spectra = cls.compute(signal, sf, **params)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            spectra.save(path)
+        except OSError as e:
+            logger.warning(f"Could not save spectra to {path}: {e}")
+        return spectra
+
+    def save(self, path):
+        """Write the spectra to an ``.npz`` file.
+
+        The file is written next to ``path`` and then renamed over it, so
+        readers never see a partly written file.
+        """
+        path = Path(path)
+        temp = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        try:
+            with open(temp, "wb") as f:
+                np.savez(f, freq=self._freq, times=self._times, psd=self._psd,
+                         win_sec=self._win_sec)
+            os.replace(temp, path)
+        finally:
+            temp.unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, path):
+        """Read spectra written by :meth:`save`."""
+        with np.load(path) as data:
+            return cls(data["freq"], data["times"], data["psd"], float(data["win_sec"]))
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+    @property
+    def freq(self):
+        """Frequencies in Hz."""
+        return self._freq
+
+    @property
+    def times(self):
+        """Window starts in seconds."""
+        return self._times
+
+    @property
+    def centers(self):
+        """Window centers in seconds."""
+        return self._times + self._win_sec / 2
+
+    @property
+    def psd(self):
+        """``(n_epochs, n_freq)`` power spectral density (read-only)."""
+        return self._psd
+
+    @property
+    def win_sec(self):
+        """Window length in seconds."""
+        return self._win_sec
+
+    @property
+    def n_epochs(self):
+        """Number of windows."""
+        return self._psd.shape[0]
+
+    @property
+    def nbytes(self):
+        """Memory held by the arrays, in bytes."""
+        return self._freq.nbytes + self._times.nbytes + self._psd.nbytes
+
+    def slice(self, start, end):
+        """Spectra of the windows centered within ``[start, end]`` seconds (views)."""
+        centers = self.centers
+        lo = int(np.searchsorted(centers, start, side="left"))
+        hi = int(np.searchsorted(centers, end, side="right"))
+        return EpochSpectra(self._freq, self._times[lo:hi], self._psd[lo:hi], self._win_sec)
+
+    def states(self, sleep_state):
+        """State of every window (``-1`` across state changes), see :func:`epoch_states`."""
+        return epoch_states(self._times, self._win_sec, sleep_state)
+
+    def mean(self, mask=None):
+        """Mean spectrum of the windows selected by ``mask`` (all by default)."""
+        psd = self._psd if mask is None else self._psd[mask]
+        return psd.mean(axis=0, dtype=np.float64)
+
+    def band_power(self, bands, relative=False):
+        """Band power of every window.
+
+        Parameters
+        ----------
+        bands : list
+            Frequency bands, e.g. ``[[0.5, 4, 'delta'], [4, 9, 'theta']]``.
+        relative : bool
+            Whether to divide by the total power of each window.
+
+        Returns
+        -------
+        dict
+            Band name -> ``(n_epochs,)`` array.
+        """
+        dx = self._freq[1] - self._freq[0]
+        total = simpson(self._psd, dx=dx, axis=1) if relative else None
+        powers = {}
+        for low, high, name in bands:
+            idx = np.flatnonzero((self._freq >= low) & (self._freq <= high))
+            power = simpson(self._psd[:, idx], dx=dx, axis=1)
+            if relative:
+                power = np.divide(power, total, out=np.zeros_like(power), where=total > 0)
+            powers[name] = power
+        return powers
+
+    def __repr__(self):
+        return (f"EpochSpectra({self.n_epochs} windows of {self._win_sec:g}s, "
+                f"{self._freq.size} freqs)")
+
+
+#: Default memory cap of a :class:`SpectrogramTiles` (128 MiB).
+DEFAULT_TILE_BYTES = 128 * 2 ** 20
+
+
+class SpectrogramTiles:
+    """Per-column normalized spectrogram of a channel, computed tile by tile.
+
+    Column ``k`` is the spectrum of the window starting at ``k * step_sec``
+    (as in :meth:`EpochSpectra.compute`) divided by its total power, stored
+    as float32. Columns are computed in tiles of ``tile_sec`` seconds of
+    window starts, when a window needs them; tiles are evicted least
+    recently used first past ``max_bytes``.
+
+    Parameters
+    ----------
+    signal : ndarray
+        1-D signal (not copied; it must not change afterwards).
+    sf : float
+        Sampling frequency.
+    tile_sec : float
+        Window starts per tile, in seconds (rounded to whole windows).
+        Default is 300.
+    max_bytes : int
+        Memory cap of the tiles. Defaults to :data:`DEFAULT_TILE_BYTES`.
+    cache_dir : str or Path, optional
+        Folder where the spectra of every tile are persisted, see
+        :meth:`EpochSpectra.cached` (keyed by a hash of the tile's samples).
+    **params
+        ``win_sec``, ``step_sec``, ``band``, ``nfft``, ``method`` and ``nw``
+        of :meth:`EpochSpectra.compute` (``win_sec=5, step_sec=1`` by
+        default).
+
+    Notes
+    -----
+    Tiles give the same columns as normalizing the whole-channel
+    :class:`EpochSpectra`. The object may be shared between threads (the
+    GUI prepares adjacent pages in a worker): different tiles are computed
+    concurrently, a tile already being computed is waited for.
+    """
+
+    def __init__(self, signal, sf, tile_sec=300, max_bytes=DEFAULT_TILE_BYTES,
+                 cache_dir=None, **params):
+        if not isinstance(signal, np.ndarray) or signal.ndim != 1:
+            raise TypeError("'signal' should be a 1-D numpy array")
+        params = {"win_sec": 5.0, "step_sec": 1.0, **params, "dtype": np.float32}
+        self._signal = signal
+        self._sf = float(sf)
+        self._params = params
+        self._cache_dir = cache_dir
+        self._nperseg = int(params["win_sec"] * sf)
+        self._step = int(round(params["step_sec"] * sf))
+        if self._nperseg <= 0 or self._step <= 0:
+            raise ValueError(f"'win_sec' ({params['win_sec']}) and 'step_sec' "
+                             f"({params['step_sec']}) should be at least one sample long")
+        self._tile_windows = max(int(round(tile_sec / params["step_sec"])), 1)
+        self.max_bytes = max_bytes
+        self.n_windows = max((signal.size - self._nperseg) // self._step + 1, 0)
+        self._tiles = OrderedDict()
+        self._pending = {}  # tile index -> Future of the thread computing it
+        self._nbytes = 0
+        self._freq = None
+        self._lock = threading.Lock()
+
+    @property
+    def freq(self):
+        """Frequencies in Hz."""
+        if self._freq is None:
+            self._tile(0)
+        return self._freq
+
+    @property
+    def n_tiles(self):
+        """Number of tiles covering the channel."""
+        return -(-self.n_windows // self._tile_windows)
+
+    @property
+    def nbytes(self):
+        """Memory held by the computed tiles, in bytes."""
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def _compute(self, index):
+        first = index * self._tile_windows
+        count = min(self._tile_windows, self.n_windows - first)
+        start = first * self._step
+        segment = self._signal[start:start + (count - 1) * self._step + self._nperseg]
+        if self._cache_dir is None:
+            spectra = EpochSpectra.compute(segment, self._sf, **self._params)
+        else:
+            spectra = EpochSpectra.cached(segment, self._sf, self._cache_dir, **self._params)
+        psd = spectra.psd.T
+        total = psd.sum(axis=0, dtype=np.float64)
+        columns = np.divide(psd, total, out=np.zeros(psd.shape, dtype=np.float32),
+                            where=total != 0)
+        columns.flags.writeable = False
+        return spectra.freq, columns
+
+    def _tile(self, index):
+        with self._lock:
+            columns = self._tiles.get(index)
+            if columns is not None:
+                self._tiles.move_to_end(index)
+                return columns
+            pending = self._pending.get(index)
+            if pending is None:
+                self._pending[index] = computing = Future()
+        if pending is not None:
+            return pending.result()
+        try:
+            freq, columns = self._compute(index)  # outside the lock: other tiles overlap
+        except Exception as e:
+            with self._lock:
+                del self._pending[index]
+            computing.set_exception(e)
+            raise
+        with self._lock:
+            del self._pending[index]
+            self._freq = freq
+            self._tiles[index] = columns
+            self._nbytes += columns.nbytes
+            while len(self._tiles) > 1 and self._nbytes > self.max_bytes:
+                _, old = self._tiles.popitem(last=False)
+                self._nbytes -= old.nbytes
+        computing.set_result(columns)
+        return columns
+
+    def window(self, start, end):
+        """Columns of the windows centered within ``[start, end]`` seconds.
+
+        Returns
+        -------
+        centers : ndarray
+            Window centers in seconds.
+        freq : ndarray
+            Frequencies in Hz.
+        columns : ndarray
+            ``(n_freq, n_windows)`` power relative to the whole band of
+            every window (float32).
+        """
+        half = self._params["win_sec"] / 2
+        # candidates around the window, then the exact bounds of slice()
+        lo = max(int((start - half) * self._sf / self._step) - 1, 0)
+        hi = min(max(int((end - half) * self._sf / self._step) + 2, 0), self.n_windows)
+        centers = np.arange(lo, max(hi, lo)) * self._step / self._sf + half
+        first = lo + int(np.searchsorted(centers, start, side="left"))
+        last = lo + int(np.searchsorted(centers, end, side="right"))
+        centers = centers[first - lo:last - lo]
+        if last <= first:
+            freq = self.freq if self.n_windows else np.empty(0)
+            return centers, freq, np.empty((freq.size, 0), dtype=np.float32)
+        parts = []
+        for index in range(first // self._tile_windows, (last - 1) // self._tile_windows + 1):
+            offset = index * self._tile_windows
+            parts.append(self._tile(index)[:, max(first - offset, 0):last - offset])
+        return centers, self._freq, np.concatenate(parts, axis=1) if len(parts) > 1 else parts[0]
+
+    def clear(self):
+        """Drop every computed tile."""
+        with self._lock:
+            self._tiles.clear()
+            self._nbytes = 0
+
+    def __repr__(self):
+        return (f"SpectrogramTiles({len(self)}/{self.n_tiles} tiles of "
+                f"{self._tile_windows} windows, {self._nbytes / 2 ** 20:.1f} MiB)")
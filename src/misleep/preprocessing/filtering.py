@@ -4,19 +4,331 @@
 Currently provides a Butterworth zero-phase filter through
 :func:`signal_filter` and mains (power-line) noise removal through
 :func:`filter_power_line_noise`.
+
+Filters are designed as second-order sections (SOS), which stay
+numerically stable at low cutoffs (e.g. 0.5 Hz at 1 kHz) where the
+transfer-function (``'ba'``) form degrades. Designs are cached on
+``(btype, band, sf, order)`` by :func:`design_sos`, and every filter
+accepts a single channel or a whole ``(n_channels, n_samples)`` block,
+filtered along the last axis in one ``sosfiltfilt`` call.
+
+Long (e.g. 72 h) or memory-mapped recordings can be filtered out of core
+with :func:`sosfiltfilt_chunked`: the signal is processed in blocks that
+overlap by the settling length of the filter, and every block is written
+into a preallocated array or ``numpy.memmap``, so peak memory is a few
+blocks instead of several full-length temporaries.
+
+For wide-band preprocessing of very long signals, ``method='fft'``
+(:func:`fftfiltfilt`) applies the zero-phase magnitude-squared response
+``|H(f)|^2`` of the same Butterworth design with ``rfft`` on overlapping
+blocks (overlap-save). Its cost hardly depends on the filter and, unlike
+the recursive ``sosfiltfilt``, it runs on several threads (``workers``);
+whether it is faster depends on the machine, so compare the backends
+with ``tools/benchmark_filtering.py``. See :func:`fftfiltfilt` for its
+tolerance against ``sosfiltfilt``.
 """
 
+from functools import lru_cache
+
 import numpy as np
+from scipy import fft as sp_fft
 from scipy import signal
 
+_BTYPES = ("lowpass", "highpass", "bandpass", "bandstop")
+_METHODS = ("iir", "fft")
+
+
+def _filter_band(btype, low, high):
+    """Return the critical frequency/ies and the short name of a filter."""
+    if btype == "lowpass":
+        return float(high), f"{btype}_{high}"
+    if btype == "highpass":
+        return float(low), f"{btype}_{low}"
+    if btype in ("bandpass", "bandstop"):
+        return (float(low), float(high)), f"{btype}_{low}_{high}"
+    raise ValueError(
+        f"'{btype}' is an invalid type for filter, you can only choose "
+        f"'lowpass', 'highpass', 'bandpass' or 'bandstop'")
+
+
+@lru_cache(maxsize=256)
+def _cached_sos(btype, band, sf, order):
+    return signal.iirfilter(N=order, Wn=band, btype=btype, analog=False,
+                            output="sos", ftype="butter", fs=sf)
+
+
+def design_sos(btype="bandpass", low=0.5, high=30.0, sf=256.0, order=3):
+    """Design (or fetch from the cache) a Butterworth filter in SOS form.
+
+    Parameters
+    ----------
+    btype : {'lowpass', 'highpass', 'bandpass', 'bandstop'}, optional
+        The type of filter. Default is ``'bandpass'``.
+    low, high : float
+        Cutoff frequencies (Hz); see :func:`signal_filter`.
+    sf : float
+        Sampling frequency.
+    order : int
+        Butterworth order. Default is 3.
+
+    Returns
+    -------
+    ndarray
+        ``(n_sections, 6)`` SOS array (a copy of the cached design).
+    """
+    band, _ = _filter_band(btype, low, high)
+    return _cached_sos(btype, band, float(sf), int(order)).copy()
+
+
+@lru_cache(maxsize=64)
+def _cached_notch_cascade(bands, sf, order):
+    return np.vstack([_cached_sos("bandstop", band, sf, order) for band in bands])
+
+
+def notch_sos(bands, sf, order=3):
+    """Fuse a cascade of band-stop filters into a single SOS array.
+
+    Parameters
+    ----------
+    bands : list of [low, high]
+        Stop bands in Hz, e.g. ``[[47, 53], [97, 103]]``.
+    sf : float
+        Sampling frequency.
+    order : int
+        Butterworth order of every band-stop. Default is 3.
+
+    Returns
+    -------
+    ndarray
+        SOS array applying all band-stops in one pass (a copy of the
+        cached design).
+    """
+    bands = tuple((float(low), float(high)) for low, high in bands)
+    return _cached_notch_cascade(bands, float(sf), int(order)).copy()
+
+
+def settle_length(sos, tol=1e-9, max_len=2 ** 24):
+    """Number of samples after which the impulse response of ``sos`` has decayed.
+
+    Parameters
+    ----------
+    sos : ndarray
+        SOS filter.
+    tol : float
+        Decay threshold, relative to the peak of the impulse response.
+    max_len : int
+        Upper bound of the returned length.
+
+    Returns
+    -------
+    int
+        Index of the last impulse response sample above ``tol * peak``
+        (plus one); the overlap :func:`sosfiltfilt_chunked` needs.
+    """
+    sos = np.asarray(sos, dtype=float)
+    length = 1024
+    while True:
+        impulse = np.zeros(length)
+        impulse[0] = 1.0
+        response = np.abs(signal.sosfilt(sos, impulse))
+        above = np.flatnonzero(response > tol * response.max())
+        last = int(above[-1]) + 1 if above.size else 1
+        # Decayed well before the end of the probe -- the tail is settled
+        if last < length // 2 or length >= max_len:
+            return min(last, max_len)
+        length *= 4
+
+
+def sosfiltfilt_chunked(data, sos, out=None, chunk_size=2 ** 20, overlap=None):
+    """Zero-phase filter a long signal block by block.
+
+    Every block of ``chunk_size`` samples is filtered together with
+    ``overlap`` extra samples on each side, which absorb the start-up
+    transients of the forward and backward passes; only the block itself is
+    written to ``out``. Blocks touching the ends of the signal use the same
+    edge padding as :func:`scipy.signal.sosfiltfilt`, so the result matches
+    the full-signal filter to within the settling tolerance (below ``1e-7``
+    of the signal amplitude with the default overlap).
+
+    Parameters
+    ----------
+    data : array_like
+        1-D signal or ``(n_channels, n_samples)`` block, filtered along the
+        last axis. May be a ``numpy.memmap``; only one block is read at a
+        time.
+    sos : ndarray
+        SOS filter, e.g. from :func:`design_sos`.
+    out : ndarray, optional
+        Preallocated output (or ``numpy.memmap``) with the shape of
+        ``data``. A new float64 array is allocated when omitted.
+    chunk_size : int
+        Samples per block. Default is ``2 ** 20``.
+    overlap : int, optional
+        Samples of overlap on each side of a block. Defaults to
+        :func:`settle_length` of ``sos``.
+
+    Returns
+    -------
+    ndarray
+        ``out``, holding the filtered signal.
+    """
+    if not isinstance(chunk_size, (int, np.integer)) or chunk_size <= 0:
+        raise ValueError(f"'chunk_size' should be a positive integer, got {chunk_size!r}")
+    if not hasattr(data, "shape"):
+        data = np.asarray(data)
+    if data.ndim not in (1, 2):
+        raise ValueError(f"Only 1-D or 2-D signals are supported, got {data.ndim}-D")
+    if out is None:
+        out = np.empty(data.shape, dtype=np.result_type(data.dtype, np.float64))
+    elif out.shape != data.shape:
+        raise ValueError(f"'out' should have shape {data.shape}, got {out.shape}")
+    if overlap is None:
+        overlap = settle_length(sos)
+
+    n = data.shape[-1]
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        lo, hi = max(start - overlap, 0), min(end + overlap, n)
+        block = signal.sosfiltfilt(sos, np.asarray(data[..., lo:hi], dtype=float), axis=-1)
+        out[..., start:end] = block[..., start - lo:end - lo]
+    return out
+
+
+@lru_cache(maxsize=32)
+def _fft_kernel(sos_bytes, n_sections, nfft):
+    """``rfft`` of the zero-phase (filtfilt) kernel of ``sos`` on ``nfft`` points."""
+    sos = np.frombuffer(sos_bytes, dtype=float).reshape(n_sections, 6).copy()
+    half = settle_length(sos) - 1
+    impulse = np.zeros(half + 1)
+    impulse[0] = 1.0
+    h = signal.sosfilt(sos, impulse)
+    # |H|^2 <=> autocorrelation of h: symmetric kernel of 2 * half + 1 taps,
+    # stored so that output sample ``i`` of a segment lines up with input
+    # sample ``i + half`` (overlap-save keeps the fully overlapped part).
+    kernel = np.convolve(h, h[::-1])
+    return sp_fft.rfft(kernel, nfft), half
+
+
+def fftfiltfilt(data, sos, out=None, block_size=None, workers=None):
+    """Zero-phase filter with the magnitude-squared response of ``sos`` via FFT.
+
+    The filtfilt kernel (the autocorrelation of the impulse response of
+    ``sos``, truncated at :func:`settle_length`) is applied block by block
+    with ``rfft`` (overlap-save), so, like :func:`sosfiltfilt_chunked`, only
+    a few blocks are held in memory and the result can be written into a
+    ``numpy.memmap``.
+
+    Parameters
+    ----------
+    data : array_like
+        1-D signal or ``(n_channels, n_samples)`` block, filtered along the
+        last axis.
+    sos : ndarray
+        SOS filter, e.g. from :func:`design_sos`.
+    out : ndarray, optional
+        Preallocated output (or ``numpy.memmap``) with the shape of
+        ``data``. A new float64 array is allocated when omitted.
+    block_size : int, optional
+        Output samples per FFT block. Defaults to a fast FFT length of at
+        least ``2 ** 16`` and eight times the kernel length.
+    workers : int, optional
+        Threads used by ``scipy.fft`` (``-1`` for all cores). Unlike
+        ``sosfiltfilt``, the FFT backend scales with the number of cores.
 
-def signal_filter(data, sf=256.0, btype="lowpass", low=0.5, high=30.0):
+    Returns
+    -------
+    ndarray
+        ``out``, holding the filtered signal.
+
+    Notes
+    -----
+    The result matches ``scipy.signal.sosfiltfilt`` to below ``1e-6`` of
+    the signal amplitude (the truncation error of the kernel). The first
+    and last two settling lengths are filtered with ``sosfiltfilt`` itself,
+    so its edge padding is reproduced; signals shorter than twice the
+    kernel are filtered with ``sosfiltfilt`` entirely.
+    """
+    if not hasattr(data, "shape"):
+        data = np.asarray(data)
+    if data.ndim not in (1, 2):
+        raise ValueError(f"Only 1-D or 2-D signals are supported, got {data.ndim}-D")
+    if out is None:
+        out = np.empty(data.shape, dtype=np.result_type(data.dtype, np.float64))
+    elif out.shape != data.shape:
+        raise ValueError(f"'out' should have shape {data.shape}, got {out.shape}")
+
+    sos = np.ascontiguousarray(sos, dtype=float)
+    half = settle_length(sos) - 1
+    n = data.shape[-1]
+    if n <= 2 * half + 1:
+        out[...] = signal.sosfiltfilt(sos, np.asarray(data, dtype=float), axis=-1)
+        return out
+
+    taps = 2 * half
+    if block_size is None:
+        nfft = sp_fft.next_fast_len(max(2 ** 16, 8 * (taps + 1)), real=True)
+    else:
+        if not isinstance(block_size, (int, np.integer)) or block_size <= 0:
+            raise ValueError(f"'block_size' should be a positive integer, got {block_size!r}")
+        nfft = sp_fft.next_fast_len(int(block_size) + taps, real=True)
+    kernel_f, _ = _fft_kernel(sos.tobytes(), sos.shape[0], nfft)
+    step = nfft - taps
+
+    for start in range(0, n, step):
+        end = min(start + step, n)
+        lo, hi = start - half, end + half
+        segment = np.asarray(data[..., max(lo, 0):min(hi, n)], dtype=float)
+        if lo < 0 or hi > n:
+            # Zero padding; the affected edge samples are redone below
+            pad = [(0, 0)] * (segment.ndim - 1) + [(max(-lo, 0), max(hi - n, 0))]
+            segment = np.pad(segment, pad)
+        filtered = sp_fft.irfft(sp_fft.rfft(segment, nfft, axis=-1, workers=workers) * kernel_f,
+                                nfft, axis=-1, workers=workers)
+        out[..., start:end] = filtered[..., taps:taps + end - start]
+
+    # Both ends with sosfiltfilt itself, so its edge handling is kept: an
+    # edge segment of three settling lengths is exact up to two of them.
+    settle = half + 1
+    edge = min(n, 3 * settle)
+    head = signal.sosfiltfilt(sos, np.asarray(data[..., :edge], dtype=float), axis=-1)
+    out[..., :2 * settle] = head[..., :2 * settle]
+    tail = signal.sosfiltfilt(sos, np.asarray(data[..., n - edge:], dtype=float), axis=-1)
+    out[..., n - 2 * settle:] = tail[..., edge - 2 * settle:]
+    return out
+
+
+def apply_sos(data, sos, axis=-1, chunk_size=None, out=None, method="iir", workers=None):
+    """Zero-phase filter ``data`` with ``sos`` along ``axis``.
+
+    ``data`` may be a single channel or an ``(n_channels, n_samples)``
+    block; all channels are filtered in one ``sosfiltfilt`` call. With
+    ``chunk_size`` (or ``out``) the signal is filtered block-wise by
+    :func:`sosfiltfilt_chunked` instead (last axis only). ``method='fft'``
+    uses :func:`fftfiltfilt` (last axis only, ``chunk_size`` is its block
+    size, ``workers`` its FFT threads).
+    """
+    if method not in _METHODS:
+        raise ValueError(f"'method' should be one of {_METHODS}, got {method!r}")
+    if method == "fft":
+        if axis not in (-1, np.ndim(data) - 1):
+            raise ValueError("FFT filtering only supports the last axis")
+        return fftfiltfilt(data, sos, out=out, block_size=chunk_size, workers=workers)
+    if chunk_size is None and out is None:
+        return signal.sosfiltfilt(sos, data, axis=axis)
+    if axis not in (-1, np.ndim(data) - 1):
+        raise ValueError("Chunked filtering only supports the last axis")
+    return sosfiltfilt_chunked(data, sos, out=out, chunk_size=chunk_size or 2 ** 20)
+
+
+def signal_filter(data, sf=256.0, btype="lowpass", low=0.5, high=30.0, order=3,
+                  chunk_size=None, out=None, method="iir", workers=None):
     """Filter a signal with a zero-phase Butterworth filter.
 
     Parameters
     ----------
     data : ndarray
-        1-D array, the signal to filter.
+        The signal to filter: a 1-D array, or a 2-D ``(n_channels,
+        n_samples)`` array to filter every channel at once.
     sf : float
         Sampling frequency of the signal. Default is 256.
     btype : {'lowpass', 'highpass', 'bandpass', 'bandstop'}, optional
@@ -27,11 +339,25 @@ def signal_filter(data, sf=256.0, btype="lowpass", low=0.5, high=30.0):
     high : float
         Higher cutoff frequency (Hz), used by ``'lowpass'``, ``'bandpass'``
         and ``'bandstop'``.
+    order : int
+        Butterworth order. Default is 3.
+    chunk_size : int, optional
+        Filter block-wise in blocks of this many samples
+        (:func:`sosfiltfilt_chunked`), e.g. for long or memory-mapped
+        recordings. Default is to filter the whole signal at once.
+    out : ndarray, optional
+        Preallocated output (or ``numpy.memmap``) for block-wise filtering.
+    method : {'iir', 'fft'}, optional
+        ``'iir'`` (default) runs ``sosfiltfilt``; ``'fft'`` applies the same
+        zero-phase response with FFTs (:func:`fftfiltfilt`), equal to
+        ``'iir'`` to below ``1e-6`` of the signal amplitude.
+    workers : int, optional
+        FFT threads of ``method='fft'`` (``-1`` for all cores).
 
     Returns
     -------
     filtered_data : ndarray
-        The filtered signal.
+        The filtered signal (``out`` when given).
     fname : str
         A short name describing the filter, e.g. ``'bandpass_0.5_30'``.
     """
@@ -42,23 +368,10 @@ def signal_filter(data, sf=256.0, btype="lowpass", low=0.5, high=30.0):
     if not isinstance(high, (int, float)):
         raise TypeError(f"High threshold should be a float, got {type(high)}")
 
-    if btype == "lowpass":
-        fnorm = high / (0.5 * sf)
-        fname = f"{btype}_{high}"
-    elif btype == "highpass":
-        fnorm = low / (0.5 * sf)
-        fname = f"{btype}_{low}"
-    elif btype in ("bandpass", "bandstop"):
-        fnorm = np.divide([low, high], 0.5 * sf)
-        fname = f"{btype}_{low}_{high}"
-    else:
-        raise ValueError(
-            f"'{btype}' is an invalid type for filter, you can only choose "
-            f"'lowpass', 'highpass', 'bandpass' or 'bandstop'")
-
-    b, a = signal.iirfilter(N=3, Wn=fnorm, btype=btype, analog=False,
-                            output="ba", ftype="butter", fs=None)
-    filtered_data = signal.filtfilt(b=b, a=a, x=data)
+    _, fname = _filter_band(btype, low, high)
+    sos = design_sos(btype, low=low, high=high, sf=sf, order=order)
+    filtered_data = apply_sos(data, sos, chunk_size=chunk_size, out=out, method=method,
+                              workers=workers)
 
     return filtered_data, fname
 
@@ -66,10 +379,13 @@ def signal_filter(data, sf=256.0, btype="lowpass", low=0.5, high=30.0):
 def filter_power_line_noise(data, sf, noise_band="50-100-150"):
     """Remove mains (power-line) noise with band-stop filters.
 
+    The band-stops of all harmonics below Nyquist are fused into a single
+    SOS cascade (:func:`notch_sos`) and applied in one zero-phase pass.
+
     Parameters
     ----------
     data : ndarray
-        Signal to filter.
+        Signal to filter (1-D, or ``(n_channels, n_samples)``).
     sf : float
         Sampling frequency.
     noise_band : {'50-100-150', '60-120-180'}, optional
@@ -88,7 +404,7 @@ def filter_power_line_noise(data, sf, noise_band="50-100-150"):
         filter_band = [[47, 53], [97, 103]]
     elif sf > 106:
         filter_band = [[47, 53]]
-    for each in filter_band:
-        data, _ = signal_filter(data, sf, btype="bandstop", low=each[0], high=each[1])
+    if filter_band:
+        data = apply_sos(data, notch_sos(filter_band, sf))
 
     return data
@@ -1,15 +1,93 @@
 # -*- coding: UTF-8 -*-
-"""Spectral analysis: Welch power spectrum, spectrogram and band power."""
+"""Spectral analysis: Welch power spectrum, spectrogram and band power.
+
+Besides the single-signal :func:`spectrum` / :func:`spectrogram`, the
+*epoch* functions compute the Welch periodogram of every (overlapping)
+window of a whole channel once, as an ``(n_epochs, n_freq)`` matrix
+(:func:`epoch_psd`). The spectrum of any subset -- a sleep state
+(:func:`epoch_states`), an hour, artifact-free epochs
+(:func:`epoch_std`, :func:`reject_epochs`) -- is then the mean of its rows,
+without concatenating the subset's samples (and their splice
+discontinuities) and running Welch again.
+
+:func:`epoch_multitaper` is the multitaper counterpart of
+:func:`epoch_psd`: every window is multiplied by a set of DPSS tapers
+(computed once and cached) and all tapers of a block of windows are
+transformed in one batched ``rfft``, giving a lower-variance spectrum per
+window at the cost of a few more FFTs.
+
+Frequency axes and band index slices are cached per ``(sf, nperseg,
+nfft, band)`` by :func:`spectral_kernel`, so repeated calls (one per page
+or per window) neither rebuild nor re-round the axis.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft as sp_fft
 from scipy.integrate import simpson
 from scipy.ndimage import gaussian_filter1d
-from scipy.signal import stft, welch
+from scipy.signal import get_window, welch
 
 from misleep.preprocessing.filtering import signal_filter
 
+#: Cached frequency axis of an FFT length: ``freq`` (Hz, rounded to 0.01 Hz,
+#: read-only) restricted to a band, ``keep`` the slice selecting it from the
+#: full one-sided axis, and ``nfft`` the FFT length.
+SpectralKernel = namedtuple("SpectralKernel", ["freq", "keep", "nfft"])
 
-def spectrum(signal, sf, band=None, relative=True, win_sec=1, nfft=None, gaussian_sigma=None):
+
+@lru_cache(maxsize=256)
+def _cached_kernel(sf, nperseg, nfft, band):
+    nfft = nperseg if nfft is None else nfft
+    freq = np.round(np.fft.rfftfreq(nfft, 1 / sf), 2)
+    keep = slice(0, freq.size)
+    if band is not None:
+        idx = np.flatnonzero((freq >= band[0]) & (freq <= band[1]))
+        keep = slice(int(idx[0]), int(idx[-1]) + 1) if idx.size else slice(0, 0)
+    freq = freq[keep]
+    freq.flags.writeable = False
+    return SpectralKernel(freq, keep, nfft)
+
+
+def spectral_kernel(sf, nperseg, nfft=None, band=None):
+    """Frequency axis and band slice of a spectral estimate (cached).
+
+    Parameters
+    ----------
+    sf : float
+        Sampling frequency.
+    nperseg : int
+        Window length in samples.
+    nfft : int, optional
+        FFT length (default: ``nperseg``).
+    band : list, optional
+        Only keep the frequencies within ``[low, high]``, compared after
+        rounding to 0.01 Hz. Default keeps all.
+
+    Returns
+    -------
+    SpectralKernel
+        ``(freq, keep, nfft)``; ``freq`` is shared with the cache and
+        read-only, ``keep`` selects it from a full one-sided spectrum.
+    """
+    return _cached_kernel(float(sf), int(nperseg), None if nfft is None else int(nfft),
+                          None if band is None else (float(band[0]), float(band[1])))
+
+
+@lru_cache(maxsize=32)
+def _stft_window(nperseg, dtype):
+    # Hann window scaled like scipy.signal.stft (scaling='spectrum')
+    window = get_window("hann", nperseg)
+    window = (window / window.sum()).astype(dtype)
+    window.flags.writeable = False
+    return window
+
+
+def spectrum(signal, sf, band=None, relative=True, win_sec=1, nfft=None, gaussian_sigma=None,
+             prefiltered=False, dtype=np.float64):
     """Calculate the (Welch) power spectrum of a signal.
 
     The signal is band-pass filtered to ``band`` first, then the power
@@ -31,6 +109,11 @@ def spectrum(signal, sf, band=None, relative=True, win_sec=1, nfft=None, gaussia
         Number of FFT points.
     gaussian_sigma : float, optional
         Sigma for Gaussian smoothing of the PSD.
+    prefiltered : bool
+        Whether ``signal`` is already band-pass filtered to ``band`` (e.g.
+        a slice of :meth:`MiData.filtered_signal`); skips the filter.
+    dtype : dtype
+        dtype of the returned PSD, e.g. ``np.float32``.
 
     Returns
     -------
@@ -51,15 +134,16 @@ def spectrum(signal, sf, band=None, relative=True, win_sec=1, nfft=None, gaussia
     if not isinstance(band, list):
         raise TypeError(f"'band' should be a list, e.g. [0.5, 4], got {type(band)}")
 
-    signal, _ = signal_filter(data=signal, sf=sf, btype="bandpass", low=band[0], high=band[1])
+    if not prefiltered:
+        signal, _ = signal_filter(data=signal, sf=sf, btype="bandpass", low=band[0], high=band[1])
 
-    freq, psd = welch(signal, sf, nperseg=int(sf * win_sec), nfft=nfft, scaling="density")
-    freq = np.array([round(each, 2) for each in freq])
+    nperseg = int(sf * win_sec)
+    _, psd = welch(signal, sf, nperseg=nperseg, nfft=nfft, scaling="density")
     psd = gaussian_filter1d(psd, sigma=gaussian_sigma) if gaussian_sigma is not None else psd
 
-    idx_freq = np.logical_and(freq >= band[0], freq <= band[1])
-    freq = freq[idx_freq]
-    psd = psd[idx_freq]
+    kernel = spectral_kernel(sf, min(nperseg, signal.shape[-1]), nfft, band)
+    freq = kernel.freq
+    psd = psd[kernel.keep].astype(dtype)
 
     total_power = simpson(psd, dx=freq[1] - freq[0])
     if relative and total_power > 0:
@@ -68,13 +152,19 @@ def spectrum(signal, sf, band=None, relative=True, win_sec=1, nfft=None, gaussia
     return freq, psd
 
 
-def spectrogram(signal, sf, band=None, step=0.2, win_sec=2, norm=False, nfft=None):
+def spectrogram(signal, sf, band=None, step=0.2, win_sec=2, norm=False, nfft=None,
+                dtype=np.float64, out=None, chunk=2048):
     """Calculate the spectrogram of a signal with the STFT.
 
+    Equivalent to :func:`scipy.signal.stft` (Hann window, zero-padded
+    boundaries) followed by the squared magnitude, computed block-wise
+    straight into the (band-limited) output.
+
     Parameters
     ----------
     signal : ndarray
-        1-D signal.
+        1-D signal, or ``(n_signals, n_samples)`` signals transformed
+        together.
     sf : float
         Sampling frequency.
     band : list, optional
@@ -87,18 +177,31 @@ def spectrogram(signal, sf, band=None, step=0.2, win_sec=2, norm=False, nfft=Non
         Whether to normalize the power across frequencies at each time point.
     nfft : int, optional
         Number of FFT points.
+    dtype : dtype
+        dtype of the spectrogram, e.g. ``np.float32`` (also computed in
+        single precision). Ignored when ``out`` is given.
+    out : ndarray, optional
+        ``([n_signals,] n_freq, n_times)`` array to write the spectrogram
+        into, e.g. the
+        ``Sxx`` of a previous call on a signal of the same length, so
+        repeated calls do not reallocate it.
+    chunk : int
+        Windows transformed at once (bounds the temporaries).
 
     Returns
     -------
     f : ndarray
-        Frequency bins.
+        Frequency bins (read-only, shared between calls).
     t : ndarray
         Time bins.
     Sxx : ndarray
-        Spectrogram (squared magnitude of the STFT).
+        Spectrogram (squared magnitude of the STFT), ``([n_signals,] n_freq,
+        n_times)``.
     """
     if not isinstance(signal, np.ndarray):
         raise TypeError(f"'signal' should be a numpy array, got {type(signal)}")
+    if signal.ndim not in (1, 2):
+        raise ValueError(f"'signal' should be 1-D or 2-D, got {signal.ndim} dimensions")
     if not isinstance(sf, (int, float)):
         raise TypeError(f"'sf' should be an integer or float, got {type(sf)}")
 
@@ -115,23 +218,44 @@ def spectrogram(signal, sf, band=None, step=0.2, win_sec=2, norm=False, nfft=Non
         raise TypeError(f"'band' should be a list, e.g. [0.5, 30], got {type(band)}")
 
     nperseg = int(win_sec * sf)
-    noverlap = int(nperseg - (step * sf))
-
-    f, t, Sxx = stft(signal, sf, nperseg=nperseg, nfft=nfft,
-                     noverlap=noverlap, padded=False, boundary="zeros")
-
-    f = np.array([round(each, 2) for each in f])
-
-    idx_f = np.logical_and(f >= band[0], f <= band[1])
-    f = f[idx_f]
-    Sxx = Sxx[idx_f, :]
-    Sxx = np.square(np.abs(Sxx))
+    nstep = nperseg - int(nperseg - (step * sf))
+    half = nperseg // 2
+    length = signal.shape[-1]
+    # Shorten the window to a (padded) signal shorter than it
+    nperseg = min(nperseg, length + 2 * half)
+    kernel = spectral_kernel(sf, nperseg, nfft, band)
+    dtype = np.dtype(dtype if out is None else out.dtype)
+    work = np.float32 if dtype == np.float32 else np.float64
+
+    rows = signal.reshape(-1, length)
+    padded = np.zeros((rows.shape[0], length + 2 * half), dtype=work)
+    padded[:, half:half + length] = rows
+    frames = sliding_window_view(padded, nperseg, axis=-1)[:, ::nstep]
+    n_times = frames.shape[1]
+
+    shape = signal.shape[:-1] + (kernel.freq.size, n_times)
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError(f"'out' should have the shape {shape}, got {out.shape}")
+
+    # Blocks of about `chunk` windows: several signals, or part of one
+    window = _stft_window(nperseg, work)
+    out_rows = out.reshape(rows.shape[0], kernel.freq.size, n_times)
+    n_rows = max(chunk // max(n_times, 1), 1)
+    n_cols = max(min(chunk, n_times), 1)
+    for row in range(0, rows.shape[0], n_rows):
+        for col in range(0, n_times, n_cols):
+            spec = sp_fft.rfft(frames[row:row + n_rows, col:col + n_cols] * window,
+                               n=kernel.nfft, axis=-1)[..., kernel.keep]
+            out_rows[row:row + n_rows, :, col:col + n_cols] = \
+                (spec.real ** 2 + spec.imag ** 2).transpose(0, 2, 1)
 
     if norm:
-        sum_power = Sxx.sum(0).reshape(1, -1)
-        np.divide(Sxx, sum_power, out=Sxx, where=sum_power != 0)
+        sum_power = out.sum(-2, keepdims=True)
+        np.divide(out, sum_power, out=out, where=sum_power != 0)
 
-    return f, t, Sxx
+    return kernel.freq, np.arange(n_times) * nstep / sf, out
 
 
 def band_power(psd, freq, bands=None, relative=False):
@@ -140,7 +264,8 @@ def band_power(psd, freq, bands=None, relative=False):
     Parameters
     ----------
     psd : ndarray
-        Power spectral density values.
+        Power spectral density values, frequencies along the last axis
+        (e.g. ``(n_windows, n_freq)`` for one band power per window).
     freq : ndarray
         Frequencies corresponding to ``psd``.
     bands : list, optional
@@ -151,19 +276,239 @@ def band_power(psd, freq, bands=None, relative=False):
     Returns
     -------
     dict
-        Band name -> band power.
+        Band name -> band power (a float, or an array for N-D ``psd``).
     """
     freq_res = freq[1] - freq[0]
+    total = simpson(psd, dx=freq_res, axis=-1) if relative else None
     band_dict = {}
     for each in bands:
         idx_band = np.logical_and(freq >= each[0], freq <= each[1])
-        bp = simpson(psd[idx_band], dx=freq_res)
+        bp = simpson(psd[..., idx_band], dx=freq_res, axis=-1)
 
         if relative:
-            total = simpson(psd, dx=freq_res)
-            if total > 0:
-                bp /= total
+            bp = np.divide(bp, total, out=np.array(bp, dtype=float), where=total > 0)[()]
 
         band_dict[each[2]] = bp
 
     return band_dict
+
+
+def _epoch_windows(signal, sf, win_sec, step_sec):
+    """Strided ``(n_epochs, nperseg)`` view of the epoch windows and the step."""
+    if not isinstance(signal, np.ndarray) or signal.ndim != 1:
+        raise TypeError("'signal' should be a 1-D numpy array")
+    nperseg = int(win_sec * sf)
+    step = nperseg // 2 if step_sec is None else int(round(step_sec * sf))
+    if nperseg <= 0 or step <= 0:
+        raise ValueError(f"'win_sec' ({win_sec}) and 'step_sec' ({step_sec}) should be "
+                         f"at least one sample long")
+    if signal.size < nperseg:
+        return np.empty((0, nperseg), dtype=signal.dtype), step
+    return sliding_window_view(signal, nperseg)[::step], step
+
+
+def epoch_psd(signal, sf, win_sec=10, step_sec=None, nfft=None, band=None,
+              dtype=np.float64, chunk=2048):
+    """Welch periodogram of every epoch window of a channel.
+
+    Each row is the periodogram of one window of ``win_sec`` seconds,
+    computed with :func:`scipy.signal.welch` conventions (Hann window,
+    constant detrend, one-sided density); windows start every ``step_sec``
+    seconds. The mean of any set of rows is the Welch spectrum of those
+    windows.
+
+    Parameters
+    ----------
+    signal : ndarray
+        1-D signal (a whole channel).
+    sf : float
+        Sampling frequency.
+    win_sec : float
+        Window length in seconds. Default is 10.
+    step_sec : float, optional
+        Window step in seconds. Defaults to half a window (Welch's 50 %
+        overlap).
+    nfft : int, optional
+        Number of FFT points (default: the window length).
+    band : list, optional
+        Only keep the frequencies within ``[low, high]`` (compared after
+        rounding to 0.01 Hz, like :func:`spectrum`). Default keeps all.
+    dtype : dtype
+        dtype of the returned matrix, e.g. ``np.float32`` to halve memory.
+    chunk : int
+        Windows transformed per ``welch`` call (bounds the temporaries).
+
+    Returns
+    -------
+    freq : ndarray
+        Frequencies (rounded to 0.01 Hz).
+    times : ndarray
+        Start of every window in seconds.
+    psd : ndarray
+        ``(n_epochs, n_freq)`` power spectral density.
+    """
+    windows, step = _epoch_windows(signal, sf, win_sec, step_sec)
+    nperseg = windows.shape[1]
+    freq, keep, _ = spectral_kernel(sf, nperseg, nfft, band)
+
+    psd = np.empty((windows.shape[0], freq.size), dtype=dtype)
+    for start in range(0, windows.shape[0], chunk):
+        _, power = welch(windows[start:start + chunk], sf, nperseg=nperseg, nfft=nfft,
+                         scaling="density", axis=-1)
+        psd[start:start + chunk] = power[:, keep]
+    times = np.arange(windows.shape[0]) * step / sf
+    return freq, times, psd
+
+
+@lru_cache(maxsize=32)
+def _dpss_tapers(nperseg, nw, n_tapers, dtype):
+    from scipy.signal.windows import dpss
+
+    # Unit-energy tapers, (n_tapers, nperseg)
+    tapers = np.atleast_2d(dpss(nperseg, nw, Kmax=n_tapers)).astype(dtype)
+    tapers.flags.writeable = False
+    return tapers
+
+
+def epoch_multitaper(signal, sf, win_sec=10, step_sec=None, nw=3, n_tapers=None, nfft=None,
+                     band=None, dtype=np.float64, chunk=None, workers=None):
+    """Multitaper power spectrum of every epoch window of a channel.
+
+    The multitaper counterpart of :func:`epoch_psd`: each window (mean
+    removed) is multiplied by ``n_tapers`` DPSS tapers of time-bandwidth
+    product ``nw``, and the one-sided power spectral densities of the
+    tapered copies are averaged. Frequency resolution is ``2 * nw /
+    win_sec`` Hz.
+
+    Parameters
+    ----------
+    signal : ndarray
+        1-D signal (a whole channel).
+    sf : float
+        Sampling frequency.
+    win_sec : float
+        Window length in seconds. Default is 10.
+    step_sec : float, optional
+        Window step in seconds. Defaults to half a window.
+    nw : float
+        Time-bandwidth product. Default is 3.
+    n_tapers : int, optional
+        Number of tapers. Defaults to ``2 * nw - 1``.
+    nfft : int, optional
+        Number of FFT points (default: the window length).
+    band : list, optional
+        Only keep the frequencies within ``[low, high]`` (see
+        :func:`spectral_kernel`). Default keeps all.
+    dtype : dtype
+        dtype of the returned matrix; ``np.float32`` also computes in
+        single precision.
+    chunk : int, optional
+        Windows transformed per batch. Defaults to about 4 M samples of
+        tapered data per batch.
+    workers : int, optional
+        Threads of the batched FFT (``scipy.fft``; ``-1`` for all cores).
+
+    Returns
+    -------
+    freq : ndarray
+        Frequencies (rounded to 0.01 Hz).
+    times : ndarray
+        Start of every window in seconds.
+    psd : ndarray
+        ``(n_epochs, n_freq)`` power spectral density.
+    """
+    windows, step = _epoch_windows(signal, sf, win_sec, step_sec)
+    nperseg = windows.shape[1]
+    n_tapers = max(int(2 * nw) - 1, 1) if n_tapers is None else int(n_tapers)
+    if n_tapers < 1:
+        raise ValueError(f"'n_tapers' should be at least 1, got {n_tapers}")
+    freq, keep, nfft = spectral_kernel(sf, nperseg, nfft, band)
+    work = np.dtype(np.float32 if np.dtype(dtype) == np.float32 else np.float64)
+    tapers = _dpss_tapers(nperseg, float(nw), n_tapers, work)
+
+    # One-sided density: double every bin but DC (and Nyquist for even nfft)
+    scale = np.full(nfft // 2 + 1, 2 / sf, dtype=work)
+    scale[0] = 1 / sf
+    if nfft % 2 == 0:
+        scale[-1] = 1 / sf
+    scale = scale[keep]
+
+    chunk = max(2 ** 22 // (n_tapers * nfft), 1) if chunk is None else chunk
+    psd = np.empty((windows.shape[0], freq.size), dtype=dtype)
+    for start in range(0, windows.shape[0], chunk):
+        block = windows[start:start + chunk].astype(work)
+        block -= block.mean(axis=1, keepdims=True)
+        spec = sp_fft.rfft(block[:, None, :] * tapers, n=nfft, axis=-1, overwrite_x=True,
+                           workers=workers)[..., keep]
+        power = spec.real ** 2
+        power += spec.imag ** 2
+        psd[start:start + chunk] = power.mean(axis=1) * scale
+    times = np.arange(windows.shape[0]) * step / sf
+    return freq, times, psd
+
+
+def epoch_std(signal, sf, win_sec=10, step_sec=None, chunk=2048):
+    """Standard deviation of every epoch window (see :func:`epoch_psd`)."""
+    windows, _ = _epoch_windows(signal, sf, win_sec, step_sec)
+    sd = np.empty(windows.shape[0])
+    for start in range(0, windows.shape[0], chunk):
+        sd[start:start + chunk] = windows[start:start + chunk].std(axis=1)
+    return sd
+
+
+def epoch_states(times, win_sec, sleep_state):
+    """Sleep state of every epoch window.
+
+    Parameters
+    ----------
+    times : ndarray
+        Window starts in seconds (from :func:`epoch_psd`).
+    win_sec : float
+        Window length in seconds.
+    sleep_state : sequence of int
+        Per-second state codes, aligned with the signal.
+
+    Returns
+    -------
+    ndarray
+        State code of every window, ``-1`` when the window spans several
+        states (or runs past the annotation).
+    """
+    state = np.asarray(sleep_state)
+    codes = np.full(len(times), -1, dtype=np.int64)
+    if state.size == 0:
+        return codes
+    run_id = np.concatenate([[0], np.cumsum(state[1:] != state[:-1])])
+    first = np.floor(times).astype(np.int64)
+    last = np.ceil(np.asarray(times) + win_sec).astype(np.int64) - 1
+    valid = last < state.size
+    first, last = first[valid], last[valid]
+    codes[valid] = np.where(run_id[first] == run_id[last], state[first], -1)
+    return codes
+
+
+def reject_epochs(sd, mask, threshold=2):
+    """Artifact-free epochs of a subset, by relative standard deviation.
+
+    The epoch analogue of :func:`misleep.preprocessing.reject_artifact`:
+    within the epochs selected by ``mask``, those whose standard deviation
+    is ``threshold`` times the subset mean or more are dropped.
+
+    Parameters
+    ----------
+    sd : ndarray
+        Per-epoch standard deviation (:func:`epoch_std`).
+    mask : ndarray of bool
+        Epochs of the subset (e.g. one state, one hour).
+    threshold : float
+        Relative standard-deviation threshold. Default is 2.
+
+    Returns
+    -------
+    ndarray of bool
+        ``mask`` without the artifact epochs.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        return mask
+    return mask & (sd / sd[mask].mean() < threshold)
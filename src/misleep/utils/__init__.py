@@ -11,13 +11,18 @@ Pure-Python helpers that do not depend on the GUI or the data containers:
 
 from .annotation import (
     lst2group,
+    relabel_runs,
+    runs_from_states,
+    split_runs,
+    bin_state_stats,
     marker2mianno,
     start_end2mianno,
     sleep_state2mianno,
+    sleep_state_runs,
     insert_row,
     temp_loop4below_row,
 )
-from .time_utils import transfer_time, second2time
+from .time_utils import transfer_time, second2time, TimeFormatter
 from .entropy import num_zerocross, hjorth_params, perm_entropy
 from .misc import (
     create_new_mianno,
@@ -28,13 +33,19 @@ from .misc import (
 
 __all__ = [
     "lst2group",
+    "relabel_runs",
+    "runs_from_states",
+    "split_runs",
+    "bin_state_stats",
     "marker2mianno",
     "start_end2mianno",
     "sleep_state2mianno",
+    "sleep_state_runs",
     "insert_row",
     "temp_loop4below_row",
     "transfer_time",
     "second2time",
+    "TimeFormatter",
     "num_zerocross",
     "hjorth_params",
     "perm_entropy",
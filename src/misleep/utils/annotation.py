@@ -1,6 +1,8 @@
 # -*- coding: UTF-8 -*-
 """Helpers for converting between annotation representations."""
 
+import numpy as np
+
 from misleep.utils.time_utils import transfer_time
 
 
@@ -40,6 +42,128 @@ def lst2group(pre_lst):
     return grouped
 
 
+def relabel_runs(runs, start, end, value):
+    """Set ``[start, end)`` of grouped runs to ``value``.
+
+    Gives what :func:`lst2group` would return for the edited labels, only
+    the runs overlapping the edit (and equal neighbours, which merge) are
+    touched.
+
+    Parameters
+    ----------
+    runs : list of [start, end, value]
+        Contiguous runs, ``end`` exclusive, e.g. from :func:`lst2group`.
+    start, end : int
+        Edited range, ``end`` exclusive.
+    value : object
+        New value of the range.
+
+    Returns
+    -------
+    list of [start, end, value]
+        New list of runs; ``runs`` itself is not modified.
+    """
+    if end <= start:
+        return [list(run) for run in runs]
+    head = [list(run) for run in runs if run[1] <= start]
+    tail = [list(run) for run in runs if run[0] >= end]
+    cut = [run for run in runs if run[0] < end and run[1] > start]
+    if cut and cut[0][0] < start:
+        head.append([cut[0][0], start, cut[0][2]])
+    if cut and cut[-1][1] > end:
+        tail.insert(0, [end, cut[-1][1], cut[-1][2]])
+    edited = [start, end, value]
+    if head and head[-1][1] == start and head[-1][2] == value:
+        edited[0] = head.pop()[0]
+    if tail and tail[0][0] == end and tail[0][2] == value:
+        edited[1] = tail.pop(0)[1]
+    return head + [edited] + tail
+
+
+def runs_from_states(sleep_state):
+    """Vectorized :func:`lst2group` for a per-second state sequence.
+
+    Parameters
+    ----------
+    sleep_state : array_like
+        Per-second state codes.
+
+    Returns
+    -------
+    (starts, ends, codes) : tuple of numpy.ndarray
+        One element per run of equal states; ``ends`` is exclusive, i.e.
+        ``lst2group(enumerate(sleep_state))`` row ``i`` equals
+        ``[starts[i], ends[i], codes[i]]``.
+    """
+    states = np.asarray(sleep_state)
+    if states.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, states[:0]
+    change = np.flatnonzero(states[1:] != states[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [states.size]))
+    return starts, ends, states[starts]
+
+
+def split_runs(starts, ends, codes, bin_sec=3600):
+    """Split state runs at every multiple of ``bin_sec`` seconds.
+
+    Parameters
+    ----------
+    starts, ends, codes : array_like
+        State runs (``ends`` exclusive), e.g. from :func:`runs_from_states`.
+    bin_sec : int
+        Bin width in seconds. Defaults to one hour.
+
+    Returns
+    -------
+    (starts, ends, codes, bins) : tuple of numpy.ndarray
+        The runs cut at the bin boundaries, plus the bin index of each
+        piece. A run spanning ``k`` bins becomes ``k`` consecutive pieces.
+    """
+    if int(bin_sec) != bin_sec or bin_sec <= 0:
+        raise ValueError(f"'bin_sec' should be a positive whole number of seconds, got {bin_sec}")
+    bin_sec = int(bin_sec)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    codes = np.asarray(codes)
+    first = starts // bin_sec
+    n_pieces = np.maximum((ends - 1) // bin_sec - first + 1, 1)
+    run = np.repeat(np.arange(starts.size), n_pieces)
+    # position of every piece inside its run: 0, 1, ..., n_pieces - 1
+    offset = np.arange(run.size) - np.repeat(np.cumsum(n_pieces) - n_pieces, n_pieces)
+    bins = first[run] + offset
+    piece_starts = np.maximum(starts[run], bins * bin_sec)
+    piece_ends = np.minimum(ends[run], (bins + 1) * bin_sec)
+    return piece_starts, piece_ends, codes[run], bins
+
+
+def bin_state_stats(bins, codes, durations, n_bins):
+    """Per-bin total duration and bout count of every state.
+
+    Parameters
+    ----------
+    bins, codes, durations : array_like
+        Bin index, state code and length (seconds) of every bout, e.g.
+        from :func:`split_runs`.
+    n_bins : int
+        Number of bins.
+
+    Returns
+    -------
+    (state_codes, duration, bouts) : tuple of numpy.ndarray
+        Sorted unique state codes, and ``(n_bins, n_codes)`` integer
+        matrices of summed bout lengths and bout counts.
+    """
+    state_codes, code_idx = np.unique(np.asarray(codes), return_inverse=True)
+    flat = np.asarray(bins, dtype=np.int64) * state_codes.size + code_idx.ravel()
+    size = int(n_bins) * state_codes.size
+    duration = np.bincount(flat, weights=np.asarray(durations, dtype=float), minlength=size)
+    bouts = np.bincount(flat, minlength=size)
+    shape = (int(n_bins), state_codes.size)
+    return state_codes, duration.astype(np.int64).reshape(shape), bouts.reshape(shape)
+
+
 def marker2mianno(marker):
     """Convert MiSleep annotation lines to ``[[time, label], ...]`` markers."""
     if marker != [] or marker is not None:
@@ -58,15 +182,58 @@ def start_end2mianno(start_end):
     return []
 
 
-def sleep_state2mianno(sleep_state):
-    """Convert MiSleep annotation lines to a per-second state sequence."""
-    start_end = [each.split(", ") for each in sleep_state]
-    # Old version misleep labels start from 1
-    if start_end[0][1] == "1":
-        sleep_state = [item for each in start_end for item in [int(each[6])] * (int(each[4]) - int(each[1]) + 1)]
+def sleep_state_runs(sleep_state):
+    """Decode MiSleep sleep state rows into run arrays.
+
+    Each row looks like ``"DD:HH:MM:SS, start, 1, DD:HH:MM:SS, end, 0,
+    code, name"``. The rows are split into tokens in a single pass and the
+    start/end/code columns are converted as whole arrays, so decoding is
+    independent of the number of bouts on the Python side.
+
+    Parameters
+    ----------
+    sleep_state : str or list of str
+        The sleep state section, either as raw text (one row per line) or
+        as a list of lines.
+
+    Returns
+    -------
+    (starts, ends, codes) : tuple of numpy.ndarray
+        Integer arrays with one element per row. For old MiSleep files
+        whose labels start from second 1 (inclusive ends), ``ends`` is
+        shifted by one so that ``ends - starts`` is always the run length.
+    """
+    if not isinstance(sleep_state, str):
+        sleep_state = "\n".join(sleep_state)
+    sleep_state = sleep_state.strip("\r\n")
+    if not sleep_state:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    n_rows = sleep_state.count("\n") + 1
+    tokens = sleep_state.replace("\n", ", ").split(", ")
+    if len(tokens) == 8 * n_rows:
+        columns = tokens[1::8], tokens[4::8], tokens[6::8]
     else:
-        sleep_state = [item for each in start_end for item in [int(each[6])] * (int(each[4]) - int(each[1]))]
-    return sleep_state
+        # irregular rows (e.g. a ", " inside a state name): split row by row
+        rows = [each.split(", ") for each in sleep_state.split("\n")]
+        columns = ([each[1] for each in rows], [each[4] for each in rows],
+                   [each[6] for each in rows])
+    starts, ends, codes = (np.asarray(col).astype(np.int64) for col in columns)
+    # Old version misleep labels start from 1
+    if columns[0][0] == "1":
+        ends = ends + 1
+    return starts, ends, codes
+
+
+def sleep_state2mianno(sleep_state):
+    """Convert MiSleep annotation lines to a per-second state sequence.
+
+    ``sleep_state`` may be the list of state lines or the raw section
+    text; see :func:`sleep_state_runs`.
+    """
+    starts, ends, codes = sleep_state_runs(sleep_state)
+    return np.repeat(codes, np.clip(ends - starts, 0, None)).tolist()
 
 
 def insert_row(df, idx, row):
@@ -5,10 +5,15 @@ These functions were originally copied from the `antropy` package
 (https://github.com/raphaelvallat/antropy, BSD-3-Clause) so that MiSleep
 does not need to import the whole package just for three functions --
 importing antropy used to cost a lot of startup time.
+
+:func:`perm_entropy` is vectorized: a ``(n_windows, n_samples)`` array
+gives the entropy of every window in one call, from ordinal pattern codes
+of a strided embedding counted with ``np.bincount``.
 """
 
 import numpy as np
 from math import factorial
+from numpy.lib.stride_tricks import sliding_window_view
 
 
 def num_zerocross(x, normalize=False, axis=-1):
@@ -61,13 +66,15 @@ def hjorth_params(x, axis=-1):
     return mob, com
 
 
-def perm_entropy(x, order=3, delay=1, normalize=False):
+def perm_entropy(x, order=3, delay=1, normalize=False, axis=-1):
     """Permutation entropy (Bandt & Pompe, 2002).
 
     Parameters
     ----------
     x : array_like
-        1-D time series.
+        1-D time series, or N-D data (e.g. ``(n_windows, n_samples)``) with
+        one series along ``axis``. float32 input is compared in single
+        precision, without a float64 copy.
     order : int
         Order of permutation entropy (embedding dimension). Default is 3.
     delay : int or array_like
@@ -75,54 +82,63 @@ def perm_entropy(x, order=3, delay=1, normalize=False):
         permutation entropy across them is returned.
     normalize : bool
         If True, divide by ``log2(order!)`` so the output lies in [0, 1].
+    axis : int
+        Axis of the time series. Default is -1.
 
     Returns
     -------
-    pe : float
-        Permutation entropy (in bits, unless normalized).
+    pe : float or ndarray
+        Permutation entropy (in bits, unless normalized), one per series.
     """
     if isinstance(delay, (list, np.ndarray, range)):
-        return np.mean([perm_entropy(x, order=order, delay=d, normalize=normalize) for d in delay])
-    x = np.array(x)
-    ran_order = range(order)
-    hashmult = np.power(order, ran_order)
-    assert delay > 0, "delay must be greater than zero."
-    sorted_idx = _embed(x, order=order, delay=delay).argsort(kind="quicksort")
-    hashval = (np.multiply(sorted_idx, hashmult)).sum(1)
-    _, c = np.unique(hashval, return_counts=True)
-    p = np.true_divide(c, c.sum())
-    pe = -_xlogx(p).sum()
+        return np.mean([perm_entropy(x, order=order, delay=d, normalize=normalize, axis=axis)
+                        for d in delay], axis=0)
+    x = np.moveaxis(np.asarray(x), axis, -1)
+    codes = _pattern_codes(x, order=order, delay=delay)
+    lead, n_vectors = codes.shape[:-1], codes.shape[-1]
+    n_patterns = factorial(order)
+
+    # Pattern histogram of every series in one bincount
+    rows = codes.reshape(-1, n_vectors)
+    offsets = np.arange(rows.shape[0])[:, np.newaxis] * n_patterns
+    counts = np.bincount((rows + offsets).ravel(), minlength=rows.shape[0] * n_patterns)
+    p = counts.reshape(lead + (n_patterns,)) / n_vectors
+    pe = -_xlogx(p).sum(axis=-1)
     if normalize:
-        pe /= np.log2(factorial(order))
-    return pe
+        pe /= np.log2(n_patterns)
+    return pe[()]
+
+
+def _pattern_codes(x, order=3, delay=1):
+    """Ordinal pattern of every embedding vector as an integer in ``[0, order!)``.
+
+    The code is the Lehmer code of the ranks (ties ranked by position),
+    computed with ``order * (order - 1) / 2`` vectorized comparisons.
+    """
+    embedded = _embed(x, order=order, delay=delay)
+    dtype = np.int16 if factorial(order) <= np.iinfo(np.int16).max else np.intp
+    codes = np.zeros(embedded.shape[:-1], dtype=dtype)
+    smaller = np.empty_like(codes)
+    for i in range(order - 1):
+        smaller[...] = 0
+        for j in range(i + 1, order):
+            smaller += embedded[..., j] < embedded[..., i]
+        smaller *= factorial(order - 1 - i)
+        codes += smaller
+    return codes
 
 
 def _embed(x, order=3, delay=1):
-    """Time-delay embedding of a 1-D or 2-D array."""
+    """Time-delay embedding along the last axis, ``(..., n_vectors, order)`` (a view)."""
     x = np.asarray(x)
     N = x.shape[-1]
-    assert x.ndim in [1, 2], "Only 1D or 2D arrays are currently supported."
     if order * delay > N:
         raise ValueError("Error: order * delay should be lower than x.size")
     if delay < 1:
         raise ValueError("Delay has to be at least 1.")
     if order < 2:
         raise ValueError("Order has to be at least 2.")
-
-    if x.ndim == 1:
-        Y = np.zeros((order, N - (order - 1) * delay))
-        for i in range(order):
-            Y[i] = x[(i * delay): (i * delay + Y.shape[1])]
-        return Y.T
-    else:
-        Y = []
-        embed_signal_length = N - (order - 1) * delay
-        indice = [[(i * delay), (i * delay + embed_signal_length)] for i in range(order)]
-        for i in range(order):
-            temp = x[:, indice[i][0]: indice[i][1]].reshape(-1, embed_signal_length, 1)
-            Y.append(temp)
-        Y = np.concatenate(Y, axis=-1)
-        return Y
+    return sliding_window_view(x, (order - 1) * delay + 1, axis=-1)[..., ::delay]
 
 
 def _xlogx(x, base=2):
@@ -2,6 +2,7 @@
 """Time helpers: add seconds to an acquisition time and format it."""
 
 import datetime
+import math
 
 
 def transfer_time(date_time, seconds, date_time_format="%d:%H:%M:%S", ms=False):
@@ -59,3 +60,55 @@ def second2time(second, ac_time, ms=False):
         ms_part = seconds_str.split(".")[1] if "." in seconds_str else "000"
         return (ac_time + datetime.timedelta(seconds=second)).strftime(f"%d:%H:%M:%S:{ms_part}")
     return (ac_time + datetime.timedelta(seconds=second)).strftime("%d:%H:%M:%S")
+
+
+class TimeFormatter:
+    """Format many seconds relative to one acquisition time.
+
+    Produces exactly the strings of :func:`second2time`, but instead of a
+    ``datetime + timedelta`` and ``strftime`` per call it splits the
+    offset into day/hour/minute/second with integer arithmetic and caches
+    the ``DD:HH:`` prefix of every hour it has seen. Used by the
+    annotation writer, which formats two times per event and state run.
+
+    Parameters
+    ----------
+    ac_time : datetime.datetime
+        Acquisition time.
+
+    Examples
+    --------
+    >>> import datetime
+    >>> fmt = TimeFormatter(datetime.datetime(2024, 1, 30, 23, 59, 0))
+    >>> fmt(90)
+    '31:00:00:30'
+    >>> fmt(30.25, ms=True)
+    '30:23:59:30:25'
+    """
+
+    def __init__(self, ac_time):
+        self._ac_time = ac_time
+        self._midnight = ac_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._base = ac_time.hour * 3600 + ac_time.minute * 60 + ac_time.second
+        self._prefix = {}
+
+    def _hour_prefix(self, hour):
+        prefix = self._prefix.get(hour)
+        if prefix is None:
+            day, hh = divmod(hour, 24)
+            date = self._midnight + datetime.timedelta(days=day)
+            prefix = self._prefix[hour] = f"{date.day:02d}:{hh:02d}:"
+        return prefix
+
+    def __call__(self, second, ms=False):
+        """Format ``second`` like ``second2time(second, ac_time, ms)``."""
+        if self._ac_time.microsecond:
+            return second2time(second, self._ac_time, ms=ms)
+        hour, rest = divmod(self._base + math.floor(second), 3600)
+        minute, sec = divmod(rest, 60)
+        text = f"{self._hour_prefix(hour)}{minute:02d}:{sec:02d}"
+        if ms:
+            seconds_str = str(second)
+            ms_part = seconds_str.split(".")[1] if "." in seconds_str else "000"
+            return f"{text}:{ms_part}"
+        return text
@@ -3,10 +3,15 @@
 
 These functions are used both by the GUI (embedded in Qt canvases) and by
 scripts/Jupyter notebooks to preview signals, spectra and hypnograms.
+:class:`~misleep.viz.envelope.MinMaxPyramid` gives the min/max envelopes the
+GUI draws long windows with, :func:`~misleep.viz.hypnogram.dominant_states`
+the per-pixel states of its hypnogram.
 """
 
 from .signals import plot_signals
 from .spectral import plot_spectrum, plot_spectrogram
-from .hypnogram import plot_hypno
+from .hypnogram import dominant_states, plot_hypno
+from .envelope import MinMaxPyramid
 
-__all__ = ["plot_signals", "plot_spectrum", "plot_spectrogram", "plot_hypno"]
+__all__ = ["plot_signals", "plot_spectrum", "plot_spectrogram", "plot_hypno", "MinMaxPyramid",
+           "dominant_states"]
@@ -1,7 +1,14 @@
 # -*- coding: UTF-8 -*-
-"""Visualization of hypnograms."""
+"""Visualization of hypnograms.
+
+:func:`dominant_states` reduces a per-second state sequence to a given
+number of equal time bins -- one per screen pixel -- so a hypnogram of
+days of scoring is drawn as a pixel-wide image instead of one rectangle
+per state run.
+"""
 
 import matplotlib.pyplot as plt
+import numpy as np
 
 DEFAULT_STATE_MAP = {1: "NREM", 2: "REM", 3: "Wake", 4: "Init"}
 
@@ -46,3 +53,51 @@ def plot_hypno(sleep_state, state_map=None, time_range=[0, -1]):
     ax.yaxis.set_ticks(list(state_map.keys()), list(state_map.values()))
 
     return fig, ax
+
+
+def dominant_states(sleep_state, n_bins, codes=None, first=0, last=None):
+    """Most frequent state of each of ``n_bins`` equal time bins.
+
+    Bin ``b`` covers the seconds ``[b * n // n_bins, (b + 1) * n // n_bins)``
+    of the ``n`` labels, so with ``n_bins <= n`` every bin holds at least
+    one label.
+
+    Parameters
+    ----------
+    sleep_state : array_like
+        Per-second state codes.
+    n_bins : int
+        Number of bins the whole sequence is divided into.
+    codes : sequence of int, optional
+        State codes counted, in tie-breaking order (the first wins).
+        Default is the codes occurring in ``sleep_state``, ascending.
+    first, last : int, optional
+        Only compute the bins ``first`` to ``last - 1``. Default is all.
+
+    Returns
+    -------
+    ndarray of int
+        The dominant code of every requested bin, or 0 for a bin where
+        none of ``codes`` occurs.
+    """
+    n = len(sleep_state)
+    if not isinstance(n_bins, (int, np.integer)) or not 0 < n_bins <= max(n, 1):
+        raise ValueError(f"'n_bins' should be between 1 and the number of labels ({n}), got {n_bins!r}")
+    last = n_bins if last is None else last
+    if not 0 <= first <= last <= n_bins:
+        raise ValueError(f"Invalid bin range [{first}, {last}) of {n_bins} bins")
+    edges = np.arange(first, last + 1, dtype=np.int64) * n // n_bins
+    states = np.asarray(sleep_state[edges[0]:edges[-1]])
+    if codes is None:
+        codes = np.unique(states)
+    codes = np.asarray(codes)
+    if codes.size == 0 or first == last:
+        return np.zeros(last - first, dtype=int)
+    local = edges - edges[0]
+    counts = np.empty((codes.size, last - first), dtype=np.int64)
+    for i, code in enumerate(codes):
+        cumulative = np.concatenate(([0], np.cumsum(states == code)))
+        counts[i] = cumulative[local[1:]] - cumulative[local[:-1]]
+    dominant = codes[np.argmax(counts, axis=0)].astype(int)
+    dominant[counts.max(axis=0) == 0] = 0
+    return dominant
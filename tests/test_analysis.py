@@ -6,7 +6,8 @@ import pytest
 
 from misleep.analysis.auto_stage import auto_stage_gbm, model_path, result_constraints
 from misleep.analysis.detection import SWA_detection, spindle_detection
-from misleep.analysis.features import get_data_features, split_window_data
+from misleep.analysis.features import get_data_features, split_window_data, window_view
+from misleep.analysis.stats import STATS_COLUMNS, cohort_stats, sleep_architecture, write_stats
 
 from helpers import make_emg, make_signal
 
@@ -66,6 +67,36 @@ def test_get_data_features():
     assert "EMG_delta_theta_ratio" not in emg_features.columns
 
 
+def test_get_data_features_from_window_view():
+    signal = make_signal()
+    windows = window_view(signal, 256, window_length=20, stride_length=5)
+    pairs = split_window_data(signal, 256, state=1, window_length=20, stride_length=5)
+    assert np.shares_memory(windows, signal)
+    assert windows.shape == (len(pairs) - 2, 256 * 20)  # truncated windows left out
+    assert np.array_equal(windows[-1], pairs[len(windows) - 1][0])
+
+    features = get_data_features(windows, 256, data_format="EEG", labels=1)
+    expected = get_data_features(pairs[:len(windows)], 256, data_format="EEG")
+    assert list(features.columns) == list(expected.columns)
+    assert np.allclose(features.drop(columns="label"), expected.drop(columns="label"))
+
+
+def test_perm_entropy_batched_matches_per_window():
+    from misleep.utils.entropy import perm_entropy
+
+    rng = np.random.default_rng(3)
+    windows = np.round(rng.standard_normal((20, 500)) * 3)  # quantized: ties
+    for order, delay in [(3, 1), (4, 2), (5, [1, 2, 3])]:
+        batched = perm_entropy(windows, order=order, delay=delay, normalize=True)
+        single = [perm_entropy(row, order=order, delay=delay, normalize=True) for row in windows]
+        assert batched.shape == (20,) and np.allclose(batched, single)
+    assert np.allclose(perm_entropy(windows.T, axis=0), perm_entropy(windows))
+    assert np.allclose(perm_entropy(windows.astype(np.float32)), perm_entropy(windows))
+    # Monotonic series: a single pattern
+    assert perm_entropy(np.arange(100.0)) == 0
+    assert np.isclose(perm_entropy(rng.standard_normal(100_000), normalize=True), 1, atol=1e-3)
+
+
 def test_result_constraints():
     probs = np.array([
         [0.9, 0.05, 0.05],
@@ -109,3 +140,48 @@ def test_auto_stage_gbm():
 def test_auto_stage_gbm_too_short():
     with pytest.raises(ValueError):
         auto_stage_gbm(EEG=np.zeros(256 * 5), EMG=np.zeros(256 * 5), label=[], sf=256)
+
+
+def test_extract_recording_reuses_filtered_channels():
+    from misleep.analysis.autostage.benchmark import extract_recording, filter_role
+
+    sf = 128.0
+    sig_map = {"eeg": make_signal(sf=sf, duration=120), "emg": make_emg(sf=sf, duration=120),
+               "acc": None}
+    reference = extract_recording(sig_map, sf)
+    filtered = {"eeg": filter_role(sig_map["eeg"], sf, "eeg")}
+    reused = extract_recording(sig_map, sf, filtered=filtered)
+    assert reused["feature_names"] == reference["feature_names"]
+    assert np.array_equal(reused["X"], reference["X"])
+
+
+def test_sleep_architecture(mianno):
+    stats = sleep_architecture(mianno, animal="m1", bin_sec=300)
+    assert list(stats.columns) == STATS_COLUMNS
+    whole = stats[stats["bin"] == -1].set_index(["metric", "state", "detail"])["value"]
+    assert whole[("duration", "NREM", "")] == 300
+    assert whole[("percentage", "NREM", "")] == 50
+    assert whole[("latency", "REM", "")] == 400
+    assert whole[("transitions", "Init", "NREM")] == 1
+    assert whole[("bout_hist", "NREM", "[256, 512)")] == 1
+    per_bin = stats[(stats["metric"] == "duration") & (stats["state"] == "NREM")]
+    assert per_bin["value"].tolist()[:2] == [200, 100]
+    # the Init -> NREM transition happens at 100 s, i.e. in bin 0
+    trans = stats[(stats["metric"] == "transitions") & (stats["value"] > 0) & (stats["bin"] >= 0)]
+    assert trans["bin"].tolist() == [0, 1, 1]
+
+
+def test_cohort_stats(tmp_path, mianno, midata):
+    from misleep.io import save_misleep_anno
+
+    path = tmp_path / "mouse2.txt"
+    save_misleep_anno(mianno, midata, str(path))
+    stats = cohort_stats([mianno, str(path)])
+    assert stats["animal"].unique().tolist() == ["0", "mouse2"]
+    first, second = (group.drop(columns="animal").reset_index(drop=True)
+                     for _, group in stats.groupby("animal"))
+    assert first.equals(second)
+    out = write_stats(stats, tmp_path / "cohort.csv")
+    assert out.exists()
+    with pytest.raises(ValueError):
+        write_stats(stats, tmp_path / "cohort.xlsx")
@@ -4,7 +4,7 @@
 import numpy as np
 import pytest
 
-from misleep.data import MiAnnotation, MiData
+from misleep.data import EventStore, MiAnnotation, MiData
 
 
 def test_midata_creation(midata):
@@ -88,6 +88,84 @@ def test_midata_filter(midata):
     assert midata.channels[-1].startswith("EEG_bandpass")
 
 
+def test_midata_filtered_signal_cache(midata):
+    from misleep.preprocessing.filtering import signal_filter
+
+    first = midata.filtered_signal("EEG", btype="bandpass", low=0.5, high=30)
+    expected, _ = signal_filter(midata.signals[0], sf=midata.sf[0], btype="bandpass",
+                                low=0.5, high=30)
+    assert np.allclose(first, expected)
+    assert not first.flags.writeable
+    assert midata.filtered_signal("EEG", btype="bandpass", low=0.5, high=30) is first
+    assert midata.cache.hits == 1
+
+    # MiData.filter reuses the cached version and adds it as a channel
+    midata.filter(chans=["EEG"], btype="bandpass", low=0.5, high=30)
+    assert midata.channels[-1] == "EEG_bandpass_0.5_30"
+    assert np.shares_memory(midata.signals[-1], first)
+
+    # Channel edits drop the derived signals
+    midata.rename_channels({"EEG": "EEG_F"})
+    assert len(midata.cache) == 0
+    assert midata.filtered_signal("EEG_F", btype="bandpass", low=0.5, high=30) is not first
+    midata.delete("EEG_F")
+    assert len(midata.cache) == 0
+    with pytest.raises(IndexError):
+        midata.filtered_signal("EEG_F")
+
+
+def test_midata_filtered_segment(midata):
+    from misleep.preprocessing.filtering import signal_filter
+
+    expected, _ = signal_filter(midata.signals[0], sf=midata.sf[0], btype="bandpass",
+                                low=0.5, high=30)
+    stop = midata.signals[0].size
+    for start, end in [(60000, 64000), (0, 3000), (stop - 3000, stop)]:
+        # only the padded segment is filtered, nothing is cached
+        segment = midata.filtered_segment("EEG", start, end, btype="bandpass", low=0.5, high=30)
+        assert np.allclose(segment, expected[start:end], atol=1e-6 * np.abs(expected).max())
+    assert len(midata.cache) == 0
+
+    whole = midata.filtered_signal("EEG", btype="bandpass", low=0.5, high=30)
+    segment = midata.filtered_segment("EEG", 5000, 9000, btype="bandpass", low=0.5, high=30)
+    assert np.shares_memory(segment, whole)
+
+
+def test_midata_epoch_spectra_cache(midata, tmp_path):
+    spectra = midata.epoch_spectra("EEG", band=[0.5, 30], cache_dir=tmp_path)
+    assert spectra.win_sec == 5 and spectra.freq[0] == 0.6  # 0.2 Hz bins
+    assert midata.epoch_spectra("EEG", band=[0.5, 30], cache_dir=tmp_path) is spectra
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    assert midata.epoch_spectra("EEG", band=[0.5, 20]) is not spectra
+    midata.rename_channels({"EEG": "EEG_F"})
+    assert len(midata.cache) == 0
+
+
+def test_signal_cache_lru_and_memory_cap():
+    import copy
+
+    from misleep.data.cache import SignalCache
+
+    cache = SignalCache(max_bytes=3 * 800)
+    for idx in range(3):
+        cache.put(("EEG", idx), np.zeros(100))
+    assert cache.nbytes == 2400
+    cache.get(("EEG", 0))                          # 0 becomes most recent
+    cache.put(("EMG", 0), np.zeros(100))           # evicts ("EEG", 1)
+    assert ("EEG", 1) not in cache and ("EEG", 0) in cache
+    cache.put(("EMG", 1), np.zeros(1000))          # larger than the cap: not kept
+    assert ("EMG", 1) not in cache and len(cache) == 3
+    assert cache.get_or_compute(("EEG", 0), lambda: 1 / 0) is not None
+
+    cache.invalidate("EEG")
+    assert len(cache) == 1 and cache.nbytes == 800
+    cache.max_bytes = 0
+    assert len(cache) == 0
+    assert len(copy.deepcopy(SignalCache())) == 0
+    with pytest.raises(ValueError):
+        SignalCache(max_bytes=-1)
+
+
 def test_midata_differential(midata):
     midata.differential(chan1="EEG", chan2="EMG")
     assert midata.channels[-1] == "EEG_EMG_DIFF"
@@ -139,3 +217,49 @@ def test_mianno_time_period(mianno):
 def test_mianno_custom_state_map():
     anno = MiAnnotation(sleep_state=[1, 2], state_map={1: "Slow", 2: "Fast"})
     assert anno.state_names == ["Slow", "Fast"]
+
+
+def test_mianno_events_are_indexed(mianno):
+    assert isinstance(mianno.marker, EventStore)
+    assert isinstance(mianno.start_end, EventStore)
+    assert mianno.marker.events_in(0, 40) == [[30.5, "injection"]]
+    assert mianno.marker.events_in(0, 10) == []
+    # an interval overlapping the window is returned even if it starts before
+    assert mianno.start_end.events_in(60, 100) == [[50, 70, "spindle"]]
+    assert mianno.start_end.events_in(71, 100) == []
+    # plain-list reassignment (as older code does) is re-wrapped
+    mianno._marker = [[5, "a"]]
+    assert mianno.marker.events_in(0, 10) == [[5, "a"]]
+
+
+def test_mianno_copy(mianno):
+    snapshot = mianno.copy()
+    mianno.sleep_state[0] = 2
+    mianno.marker.append([40, "late"])
+    mianno.start_end[0][2] = "edited"
+    assert snapshot.sleep_state[0] == 4
+    assert [40, "late"] not in snapshot.marker
+    assert snapshot.start_end[0][2] != "edited"
+    assert snapshot.state_map == mianno.state_map
+
+
+def test_event_store_matches_linear_scan():
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(0, 1000, 500)
+    events = [[s, s + d, "x"] for s, d in zip(starts, rng.uniform(0, 30, 500))]
+    store = EventStore(events, kind="start_end")
+    for lo, hi in [(0, 5), (100, 130), (500, 500), (990, 2000), (-10, -1)]:
+        expected = sorted((e for e in events if e[0] <= hi and e[1] >= lo),
+                          key=lambda e: e[0])
+        assert store.events_in(lo, hi) == expected
+    # every list mutation drops the index
+    store.append([-5, -4, "new"])
+    assert store.events_in(-10, -1) == [[-5, -4, "new"]]
+    store.pop()
+    assert store.count_in(-10, -1) == 0
+    store += [[2000, 2001, "late"]]
+    assert store.events_in(1999, 3000) == [[2000, 2001, "late"]]
+    store.remove([2000, 2001, "late"])
+    assert store.events_in(1999, 3000) == []
+    with pytest.raises(ValueError):
+        EventStore([], kind="bogus")
@@ -224,6 +224,7 @@ def test_gui_spectrum_window(tmp_path, monkeypatch):
 
     window = MainWindow()
     window.open_data(str(__import__("pathlib").Path(__file__).parent / "data" / "10mins_example_mat.mat"))
+    window._wait_io()
     window.show()
     app.processEvents()
 
@@ -239,6 +240,46 @@ def test_gui_spectrum_window(tmp_path, monkeypatch):
     window.close()
 
 
+@pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
+def test_gui_persisted_spectra_share_the_data_sidecar(tmp_path):
+    """The spectrogram strip and the state spectral analysis persist next to the data."""
+    import datetime
+
+    import numpy as np
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    from misleep.data import MiAnnotation, MiData
+    from misleep.gui.dialogs import StateSpectralDialog
+    from misleep.gui.main_window import MainWindow
+
+    rng = np.random.default_rng(0)
+    data = MiData(signals=[rng.standard_normal(64 * 600)], channels=["EEG"], sf=[64.0],
+                  time="20240409-18:00:00")
+    window = MainWindow()
+    window.midata = data
+    window.mianno = MiAnnotation([1] * 300 + [2] * 300)
+    window.ac_time = datetime.datetime.strptime(data.time, "%Y%m%d-%H:%M:%S")
+    window.data_path = str(tmp_path / "rec.mat")
+    window.config["spec"]["persist_spectra"] = "true"
+    # opening an annotation points the open path elsewhere
+    window.config["gui"]["openpath"] = str(tmp_path / "rec_anno.txt")
+
+    window._spectrogram_tiles().window(0, 100)
+    dialog = StateSpectralDialog(config=window.config)
+    dialog.dialog_show(channels=data.channels)
+    dialog.spectral_task(data, window.mianno, window.config,
+                         data_path=window.data_path)(lambda *a: None)
+    app.processEvents()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["rec.mat.spectra"]
+    # spectrogram tiles plus the whole-channel state spectra
+    assert len(list((tmp_path / "rec.mat.spectra").rglob("*.npz"))) >= 2
+
+    window.is_saved = True
+    window.close()
+
+
 @pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
 def test_gui_move_channel_buttons():
     """The Up/Down buttons move the selected channel and keep names."""
@@ -385,6 +426,256 @@ def test_gui_wheel_page_flip():
     window.close()
 
 
+@pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
+def test_gui_blit_page_flip():
+    """Page flips blit the per-page artists over the cached background."""
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+
+    import datetime
+
+    import numpy as np
+
+    from misleep.data import MiData
+    from misleep.gui.main_window import MainWindow
+
+    rng = np.random.default_rng(0)
+    sf = 256.0
+    data = MiData(
+        signals=[rng.standard_normal(int(sf * 1800)) * 50,
+                 rng.standard_normal(int(sf * 1800)) * 30],
+        channels=["EEG", "EMG"], sf=[sf, sf], time="20240409-18:00:00")
+    window = MainWindow()
+    window.midata = data
+    window.ac_time = datetime.datetime.strptime(data.time, "%Y%m%d-%H:%M:%S")
+    window.fill_channel_listView()
+    window.check_show()
+    window.show()
+    app.processEvents()
+    window.show_duration = 300
+    window.mianno.sleep_state[:600] = [1] * 200 + [2] * 400
+    window.mianno.marker.append([450.5, "injection"])
+    window.redraw_all(0)
+    app.processEvents()
+
+    blits = []
+    update = window._signal_blit.update
+
+    def recording_update(key=None, axes=None):
+        blits.append(update(key, axes=axes))
+        return blits[-1]
+
+    window._signal_blit.update = recording_update
+    window.next_page()
+    app.processEvents()
+    assert blits == [True]
+    # the sleep states are one collection per box, the trace an envelope
+    trace, states, grid = window._page_artists[1]
+    assert len(states.get_paths()) == 2
+    assert len(trace.get_xdata()) < 300 * sf
+    # a blitted page looks exactly like a full redraw
+    blitted = np.asarray(window.signal_canvas.buffer_rgba()).copy()
+    window.signal_canvas.draw()
+    assert np.array_equal(blitted, np.asarray(window.signal_canvas.buffer_rgba()))
+
+    window.is_saved = True
+    window.close()
+
+
+@pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
+def test_gui_prefetch_adjacent_pages():
+    """The next page is prepared in the background; stale state runs are redone."""
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+
+    import datetime
+
+    import numpy as np
+
+    from misleep.data import MiData
+    from misleep.gui.main_window import MainWindow
+
+    rng = np.random.default_rng(0)
+    sf = 256.0
+    data = MiData(
+        signals=[rng.standard_normal(int(sf * 1800)) * 50,
+                 rng.standard_normal(int(sf * 1800)) * 30],
+        channels=["EEG", "EMG"], sf=[sf, sf], time="20240409-18:00:00")
+    window = MainWindow()
+    window.midata = data
+    window.ac_time = datetime.datetime.strptime(data.time, "%Y%m%d-%H:%M:%S")
+    window.fill_channel_listView()
+    window.check_show()
+    window.show()
+    app.processEvents()
+    window.show_duration = 300
+    window.mianno.sleep_state[:900] = [1] * 900
+    window.redraw_all(0)
+    app.processEvents()
+
+    # labels applied after the next page was prepared
+    window.mianno.sleep_state[300:400] = [2] * 100
+    hits = window._prefetch.hits
+    window.next_page()
+    app.processEvents()
+    assert window._prefetch.hits >= hits + 2 + len(window.show_idx)
+    trace, states, grid = window._page_artists[1]
+    assert len(states.get_paths()) == 2
+    key, compute = window._trace_job(0, 300, window._trace_bins(window.signal_ax[1]))
+    assert np.array_equal(trace.get_ydata(), compute()[1])
+
+    window.is_saved = True
+    window.close()
+
+
+@pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
+def test_gui_background_task(monkeypatch):
+    """Analysis work runs off the UI thread, reports progress and can be cancelled."""
+    import threading
+    import time
+
+    from PySide6.QtWidgets import QApplication, QMessageBox
+
+    app = QApplication.instance() or QApplication([])
+    from misleep.gui.main_window import MainWindow
+
+    window = MainWindow()
+    messages = []
+    monkeypatch.setattr(
+        QMessageBox, "about",
+        staticmethod(lambda *args, **kwargs: messages.append(args[1:])))
+
+    def wait():
+        deadline = time.monotonic() + 10
+        while window._task is not None and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.005)
+        assert window._task is None
+
+    progress, results = [], []
+    connected = threading.Event()
+
+    def work(report):
+        connected.wait(5)
+        for percent in (25, 50, 75):
+            report(percent, "step")
+        return threading.current_thread() is threading.main_thread()
+
+    task = window._run_task("Test", work, results.append)
+    task.signals.progress.connect(lambda percent, message: progress.append(percent))
+    connected.set()
+    assert window._run_task("Other", work, results.append) is None  # one at a time
+    wait()
+    assert results == [False] and progress[-1] == 75
+
+    window._run_task("Test", lambda report: 1 / 0, results.append)
+    wait()
+    assert results == [False] and "division" in messages[-1][1]
+
+    def endless(report):
+        while True:
+            report(10, "waiting")
+            time.sleep(0.01)
+
+    window._run_task("Test", endless, results.append)
+    window._task.cancel()
+    wait()
+    assert results == [False]
+
+    # an annotation opened meanwhile drops the result built from the old one
+    from misleep.data import MiAnnotation
+
+    connected.clear()
+    window._run_task("Test", work, results.append)
+    window.mianno = MiAnnotation([1] * 10)
+    connected.set()
+    wait()
+    assert results == [False]
+
+    window.is_saved = True
+    window.close()
+
+
+@pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
+def test_gui_qpainter_signal_view():
+    """The QPainter signal view replaces the canvas, paints pages and maps clicks."""
+    from PySide6.QtCore import QPointF
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+
+    import datetime
+
+    import numpy as np
+
+    from misleep.data import MiData
+    from misleep.gui.main_window import MainWindow
+    from misleep.gui.signal_view import polyline_path
+
+    path = polyline_path([(0, 0), (1, 1), (np.nan, 2)], [(5, 5), (6, 5)])
+    assert path.elementCount() == 4
+    assert not path.elementAt(2).isLineTo()  # second subpath starts
+
+    rng = np.random.default_rng(0)
+    sf = 256.0
+    data = MiData(
+        signals=[rng.standard_normal(int(sf * 1800)) * 50,
+                 rng.standard_normal(int(sf * 1800)) * 30],
+        channels=["EEG", "EMG"], sf=[sf, sf], time="20240409-18:00:00")
+    window = MainWindow()
+    window.midata = data
+    window.ac_time = datetime.datetime.strptime(data.time, "%Y%m%d-%H:%M:%S")
+    window.fill_channel_listView()
+    window.check_show()
+    window.show()
+    app.processEvents()
+    window.show_duration = 300
+    window.mianno.sleep_state[:600] = [1] * 200 + [2] * 400
+    window._set_signal_view("qpainter")
+    app.processEvents()
+    view = window.signal_view
+    assert window.SignalArea.widget() is view and view.isVisible()
+    window.next_page()
+    app.processEvents()
+    image = view.grab().toImage()
+    assert image.width() == view.width()
+
+    # the page is painted: the REM background covers the first channel box
+    ax = window.signal_ax[1]
+    x0, y0, x1, y1 = ax.bbox.extents
+    scale = view.width() / window.signal_figure.bbox.width
+    height = window.signal_figure.bbox.height
+    face = [round(c * 255) for c in ax.get_facecolor()[:3]]
+    pixels = [image.pixelColor(int(x * scale), int((height - y) * scale))
+              for x in np.linspace(x0 + 3, x1 - 3, 20) for y in np.linspace(y0 + 3, y1 - 3, 10)]
+    painted = [p for p in pixels if max(abs(a - b) for a, b in
+                                        zip((p.red(), p.green(), p.blue()), face)) > 8]
+    assert len(painted) > 0.9 * len(pixels)
+
+    # clearing repaints the visible view, not the hidden canvas
+    repaints = []
+    view.repaint = lambda: repaints.append(True)
+    window.clear_refresh()
+    del view.repaint
+    assert repaints
+
+    # a click in the middle of the first channel box hits that axes
+    event = view.event_at(QPointF((x0 + x1) / 2 * scale, (height - (y0 + y1) / 2) * scale), 3)
+    assert event.inaxes is ax and event.button == 3
+    assert abs(event.xdata - 150 * sf) < 2 * sf
+
+    # back to matplotlib: the canvas is shown again and still alive
+    window._set_signal_view("matplotlib")
+    assert window.SignalArea.widget() is window.signal_canvas
+    window.next_page()
+    app.processEvents()
+
+    window.is_saved = True
+    window.close()
+
+
 @pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
 def test_gui_event_list_dialog():
     """Marker / start-end list viewer: see, jump, delete."""
@@ -424,6 +715,7 @@ def test_gui_event_list_dialog():
     dialog.list.setCurrentRow(0)
     dialog._delete()
     assert len(window.mianno.marker) == 0
+    assert dialog.list.count() == 0
 
     window.is_saved = True
     window.close()
@@ -503,6 +795,7 @@ def test_gui_state_buttons_and_shortcuts(monkeypatch, tmp_path):
 
     window = MainWindow()
     window.open_data(str(__import__("pathlib").Path(__file__).parent / "data" / "10mins_example_mat.mat"))
+    window._wait_io()
     window.show()
     app.processEvents()
 
@@ -749,6 +1042,7 @@ def test_data_export_always_restores_main_window(tmp_path, monkeypatch):
         QFileDialog, "getSaveFileName",
         staticmethod(lambda *args, **kwargs: (str(output), "")))
     window.save_data()
+    window._wait_io()
     assert output.exists()
     assert window.isEnabled()
 
@@ -756,6 +1050,7 @@ def test_data_export_always_restores_main_window(tmp_path, monkeypatch):
         SaveThread, "save_data",
         lambda self: (_ for _ in ()).throw(OSError("simulated failure")))
     window.save_data()
+    window._wait_io()
     assert window.isEnabled()
     assert any("simulated failure" in text for message in messages
                for text in message)
@@ -766,6 +1061,158 @@ def test_data_export_always_restores_main_window(tmp_path, monkeypatch):
     app.processEvents()
 
 
+@pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
+def test_gui_background_load_and_save(tmp_path):
+    """Files are read and written in worker threads; edits made meanwhile are kept."""
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+
+    from misleep.gui.main_window import MainWindow
+    from misleep.io import load_misleep_anno
+
+    window = MainWindow()
+    data_path = str(__import__("pathlib").Path(__file__).parent / "data" / "10mins_example_mat.mat")
+    anno_path = tmp_path / "anno.txt"
+    anno_path.write_text("")
+    loader = window.open_data(data_path)
+    window.open_annotation(str(anno_path))  # applied once the data is read
+    assert loader is not None and window.midata is None
+    window._wait_io()
+    assert window.midata is not None and window.anno_path == str(anno_path)
+    app.processEvents()
+
+    window.start_end = [10, 20]
+    window.append_sleep_state(sleep_type=1)
+    window.save_anno()
+    window.start_end = [30, 40]
+    window.append_sleep_state(sleep_type=2)  # while the save runs
+    window.save_anno()  # queued behind the running one
+    window._wait_io()
+    assert window.is_saved
+    saved = load_misleep_anno(str(anno_path))
+    assert saved.sleep_state[10:20] == [1] * 10 and saved.sleep_state[30:40] == [2] * 10
+
+    window.save_timer.stop()
+    window.close()
+
+
+@pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
+def test_gui_progressive_open():
+    """The first page is drawn first; hypnogram, scroll range and strip follow."""
+    import datetime
+    import time
+
+    import numpy as np
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    from misleep.data import MiData
+    from misleep.gui.main_window import MainWindow
+
+    sf = 128.0
+    data = MiData(signals=[np.random.default_rng(0).standard_normal(int(sf * 3600))],
+                  channels=["EEG"], sf=[sf], time="20240409-18:00:00")
+    window = MainWindow()
+    window.show()
+    window.midata = data
+    window.ac_time = datetime.datetime.strptime(data.time, "%Y%m%d-%H:%M:%S")
+    window.check_show()
+    assert window._page_artists[1][0].get_xdata().size > 0
+    assert window._hypo_key is None and window._spec_artist is None
+    assert window.ScrollerBar.maximum() < 3600 - window.show_duration
+
+    deadline = time.monotonic() + 10
+    while (window._spec_task is not None or window._hypo_key is None) \
+            and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    assert window._hypo_key is not None and window._spec_artist is not None
+    assert window.ScrollerBar.maximum() == 3600 - window.show_duration
+
+    window.is_saved = True
+    window.close()
+
+
+@pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
+def test_gui_hypnogram_level_of_detail():
+    """The hypnogram is a per-pixel image; labeling patches only its columns."""
+    import datetime
+
+    import numpy as np
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    from misleep.data import MiAnnotation, MiData
+    from misleep.gui.main_window import MainWindow
+
+    n = 86400
+    data = MiData(signals=[np.zeros(n * 64, dtype=np.float32)], channels=["EEG"], sf=[64.0],
+                  time="20240409-18:00:00")
+    states = np.repeat(np.random.default_rng(0).integers(1, 5, n // 10), 10).tolist()
+    window = MainWindow()
+    window.show()
+    window.midata = data
+    window.ac_time = datetime.datetime.strptime(data.time, "%Y%m%d-%H:%M:%S")
+    window.mianno = MiAnnotation(states, marker=[[5.0, "a"], [5.5, "b"], [40000.0, "c"]])
+    window.check_show()
+    app.processEvents()
+    window.plot_hypo()
+    n_cols = window._hypo_rgba.shape[1]
+    assert n_cols == int(window.hypo_ax.get_window_extent().width) < n
+    assert len(window._hypo_markers.get_segments()) == 2  # a and b share a column
+
+    window.start_end = [3000, 9000]
+    window.append_sleep_state(sleep_type=3)
+    assert np.array_equal(window._hypo_rgba, window._hypo_raster(n_cols, 0, n_cols))
+
+    window.is_saved = True
+    window.close()
+
+
+@pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
+def test_gui_label_updates_state_runs_in_place():
+    """Labeling recolors the page's state collections and blits the channel boxes."""
+    import datetime
+
+    import numpy as np
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    from misleep.data import MiAnnotation, MiData
+    from misleep.gui.main_window import MainWindow
+    from misleep.utils import lst2group
+
+    rng = np.random.default_rng(0)
+    data = MiData(signals=[rng.standard_normal(64 * 600) for _ in range(2)],
+                  channels=["EEG", "EMG"], sf=[64.0, 64.0], time="20240409-18:00:00")
+    window = MainWindow()
+    window.show()
+    window.midata = data
+    window.ac_time = datetime.datetime.strptime(data.time, "%Y%m%d-%H:%M:%S")
+    window.mianno = MiAnnotation([4] * 600)
+    window.check_show()
+    app.processEvents()
+    ax = window.signal_ax[1]
+    n_artists = len(ax.get_children())
+
+    for start_end, state in (([5, 15], 1), ([10, 20], 2), ([15, 25], 1), ([0, 40], 3)):
+        window.start_end = start_end
+        window.append_sleep_state(sleep_type=state)
+        page = window.mianno.sleep_state[:window.show_duration + 1]
+        assert window._page_runs == lst2group(enumerate(page))
+        assert len(ax.get_children()) == n_artists
+    states = window._page_artists[1][1]
+    assert len(states.get_paths()) == len(window._page_runs)
+
+    blitted = np.asarray(window.signal_canvas.buffer_rgba()).copy()
+    window.signal_canvas.draw()
+    assert np.array_equal(blitted, np.asarray(window.signal_canvas.buffer_rgba()))
+
+    window.is_saved = True
+    window.close()
+
+
 @pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
 def test_gui_with_data(tmp_path):
     from PySide6.QtWidgets import QApplication
@@ -796,3 +1243,49 @@ def test_gui_with_data(tmp_path):
     assert window.total_seconds == 120
     window.is_saved = True
     window.close()
+
+
+@pytest.mark.skipif(not _pyside6_available(), reason="PySide6 not installed")
+def test_gui_auto_save_uses_journal(tmp_path):
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+
+    import datetime
+
+    import numpy as np
+
+    from misleep.data import MiData
+    from misleep.gui.main_window import MainWindow
+    from misleep.io import load_misleep_anno, save_misleep_anno
+
+    data = MiData(signals=[np.zeros(256 * 100)], channels=["EEG"], sf=[256.0],
+                  time="20240409-18:00:00")
+    window = MainWindow()
+    window.midata = data
+    window.ac_time = datetime.datetime.strptime(data.time, "%Y%m%d-%H:%M:%S")
+    window.check_show()
+    anno_path = tmp_path / "anno.txt"
+    save_misleep_anno(window.mianno, data, str(anno_path))
+    window.anno_path = str(anno_path)
+    before = anno_path.read_text()
+
+    window.start_end = [10, 20]
+    window.append_sleep_state(sleep_type=1)
+    window.auto_save()
+    journal = anno_path.with_name("anno.txt.journal")
+    assert window.is_saved and journal.exists()
+    assert anno_path.read_text() == before  # only the journal was written
+    assert load_misleep_anno(str(anno_path)).sleep_state[10:20] == [1] * 10
+
+    # bulk edits force a full save, which compacts the journal away
+    window._journal_full_save = True
+    window.is_saved = False
+    window.auto_save()
+    window._wait_io()
+    assert not journal.exists()
+    assert load_misleep_anno(str(anno_path)).sleep_state[10:20] == [1] * 10
+
+    window.save_timer.stop()
+    window.is_saved = True
+    window.close()
@@ -7,6 +7,7 @@ import numpy as np
 import pytest
 
 from misleep.io import (
+    AnnotationJournal,
     load_annotation,
     load_csv,
     load_edf,
@@ -27,6 +28,7 @@ from misleep.io.base import (
     write_signal,
 )
 from misleep.io.mat import load_mat
+from misleep.utils.time_utils import TimeFormatter, second2time
 
 DATA_DIR = __import__("pathlib").Path(__file__).parent / "data"
 
@@ -206,6 +208,60 @@ def test_misleep_anno_round_trip(tmp_path, mianno, midata):
     assert loaded.start_end == mianno.start_end
 
 
+def test_time_formatter_matches_second2time():
+    ac_time = datetime.datetime(2024, 2, 28, 23, 59, 30)
+    fmt = TimeFormatter(ac_time)
+    for second in [0, 29, 30, 86400 * 2 + 7, 3599.5, 12.345, 700000.001, -45]:
+        assert fmt(second) == second2time(second, ac_time)
+        assert fmt(second, ms=True) == second2time(second, ac_time, ms=True)
+
+
+def test_annotation_journal_replay(tmp_path, mianno, midata):
+    out = tmp_path / "anno.txt"
+    save_misleep_anno(mianno, midata, str(out))
+    journal = AnnotationJournal(str(out))
+    journal.record_state(0, 10, 3)
+    journal.record_marker([100.25, "drug"])
+    journal.record_marker(mianno.marker[0], removed=True)
+    journal.record_start_end([5, 6, "SWA"])
+    assert journal.flush() == 4 and journal.pending == 0
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('["state", 0, ')  # truncated by a crash mid-flush
+
+    loaded = load_misleep_anno(str(out))
+    assert loaded.sleep_state[:11] == [3] * 10 + [4]
+    assert loaded.marker == [[100.25, "drug"]]
+    assert loaded.start_end == [[50, 70, "spindle"], [5, 6, "SWA"]]
+    assert load_misleep_anno(str(out), journal=False).marker == mianno.marker
+
+    journal.reset()
+    assert not journal.exists()
+    assert load_misleep_anno(str(out)).marker == mianno.marker
+
+
+def test_load_misleep_anno_legacy_and_invalid(tmp_path):
+    # old MiSleep files label from second 1 with inclusive ends
+    legacy = tmp_path / "legacy.txt"
+    legacy.write_text(
+        "READ ONLY! DO NOT EDIT!\n4-INIT 3-Wake 2-REM 1-NREM\n"
+        "Save time: 2024-04-09 18:00:00\nAcquisition time: 2024-04-09 18:00:00\n"
+        "==========Marker==========\n"
+        "09:18:00:05:0, 5.0, 1, 09:18:00:05:0, 5.0, 0, 1, injection\n"
+        "==========Start-End==========\n"
+        "==========Sleep state==========\n"
+        "09:18:00:01, 1, 1, 09:18:00:03, 3, 0, 4, INIT\n"
+        "09:18:00:04, 4, 1, 09:18:00:05, 5, 0, 1, NREM")
+    loaded = load_misleep_anno(str(legacy))
+    assert loaded.sleep_state == [4, 4, 4, 1, 1]
+    assert loaded.marker == [[5.0, "injection"]]
+    assert loaded.start_end == []
+
+    invalid = tmp_path / "invalid.txt"
+    invalid.write_text("==========Marker==========\n==========Start-End==========")
+    with pytest.raises(AssertionError):
+        load_misleep_anno(str(invalid))
+
+
 def test_load_misleep_anno_empty(tmp_path):
     empty = tmp_path / "empty.txt"
     empty.write_text("")
@@ -221,3 +277,22 @@ def test_transfer_result(mianno):
     assert "label" in start_end_df.columns
     assert "timestamp" in marker_df.columns
     assert len(marker_df) == 1  # one marker
+    # 600 s in one hourly bin: NREM 300 s, REM 100 s, Wake 100 s (one bout each)
+    row = analyse_df.iloc[0]
+    assert (row["NREM_duration"], row["NREM_bout"], row["REM_duration"]) == (300, 1, 100)
+    assert df["state"].tolist()[-1] == "MARKER"
+
+
+def test_transfer_result_custom_bins(mianno):
+    ac_time = datetime.datetime(2024, 4, 9, 18, 0, 0)
+    df, analyse_df, _, _ = transfer_result(mianno, ac_time, bin_size=120)
+    bins = analyse_df.iloc[:5]
+    assert bins["date_time"].tolist()[1] == "2024-04-09 18:02:00"
+    # runs crossing a bin boundary are split: NREM 100-400 s covers 3 bins
+    assert bins["NREM_duration"].tolist() == [20, 120, 120, 40, 0]
+    assert bins["NREM_bout"].tolist() == [1, 1, 1, 1, 0]
+    assert (df["state"] == "MARKER").sum() == 5
+    _, zt_df, _, _ = transfer_result(mianno, ac_time, bin_size="zt_block")
+    assert zt_df["NREM_duration"].iloc[0] == 300
+    with pytest.raises(ValueError):
+        transfer_result(mianno, ac_time, bin_size="week")
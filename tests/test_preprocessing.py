@@ -5,8 +5,26 @@ import numpy as np
 import pytest
 
 from misleep.preprocessing.artifacts import reject_artifact, z_score
-from misleep.preprocessing.filtering import filter_power_line_noise, signal_filter
-from misleep.preprocessing.spectral import band_power, spectrogram, spectrum
+from misleep.preprocessing.epoch_spectra import EpochSpectra, SpectrogramTiles
+from misleep.preprocessing.filtering import (
+    design_sos,
+    fftfiltfilt,
+    filter_power_line_noise,
+    notch_sos,
+    signal_filter,
+    sosfiltfilt_chunked,
+)
+from misleep.preprocessing.spectral import (
+    band_power,
+    epoch_multitaper,
+    epoch_psd,
+    epoch_states,
+    epoch_std,
+    reject_epochs,
+    spectral_kernel,
+    spectrogram,
+    spectrum,
+)
 
 
 def test_signal_filter_types():
@@ -31,6 +49,75 @@ def test_signal_filter_bandpass_removes_out_of_band():
     assert spec[idx_60] < spec[idx_2]
 
 
+def test_signal_filter_matches_ba_filtfilt_and_batches_channels():
+    from scipy import signal as sps
+
+    sf = 256.0
+    x = np.random.default_rng(0).standard_normal(int(sf * 60))
+    b, a = sps.iirfilter(3, np.divide([0.5, 30], sf / 2), btype="bandpass")
+    single, _ = signal_filter(x, sf=sf, btype="bandpass", low=0.5, high=30)
+    assert np.allclose(single, sps.filtfilt(b, a, x), atol=1e-8)
+    block, _ = signal_filter(np.vstack([x, 2 * x]), sf=sf, btype="bandpass", low=0.5, high=30)
+    assert block.shape == (2, x.size)
+    assert np.allclose(block[1], 2 * single)
+
+
+def test_design_sos_is_cached():
+    first = design_sos("bandpass", low=0.5, high=30, sf=1000.0)
+    second = design_sos("bandpass", low=0.5, high=30, sf=1000)
+    assert np.array_equal(first, second) and first is not second
+    assert first.shape == (3, 6)
+    fused = notch_sos([[47, 53], [97, 103]], sf=1000.0)
+    assert fused.shape == (6, 6)
+
+
+def test_sosfiltfilt_chunked_matches_full_signal(tmp_path):
+    from scipy import signal
+
+    sf = 256.0
+    x = np.random.default_rng(3).standard_normal((2, int(sf * 600)))
+    sos = design_sos("bandpass", low=0.5, high=30, sf=sf)
+    full = signal.sosfiltfilt(sos, x, axis=-1)
+
+    chunked = sosfiltfilt_chunked(x, sos, chunk_size=10_000)
+    assert np.allclose(chunked, full, atol=1e-7)
+
+    # Memory-mapped input and output
+    src = np.lib.format.open_memmap(tmp_path / "x.npy", mode="w+", dtype=float, shape=x.shape)
+    src[:] = x
+    dst = np.lib.format.open_memmap(tmp_path / "y.npy", mode="w+", dtype=float, shape=x.shape)
+    filtered, fname = signal_filter(src[0], sf=sf, btype="bandpass", low=0.5, high=30,
+                                    chunk_size=25_000, out=dst[0])
+    assert fname == "bandpass_0.5_30"
+    assert np.allclose(dst[0], full[0], atol=1e-7)
+
+    with pytest.raises(ValueError):
+        sosfiltfilt_chunked(x, sos, chunk_size=0)
+    with pytest.raises(ValueError):
+        sosfiltfilt_chunked(x, sos, out=np.empty(10))
+
+
+def test_fft_method_matches_sosfiltfilt():
+    from scipy import signal
+
+    sf = 256.0
+    x = np.random.default_rng(4).standard_normal((2, int(sf * 900)))
+    for btype, low, high in (("bandpass", 0.5, 30), ("highpass", 0.5, 0), ("bandstop", 47, 53)):
+        sos = design_sos(btype, low=low, high=high, sf=sf)
+        full = signal.sosfiltfilt(sos, x, axis=-1)
+        assert np.allclose(fftfiltfilt(x, sos, block_size=20_000), full, atol=1e-6)
+
+    filtered, _ = signal_filter(x[0], sf=sf, btype="bandpass", low=0.5, high=30, method="fft")
+    reference, _ = signal_filter(x[0], sf=sf, btype="bandpass", low=0.5, high=30)
+    assert np.allclose(filtered, reference, atol=1e-6)
+    # Short signals fall back to sosfiltfilt
+    short, _ = signal_filter(x[0, :500], sf=sf, btype="lowpass", high=30, method="fft")
+    assert np.allclose(short, signal_filter(x[0, :500], sf=sf, btype="lowpass", high=30)[0])
+
+    with pytest.raises(ValueError):
+        signal_filter(x[0], sf=sf, method="wavelet")
+
+
 def test_filter_power_line_noise():
     sf = 256.0
     t = np.arange(sf * 10) / sf
@@ -83,11 +170,162 @@ def test_spectrogram(midata):
     assert np.all(Sxx >= 0)
 
 
+def test_spectrogram_matches_stft_and_reuses_buffers():
+    from scipy.signal import stft
+
+    sf = 256.0
+    x = np.random.default_rng(7).standard_normal(int(sf * 60) + 3)
+    f, t, Sxx = spectrogram(x, sf, band=[0.5, 30], step=0.2, win_sec=2)
+    freq, times, Z = stft(x, sf, nperseg=512, noverlap=int(512 - 0.2 * sf), padded=False,
+                          boundary="zeros")
+    idx = (np.round(freq, 2) >= 0.5) & (np.round(freq, 2) <= 30)
+    assert np.array_equal(f, np.round(freq, 2)[idx]) and np.allclose(t, times)
+    assert np.allclose(Sxx, np.abs(Z[idx]) ** 2)
+
+    # Same kernel (shared frequency axis), float32 output, in-place buffer
+    f32, _, single = spectrogram(x, sf, band=[0.5, 30], step=0.2, win_sec=2,
+                                 dtype=np.float32)
+    assert f32 is f and single.dtype == np.float32
+    assert np.allclose(single, Sxx, rtol=1e-3, atol=1e-6 * Sxx.max())
+    _, _, again = spectrogram(x[::-1].copy(), sf, band=[0.5, 30], step=0.2, win_sec=2,
+                              out=single)
+    assert again is single
+    with pytest.raises(ValueError):
+        spectrogram(x[:1000], sf, band=[0.5, 30], step=0.2, win_sec=2, out=single)
+
+    # Several signals in one call
+    _, _, batch = spectrogram(np.stack([x, 2 * x]), sf, band=[0.5, 30], step=0.2, win_sec=2)
+    assert batch.shape == (2,) + Sxx.shape and np.allclose(batch[1], 4 * Sxx)
+    powers = band_power(batch.sum(axis=-1), f, bands=[[0.5, 4, "delta"]], relative=True)
+    assert np.allclose(powers["delta"][0], powers["delta"][1])
+
+    kernel = spectral_kernel(sf, 512, band=[0.5, 30])
+    assert kernel.freq is f and kernel.keep == slice(1, 61) and kernel.nfft == 512
+    assert not kernel.freq.flags.writeable
+
+
 def test_spectrogram_validation():
     with pytest.raises(ValueError):
         spectrogram(np.zeros(1000), 256, step=5, win_sec=2)  # step > win_sec
 
 
+def test_epoch_psd_rows_average_to_welch():
+    from scipy.signal import welch
+
+    sf = 128.0
+    x = np.random.default_rng(5).standard_normal(int(sf * 120))
+    freq, times, psd = epoch_psd(x, sf, win_sec=10)
+    assert psd.shape == (23, freq.size) and times[1] == 5
+    _, reference = welch(x, sf, nperseg=int(sf * 10))
+    assert np.allclose(psd.mean(axis=0), reference)
+
+    freq, _, banded = epoch_psd(x, sf, win_sec=10, band=[0.5, 30], dtype=np.float32)
+    assert freq[0] == 0.5 and freq[-1] == 30 and banded.dtype == np.float32
+    assert epoch_psd(x[:100], sf, win_sec=10)[2].shape[0] == 0
+
+    # Windows spanning two states are excluded
+    sleep_state = [1] * 60 + [3] * 60
+    states = epoch_states(times, 10, sleep_state)
+    assert list(states[:11]) == [1] * 11 and states[11] == -1 and states[12] == 3
+
+    sd = epoch_std(x, sf, win_sec=10)
+    sd[3] = 100
+    keep = reject_epochs(sd, states == 1, threshold=2)
+    assert not keep[3] and keep[:3].all() and not keep[12:].any()
+
+
+def test_epoch_spectra_slicing_band_power_and_persistence(tmp_path):
+    sf = 128.0
+    x = np.random.default_rng(6).standard_normal(int(sf * 60))
+    spectra = EpochSpectra.compute(x, sf, band=[0.5, 30])
+    assert spectra.psd.dtype == np.float32 and not spectra.psd.flags.writeable
+    assert spectra.n_epochs == 56 and spectra.centers[0] == 2.5
+
+    page = spectra.slice(10, 20)
+    assert page.centers[0] == 10.5 and page.centers[-1] == 19.5
+    assert np.shares_memory(page.psd, spectra.psd)
+
+    powers = spectra.band_power([[0.5, 4, "delta"], [4, 9, "theta"]], relative=True)
+    _, psd = epoch_psd(x, sf, win_sec=5, step_sec=1, band=[0.5, 30])[1:]
+    expected = band_power(psd[7], spectra.freq, bands=[[0.5, 4, "delta"]], relative=True)
+    assert powers["delta"].shape == (56,)
+    assert np.isclose(powers["delta"][7], expected["delta"], rtol=1e-4)
+
+    first = EpochSpectra.cached(x, sf, tmp_path, win_sec=5, step_sec=1)
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    again = EpochSpectra.cached(x, sf, tmp_path, win_sec=5, step_sec=1)
+    assert np.array_equal(again.psd, first.psd) and again.win_sec == 5
+    EpochSpectra.cached(x[:-1], sf, tmp_path, win_sec=5, step_sec=1)
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+    # an interrupted write is recomputed and replaced
+    cache_file = tmp_path / f"{EpochSpectra.cache_key(x, sf, win_sec=5, step_sec=1)}.npz"
+    cache_file.write_bytes(cache_file.read_bytes()[:100])
+    again = EpochSpectra.cached(x, sf, tmp_path, win_sec=5, step_sec=1)
+    assert np.array_equal(again.psd, first.psd)
+    assert np.array_equal(EpochSpectra.load(cache_file).psd, first.psd)
+    assert sorted(tmp_path.iterdir()) == sorted(tmp_path.glob("*.npz"))  # no temp files
+
+
+def test_spectrogram_tiles(tmp_path):
+    sf = 128.0
+    x = np.random.default_rng(7).standard_normal(int(sf * 1000.5))
+    whole = EpochSpectra.compute(x, sf, band=[0.5, 30])
+    tiles = SpectrogramTiles(x, sf, tile_sec=100, max_bytes=3 * 100 * whole.freq.size * 4,
+                             band=[0.5, 30])
+    assert tiles.n_tiles == 10 and len(tiles) == 0
+    for start, end in [(0, 30), (95, 215), (960, 1100)]:
+        page = whole.slice(start, end)
+        centers, freq, columns = tiles.window(start, end)
+        # same columns as the normalized whole-channel spectra
+        expected = page.psd.T / page.psd.T.sum(axis=0, dtype=np.float64)
+        assert np.array_equal(centers, page.centers) and np.array_equal(freq, whole.freq)
+        assert columns.dtype == np.float32 and np.allclose(columns, expected, rtol=1e-6)
+    assert len(tiles) == 3  # least recently used tiles were evicted
+    assert tiles.window(2000, 2100)[2].shape == (whole.freq.size, 0)
+
+    SpectrogramTiles(x, sf, tile_sec=100, cache_dir=tmp_path).window(0, 150)
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+
+    # a tile several threads need at once is computed (and saved) once
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    shared = SpectrogramTiles(x, sf, tile_sec=100, cache_dir=tmp_path / "shared")
+    computed, compute = [], shared._compute
+
+    def slow_compute(index):
+        computed.append(index)
+        time.sleep(0.05)
+        return compute(index)
+
+    shared._compute = slow_compute
+    with ThreadPoolExecutor(4) as pool:
+        pages = list(pool.map(lambda _: shared.window(0, 50)[2], range(4)))
+    assert computed == [0] and all(np.array_equal(page, pages[0]) for page in pages)
+
+
+def test_epoch_multitaper_is_unbiased_and_smoother():
+    sf = 128.0
+    x = np.random.default_rng(8).standard_normal(int(sf * 300)) * 2
+    freq, times, psd = epoch_multitaper(x, sf, win_sec=5, step_sec=1, nw=3, band=[0.5, 30])
+    welch_freq, welch_times, welch_psd = epoch_psd(x, sf, win_sec=5, step_sec=1,
+                                                   band=[0.5, 30])
+    assert np.array_equal(freq, welch_freq) and np.array_equal(times, welch_times)
+    # White noise: flat one-sided density 2 * var / sf, with less variance
+    assert np.isclose(psd.mean(), 2 * 4 / sf, rtol=0.05)
+    assert (psd.std(axis=0) / psd.mean(axis=0)).mean() < 0.6 * \
+        (welch_psd.std(axis=0) / welch_psd.mean(axis=0)).mean()
+
+    single = epoch_multitaper(x, sf, win_sec=5, step_sec=1, nw=3, band=[0.5, 30],
+                              dtype=np.float32)[2]
+    assert single.dtype == np.float32 and np.allclose(single, psd, rtol=1e-4)
+
+    spectra = EpochSpectra.compute(x, sf, band=[0.5, 30], method="multitaper", nw=3)
+    assert np.allclose(spectra.psd, psd, rtol=1e-4)
+    with pytest.raises(ValueError):
+        EpochSpectra.compute(x, sf, method="periodogram")
+
+
 def test_band_power(midata):
     freq, psd = spectrum(midata.signals[0], midata.sf[0], band=[0.5, 30], relative=False)
     bp = band_power(psd, freq, bands=[[0.5, 4, "delta"], [4, 9, "theta"]])
@@ -9,7 +9,14 @@ import numpy as np  # noqa: E402
 import pytest  # noqa: E402
 
 from misleep.config import default_config_path, load_config, save_config  # noqa: E402
-from misleep.viz import plot_hypno, plot_signals, plot_spectrogram, plot_spectrum  # noqa: E402
+from misleep.viz import (  # noqa: E402
+    MinMaxPyramid,
+    dominant_states,
+    plot_hypno,
+    plot_signals,
+    plot_spectrogram,
+    plot_spectrum,
+)
 
 
 def test_plot_signals(midata):
@@ -54,6 +61,37 @@ def test_plot_hypno(mianno):
         plot_hypno("not-a-list")
 
 
+def test_minmax_pyramid():
+    sig = np.random.default_rng(0).standard_normal(3 * 2 ** 12 + 5)
+    pyramid = MinMaxPyramid(sig, base_level=4, chunk_level=12)
+    first, mins, maxs = pyramid.level(6, 1000, 9000)
+    assert first == 1000 // 64 and mins.size == -(-9000 // 64) - first
+    bins = sig[first * 64:(first + mins.size) * 64].reshape(-1, 64)
+    assert np.array_equal(mins, bins.min(axis=1)) and np.array_equal(maxs, bins.max(axis=1))
+    # the partial last bin of the recording
+    _, mins, maxs = pyramid.level(12, 0)
+    assert mins[-1] == sig[3 * 2 ** 12:].min() and maxs[-1] == sig[3 * 2 ** 12:].max()
+    xs, ys = pyramid.envelope(100, 12000, bins=200)
+    assert xs.size == ys.size <= 2 * 201 and xs[0] <= 0
+    assert ys.min() == sig[xs[0] + 100:xs[-1] + 100 + 64].min()
+    assert pyramid.envelope(0, 1000, bins=200) is None
+    with pytest.raises(ValueError):
+        pyramid.level(3)
+
+
+def test_dominant_states():
+    states = np.random.default_rng(0).integers(1, 5, 1000)
+    dominant = dominant_states(states, 7)
+    for b in range(7):
+        counts = np.bincount(states[b * 1000 // 7:(b + 1) * 1000 // 7], minlength=5)
+        assert dominant[b] == np.argmax(counts)
+    assert np.array_equal(dominant_states(states, 7, first=2, last=5), dominant[2:5])
+    assert np.array_equal(dominant_states(states, 1000), states)
+    assert list(dominant_states([9, 9, 1], 3, codes=[1, 2])) == [0, 0, 1]
+    with pytest.raises(ValueError):
+        dominant_states(states, 1001)
+
+
 def test_config_defaults():
     cfg = load_config()
     assert "gui" in cfg.sections()
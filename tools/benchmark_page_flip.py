@@ -0,0 +1,119 @@
+# -*- coding: UTF-8 -*-
+"""Benchmark page flips of the MiSleep main window (offscreen).
+
+Development helper -- opens a synthetic recording (white noise with
+random sleep-state runs and a few markers) in the main window, flips
+through it page by page and prints the median and 90th percentile wall
+time of a flip (``next_page``: signal panel, spectrogram strip and
+hypnogram) for every signal view, channel count and window length.
+
+Usage::
+
+    python tools/benchmark_page_flip.py
+    python tools/benchmark_page_flip.py --channels 4 8 16 --window 30 300 3600
+    python tools/benchmark_page_flip.py --view matplotlib qpainter
+    python tools/benchmark_page_flip.py --pause 0.5   # reading time between flips
+
+The user configuration is redirected into a temp folder, so running this
+script never touches your real ``~/.misleep`` settings.
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QT_API", "pyside6")
+
+import numpy as np  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import misleep.config as _config_module  # noqa: E402
+import misleep.logger as _logger_module  # noqa: E402
+
+_CONFIG_DIR = Path(tempfile.mkdtemp(prefix="misleep_bench_"))
+_config_module.get_data_dir = lambda: _CONFIG_DIR
+_logger_module.get_data_dir = lambda: _CONFIG_DIR
+
+
+def open_window(app, n_channels, hours, sf, width, height):
+    """Main window showing ``n_channels`` of synthetic signal."""
+    from misleep.data import MiData
+    from misleep.gui.main_window import MainWindow
+
+    rng = np.random.default_rng(0)
+    n = int(hours * 3600 * sf)
+    data = MiData(
+        signals=[(rng.standard_normal(n) * 50).astype(np.float32) for _ in range(n_channels)],
+        channels=[f"CH{i + 1}" for i in range(n_channels)],
+        sf=[sf] * n_channels, time="20240409-18:00:00")
+    window = MainWindow()
+    window.midata = data
+    window.ac_time = datetime.datetime.strptime(data.time, "%Y%m%d-%H:%M:%S")
+    window.fill_channel_listView()
+    window.check_show()
+    runs = rng.integers(10, 120, size=len(window.mianno.sleep_state) // 10)
+    states = np.repeat(rng.integers(1, 4, size=runs.size), runs)
+    window.mianno.sleep_state[:] = states[:len(window.mianno.sleep_state)].tolist()
+    for sec in rng.uniform(0, hours * 3600, size=int(hours * 20)):
+        window.mianno.marker.append([float(sec), "marker"])
+    window.resize(width, height)
+    window.show()
+    app.processEvents()
+    return window
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, nargs="+", default=[8],
+                        help="number of channels shown")
+    parser.add_argument("--window", type=int, nargs="+", default=[30, 300, 3600],
+                        help="window lengths in seconds")
+    parser.add_argument("--hours", type=float, default=6.0, help="recording length in hours")
+    parser.add_argument("--sf", type=float, default=256.0, help="sampling rate in Hz")
+    parser.add_argument("--flips", type=int, default=20, help="page flips per run")
+    parser.add_argument("--size", type=int, nargs=2, default=[1600, 1000],
+                        metavar=("WIDTH", "HEIGHT"), help="window size in pixels")
+    parser.add_argument("--pause", type=float, default=0.0,
+                        help="idle seconds between flips (not timed), as a user reading "
+                             "the page; lets the adjacent pages be prefetched")
+    parser.add_argument("--view", nargs="+", default=["matplotlib"],
+                        choices=["matplotlib", "qpainter"], help="signal view backends")
+    args = parser.parse_args(argv)
+
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    print(f"{'view':>10} {'channels':>8} {'window':>7}  {'median ms':>10}{'p90 ms':>9}")
+    for view, n_channels in ((view, n) for view in args.view for n in args.channels):
+        window = open_window(app, n_channels, args.hours, args.sf, *args.size)
+        window._set_signal_view(view)
+        for seconds in args.window:
+            window.show_duration = seconds
+            window.redraw_all(0)
+            app.processEvents()
+            times = []
+            for _ in range(args.flips):
+                pause_end = time.perf_counter() + args.pause
+                while time.perf_counter() < pause_end:
+                    app.processEvents()
+                    time.sleep(0.005)
+                start = time.perf_counter()
+                window.next_page()
+                app.processEvents()
+                times.append(time.perf_counter() - start)
+            times = np.array(times) * 1e3
+            print(f"{view:>10} {n_channels:>8} {seconds:>7}  {np.median(times):>10.1f}"
+                  f"{np.percentile(times, 90):>9.1f}")
+        window.is_saved = True
+        window.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: UTF-8 -*-
+"""Benchmark the per-window spectral estimators of ``misleep.preprocessing``.
+
+Development helper -- computes the 5 s / 1 s spectrogram of synthetic
+recordings of several lengths and sampling rates with
+
+* ``stft``          -- ``spectrogram`` (single Hann taper, STFT),
+* ``welch``         -- ``epoch_psd`` (what ``EpochSpectra`` uses by default),
+* ``multitaper``    -- ``epoch_multitaper`` for each ``--nw``, in float64
+  and float32,
+
+restricted to the spectrogram strip band, and prints the wall time of
+every estimator together with the variability of a white-noise spectrum
+(standard deviation / mean across windows, lower is smoother).
+
+Usage::
+
+    python tools/benchmark_spectral.py
+    python tools/benchmark_spectral.py --hours 24 --sf 256 1000 --nw 2 3 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from misleep.preprocessing.spectral import (  # noqa: E402
+    epoch_multitaper,
+    epoch_psd,
+    spectrogram,
+)
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 24],
+                        help="recording lengths in hours")
+    parser.add_argument("--sf", type=float, nargs="+", default=[256],
+                        help="sampling rates in Hz")
+    parser.add_argument("--nw", type=float, nargs="+", default=[2, 3],
+                        help="multitaper time-bandwidth products")
+    parser.add_argument("--win", type=float, default=5.0, help="window length in seconds")
+    parser.add_argument("--step", type=float, default=1.0, help="window step in seconds")
+    parser.add_argument("--low", type=float, default=0.5)
+    parser.add_argument("--high", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    band = [args.low, args.high]
+    print(f"{'hours':>6} {'sf':>6}  {'estimator':<26}{'seconds':>9}{'sd/mean':>9}")
+    for hours in args.hours:
+        for sf in args.sf:
+            data = rng.standard_normal(int(hours * 3600 * sf))
+            runs = {
+                "stft": lambda: spectrogram(data, sf, band=band, step=args.step,
+                                            win_sec=args.win)[2].T,
+                "welch": lambda: epoch_psd(data, sf, win_sec=args.win, step_sec=args.step,
+                                           band=band, dtype=np.float32)[2],
+            }
+            for nw in args.nw:
+                for dtype in (np.float64, np.float32):
+                    runs[f"multitaper nw={nw:g} {np.dtype(dtype).name}"] = (
+                        lambda nw=nw, dtype=dtype: epoch_multitaper(
+                            data, sf, win_sec=args.win, step_sec=args.step, nw=nw,
+                            band=band, dtype=dtype)[2])
+            for name, run in runs.items():
+                seconds, psd = _timed(run)
+                variability = float(np.mean(psd.std(axis=0) / psd.mean(axis=0)))
+                print(f"{hours:>6g} {sf:>6g}  {name:<26}{seconds:>9.2f}{variability:>9.2f}")
+                del psd
+
+
+if __name__ == "__main__":
+    main()